@@ -0,0 +1,257 @@
+"""Concurrent approval stress run: many approvers race on the same Pending timesheets.
+
+Usage: bench --site <site> stress-gnapi-approvals --approvers 50 --timesheets 200
+
+Every thread approves or rejects every selected timesheet in random order, one at a time
+through transition_timesheet or, with mode="bulk", in shuffled batches of approval rows
+through run_bulk_transition. Afterwards each timesheet must have exactly one winning user,
+its stored state must be that user's decision, and none of its approval rows may still be
+Pending or disagree with it, i.e. no update was lost or overwritten.
+
+Needs benchmark data (seed-gnapi-benchmark-data). The racing users hold no roles; they
+approve through Project Approver Map rows on the selected timesheets' projects. Users and
+routes are removed and the touched timesheets put back to Pending at the end.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+
+import frappe
+from frappe.utils import now
+
+from gnapi_customizations.benchmarks.synthetic_data import BENCH_PREFIX
+
+STRESS_USER_PREFIX = f"{BENCH_PREFIX}stress-"
+STRESS_MODES = ("single", "bulk")
+# Approval rows a thread sends per run_bulk_transition call in bulk mode
+BULK_BATCH = 20
+
+def run_approval_stress(
+    site: str, approvers: int = 50, timesheets: int = 200, seed: int = 7, mode: str = "single"
+) -> dict:
+    """Run the race from `approvers` threads; call with frappe initialised for `site`"""
+    if mode not in STRESS_MODES:
+        frappe.throw(f"Unknown stress mode {mode}, expected one of {', '.join(STRESS_MODES)}")
+    names = frappe.get_all(
+        "Custom Timesheet",
+        filters={"name": ("like", f"{BENCH_PREFIX}%"), "docstatus": 1, "approval_status": "Pending"},
+        pluck="name",
+        limit=timesheets,
+    )
+    if not names:
+        frappe.throw("No pending benchmark timesheets found, run seed-gnapi-benchmark-data first")
+
+    users = _create_stress_users(approvers, names)
+    try:
+        report = _race(site, users, names, seed, mode)
+    finally:
+        _reset_timesheets(names)
+        _remove_stress_users(users)
+    return report
+
+def _race(site: str, users: list[str], names: list[str], seed: int, mode: str) -> dict:
+    approvals = frappe.get_all(
+        "Timesheet Approval", filters={"timesheet": ("in", names)}, fields=["name", "timesheet"]
+    )
+    outcomes = {name: [] for name in names}
+    errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(len(users))
+
+    def worker(index: int, user: str):
+        rng = random.Random(seed + index)
+        frappe.init(site=site)
+        frappe.connect()
+        try:
+            frappe.set_user(user)
+            start_barrier.wait()
+            if mode == "bulk":
+                order = approvals[:]
+                rng.shuffle(order)
+                for start in range(0, len(order), BULK_BATCH):
+                    batch = order[start : start + BULK_BATCH]
+                    action = rng.choice(("Approved", "Rejected"))
+                    results = _attempt_bulk([a.name for a in batch], action)
+                    with lock:
+                        for approval in batch:
+                            outcomes[approval.timesheet].append((user, action, results[approval.name]))
+            else:
+                order = names[:]
+                rng.shuffle(order)
+                for name in order:
+                    action = rng.choice(("Approved", "Rejected"))
+                    outcome = _attempt(name, action)
+                    with lock:
+                        outcomes[name].append((user, action, outcome))
+        except Exception as e:
+            with lock:
+                errors.append(f"{user}: {e}")
+        finally:
+            frappe.destroy()
+
+    threads = [threading.Thread(target=worker, args=(i, user)) for i, user in enumerate(users)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = _verify(outcomes)
+    attempts = sum(len(v) for v in outcomes.values())
+    report.update({
+        "mode": mode,
+        "approvers": len(users),
+        "timesheets": len(names),
+        "attempts": attempts,
+        "seconds": round(elapsed, 3),
+        "attempts_per_second": round(attempts / elapsed, 1) if elapsed else None,
+        "thread_errors": errors,
+    })
+    # A thread that died part way never made its attempts, so the run proves nothing
+    report["ok"] = report["ok"] and not errors
+    return report
+
+def _attempt(name: str, action: str) -> str:
+    from gnapi_customizations.customizations.custom_timesheet_events import transition_timesheet
+
+    try:
+        result = transition_timesheet(name, action)
+        frappe.db.commit()
+        return "won" if result["won"] else "already_applied"
+    except frappe.ValidationError:
+        frappe.db.rollback()
+        frappe.clear_messages()
+        return "conflict"
+    except Exception as e:
+        frappe.db.rollback()
+        if frappe.db.is_deadlocked(e) or frappe.db.is_timedout(e):
+            return "lock_error"
+        raise
+
+def _attempt_bulk(names: list[str], action: str) -> dict[str, str]:
+    """approval -> won / already_applied / conflict / lock_error for one run_bulk_transition call"""
+    from gnapi_customizations.customizations.timesheet_approval_events import run_bulk_transition
+
+    outcome_by_status = {"updated": "won", "already_applied": "already_applied", "conflict": "conflict"}
+    response = run_bulk_transition(names, action)
+    frappe.clear_messages()
+    return {
+        result["name"]: outcome_by_status.get(
+            result["status"],
+            "lock_error" if "deadlock" in (result.get("message") or "").lower() else result["status"],
+        )
+        for result in response["results"]
+    }
+
+def _verify(outcomes: dict[str, list]) -> dict:
+    stored = {
+        row.name: row
+        for row in frappe.get_all(
+            "Custom Timesheet",
+            filters={"name": ("in", list(outcomes))},
+            fields=["name", "approval_status", "approved_by"],
+        )
+    }
+    # Approval rows left Pending, or closed with another decision than their timesheet's
+    stray_approvals = sorted({
+        row.timesheet
+        for row in frappe.get_all(
+            "Timesheet Approval",
+            filters={"timesheet": ("in", list(outcomes))},
+            fields=["timesheet", "approval_status"],
+        )
+        if row.approval_status == "Pending"
+        or (row.approval_status in ("Approved", "Rejected") and row.approval_status != stored[row.timesheet].approval_status)
+    })
+
+    lost, multiple_winners, lock_errors, other_errors = [], [], 0, 0
+    for name, attempts in outcomes.items():
+        # A bulk call reports every selected row of the timesheet it decided, all from one user
+        winners = {(user, action) for user, action, outcome in attempts if outcome == "won"}
+        lock_errors += sum(1 for _u, _a, outcome in attempts if outcome == "lock_error")
+        other_errors += sum(
+            1 for _u, _a, outcome in attempts if outcome not in ("won", "already_applied", "conflict", "lock_error")
+        )
+        if len(winners) != 1:
+            multiple_winners.append(name)
+            continue
+        user, action = next(iter(winners))
+        row = stored.get(name)
+        if not row or row.approved_by != user or row.approval_status != action:
+            lost.append(name)
+
+    return {
+        "ok": not lost and not multiple_winners and not stray_approvals and not other_errors,
+        "lost_updates": lost,
+        "timesheets_without_single_winner": multiple_winners,
+        "timesheets_with_stray_approvals": stray_approvals,
+        "lock_errors": lock_errors,
+        "other_errors": other_errors,
+    }
+
+def _create_stress_users(count: int, timesheets: list[str]) -> list[str]:
+    """Role-less users routed as approvers of every project on the given timesheets"""
+    users = [f"{STRESS_USER_PREFIX}{i}@example.com" for i in range(count)]
+    _remove_stress_users(users)
+    projects = frappe.db.sql_list(
+        """
+        SELECT DISTINCT project FROM `tabCustom Timesheet Detail`
+        WHERE parent IN %(timesheets)s AND parenttype = 'Custom Timesheet' AND IFNULL(project, '') != ''
+        """,
+        {"timesheets": tuple(timesheets)},
+    )
+    timestamp = now()
+    frappe.db.bulk_insert(
+        "User",
+        ["name", "email", "first_name", "enabled", "user_type", "creation", "modified", "owner", "modified_by"],
+        [(u, u, u.split("@")[0], 1, "System User", timestamp, timestamp, "Administrator", "Administrator") for u in users],
+    )
+    frappe.db.bulk_insert(
+        "Project Approver Map",
+        ["name", "project", "user", "source", "priority", "creation", "modified", "owner", "modified_by"],
+        [
+            (f"{STRESS_USER_PREFIX}{frappe.generate_hash(length=12)}", project, user, "Project", 100 + i,
+             timestamp, timestamp, "Administrator", "Administrator")
+            for i, user in enumerate(users)
+            for project in projects
+        ],
+    )
+    frappe.db.commit()
+    return users
+
+def _remove_stress_users(users: list[str]) -> None:
+    from gnapi_customizations.customizations.permission_context import clear_permission_context
+
+    frappe.db.sql("DELETE FROM `tabProject Approver Map` WHERE name LIKE %s", f"{STRESS_USER_PREFIX}%")
+    frappe.db.sql("DELETE FROM `tabHas Role` WHERE parent IN %s", (tuple(users),))
+    frappe.db.sql("DELETE FROM `tabUser` WHERE name IN %s", (tuple(users),))
+    frappe.db.commit()
+    clear_permission_context(users)
+
+def _reset_timesheets(names: list[str]) -> None:
+    from gnapi_customizations.customizations.hours_rollup import RollupTracker
+
+    tracker = RollupTracker(names)
+    frappe.db.sql(
+        """
+        UPDATE `tabCustom Timesheet`
+        SET status = 'Submitted', approval_status = 'Pending', approved_by = NULL, approval_date = NULL,
+            approval_comments = NULL
+        WHERE name IN %s
+        """,
+        (tuple(names),),
+    )
+    frappe.db.sql(
+        """
+        UPDATE `tabTimesheet Approval` SET approval_status = 'Pending', approval_date = NULL
+        WHERE timesheet IN %s
+        """,
+        (tuple(names),),
+    )
+    tracker.apply()
+    frappe.db.sql("DELETE FROM `tabApproval Notification Queue` WHERE timesheet IN %s", (tuple(names),))
+    frappe.db.commit()
@@ -0,0 +1,220 @@
+"""Timing runner for the timesheet event handlers against seeded synthetic data.
+
+Usage: bench --site <site> run-gnapi-benchmarks --scales 0.01,0.1,1 --output results.json
+Compare the JSON of two releases to spot regressions.
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import time
+from datetime import datetime
+
+import frappe
+
+from gnapi_customizations import __version__
+from gnapi_customizations.benchmarks.synthetic_data import BENCH_PREFIX, seed_benchmark_data
+
+DEFAULT_SCALES = (0.01, 0.1, 1.0)
+DEFAULT_ITERATIONS = 20
+BULK_APPROVE_SIZE = 100
+
+def run_benchmarks(
+    scales: list[float] | tuple[float, ...] = DEFAULT_SCALES,
+    iterations: int = DEFAULT_ITERATIONS,
+    output: str | None = None,
+    reseed: bool = True,
+) -> dict:
+    """Seed each data size in turn and time the hot handlers; returns (and optionally writes) the report"""
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "site": frappe.local.site,
+        "app_version": __version__,
+        "frappe_version": frappe.__version__,
+        "python": platform.python_version(),
+        "iterations": iterations,
+        "runs": [],
+    }
+
+    for scale in scales:
+        profile = seed_benchmark_data(scale=scale) if reseed else {"scale": scale}
+        report["runs"].append({
+            "scale": scale,
+            "profile": profile,
+            "results": run_benchmark_suite(iterations),
+        })
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=1, default=str)
+    return report
+
+def run_benchmark_suite(iterations: int = DEFAULT_ITERATIONS) -> dict:
+    approver, employee_user, employee = _pick_sample_users()
+    timesheet = frappe.db.get_value(
+        "Timesheet Approval", {"approver": approver, "timesheet": ("like", f"{BENCH_PREFIX}%")}, "timesheet"
+    )
+
+    results = {}
+    try:
+        results["permission_query"] = _time_cold_and_warm(
+            lambda: _run_permission_query(approver), [approver], iterations
+        )
+        doc = frappe.get_doc("Custom Timesheet", timesheet)
+        results["has_permission"] = _time_cold_and_warm(
+            lambda: _has_permission(doc, approver), [approver], iterations
+        )
+
+        frappe.set_user(employee_user)
+        results["validate"] = _time(lambda: _validate_new_timesheet(employee), iterations)
+
+        frappe.set_user("Administrator")
+        results["create_approval_for_timesheet"] = _time(
+            lambda: _create_approvals(timesheet), iterations
+        )
+
+        frappe.set_user(approver)
+        results["bulk_approve"] = _time_bulk_approve(approver, max(1, iterations // 4))
+    finally:
+        frappe.set_user("Administrator")
+        frappe.db.rollback()
+
+    return results
+
+def _pick_sample_users() -> tuple[str, str, str]:
+    # The busiest approver gives the widest permission query
+    approver = frappe.db.sql(
+        """
+        SELECT approver FROM `tabTimesheet Approval`
+        WHERE timesheet LIKE %s AND approval_status = 'Pending'
+        GROUP BY approver ORDER BY COUNT(*) DESC LIMIT 1
+        """,
+        f"{BENCH_PREFIX}%",
+    )
+    employee = frappe.db.get_value(
+        "Employee", {"name": ("like", f"{BENCH_PREFIX}%")}, ["user_id", "name"], as_dict=True
+    )
+    if not approver or not employee:
+        frappe.throw("No benchmark data found, run seed_benchmark_data first")
+    return approver[0][0], employee.user_id, employee.name
+
+def _summarize(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0] * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+def _time(fn, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+        frappe.db.rollback()
+    return _summarize(samples)
+
+def _time_cold_and_warm(fn, users: list[str], iterations: int) -> dict:
+    """Time with an empty permission context cache (first request) and with it populated"""
+    from gnapi_customizations.customizations.permission_context import clear_permission_context
+
+    cold = []
+    for _ in range(iterations):
+        clear_permission_context(users)
+        start = time.perf_counter()
+        fn()
+        cold.append(time.perf_counter() - start)
+
+    return {"cold": _summarize(cold), "warm": _time(fn, iterations)}
+
+def _run_permission_query(user: str) -> None:
+    from gnapi_customizations.customizations.custom_timesheet_events import custom_timesheet_permission_query
+
+    condition = custom_timesheet_permission_query(user) or "1 = 1"
+    frappe.db.sql(f"SELECT name FROM `tabCustom Timesheet` WHERE {condition} ORDER BY modified DESC LIMIT 20")
+
+def _has_permission(doc, user: str) -> None:
+    from gnapi_customizations.customizations.custom_timesheet_events import custom_timesheet_has_permission
+
+    custom_timesheet_has_permission(doc, user)
+
+def _validate_new_timesheet(employee: str) -> None:
+    from gnapi_customizations.customizations.custom_timesheet_events import on_custom_timesheet_validate
+
+    project, task = frappe.db.get_value(
+        "Task", {"name": ("like", f"{BENCH_PREFIX}%")}, ["project", "name"]
+    )
+    # A day after the seeded range so the overlap check scans history without matching
+    day = datetime(2030, 1, 1, 8, 0)
+    doc = frappe.get_doc({
+        "doctype": "Custom Timesheet",
+        "employee": employee,
+        "time_logs": [
+            {
+                "project": project,
+                "task": task,
+                "start_date_time": day.replace(hour=8 + i),
+                "end_date_time": day.replace(hour=9 + i),
+            }
+            for i in range(8)
+        ],
+    })
+    on_custom_timesheet_validate(doc)
+
+def _create_approvals(timesheet: str) -> None:
+    from gnapi_customizations.customizations.timesheet_approval_events import create_approval_for_timesheet
+
+    # Measure the full fan-out, not the "already exists" short cut; rolled back by _time
+    frappe.db.sql("DELETE FROM `tabTimesheet Approval` WHERE timesheet = %s", timesheet)
+    create_approval_for_timesheet(timesheet)
+
+def _time_bulk_approve(approver: str, iterations: int) -> dict:
+    """bulk_approve commits per chunk, so every run is undone explicitly afterwards"""
+    from gnapi_customizations.customizations.timesheet_approval_events import bulk_approve
+
+    samples = []
+    for _ in range(iterations):
+        names = frappe.get_all(
+            "Timesheet Approval",
+            filters={"approver": approver, "approval_status": "Pending", "timesheet": ("like", f"{BENCH_PREFIX}%")},
+            pluck="name",
+            limit=BULK_APPROVE_SIZE,
+        )
+        if not names:
+            break
+        start = time.perf_counter()
+        bulk_approve(json.dumps(names))
+        samples.append(time.perf_counter() - start)
+        _reset_approvals(names)
+
+    return {"batch_size": BULK_APPROVE_SIZE, **(_summarize(samples) if samples else {"runs": 0})}
+
+def _reset_approvals(names: list[str]) -> None:
+    from gnapi_customizations.customizations.hours_rollup import RollupTracker
+    from gnapi_customizations.customizations.pending_approvals import PENDING_COUNT_CACHE_KEY
+
+    timesheets = frappe.get_all("Timesheet Approval", filters={"name": ("in", names)}, pluck="timesheet")
+    # The other approvers' rows were Superseded by the run; reopen them too so every
+    # iteration approves the same workload
+    frappe.db.sql(
+        "UPDATE `tabTimesheet Approval` SET approval_status = 'Pending', approval_date = NULL WHERE timesheet IN %s",
+        (tuple(set(timesheets)),),
+    )
+    tracker = RollupTracker(timesheets)
+    frappe.db.sql(
+        """
+        UPDATE `tabCustom Timesheet`
+        SET status = 'Submitted', approval_status = 'Pending', approved_by = NULL, approval_date = NULL
+        WHERE name IN %s
+        """,
+        (tuple(set(timesheets)),),
+    )
+    tracker.apply()
+    frappe.db.sql("DELETE FROM `tabApproval Notification Queue` WHERE timesheet IN %s", (tuple(set(timesheets)),))
+    frappe.db.commit()
+    frappe.cache().delete_keys(PENDING_COUNT_CACHE_KEY)
@@ -0,0 +1,238 @@
+"""Synthetic data for benchmarking the timesheet event handlers on a local site.
+
+Everything created here is named with BENCH_PREFIX so it can be removed again with
+clear_benchmark_data(). Rows are written with frappe.db.bulk_insert, bypassing
+controllers, so never point this at a production site.
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+
+import frappe
+from frappe.utils import now
+
+BENCH_PREFIX = "bench-"
+INSERT_BATCH = 5000
+
+# Full-size profile; seed_benchmark_data(scale=0.1) gives a tenth of everything
+DEFAULT_PROFILE = {
+    "employees": 5000,
+    "projects": 2000,
+    "max_approvers_per_project": 3,
+    "approver_pool": 250,
+    "time_logs": 1_000_000,
+    "rows_per_timesheet": 8,
+}
+
+def scaled_profile(scale: float = 1.0, **overrides) -> dict:
+    profile = {
+        key: max(1, int(value * scale)) if key not in ("max_approvers_per_project", "rows_per_timesheet") else value
+        for key, value in DEFAULT_PROFILE.items()
+    }
+    profile.update({k: v for k, v in overrides.items() if v is not None})
+    return profile
+
+def seed_benchmark_data(scale: float = 1.0, seed: int = 42, **overrides) -> dict:
+    """Create users, employees, projects with multi-approver lists and time logs; returns the profile used"""
+    from gnapi_customizations.customizations.hours_rollup import rebuild_hours_rollup
+    from gnapi_customizations.customizations.timesheet_visibility import refresh_timesheet_visibility
+
+    profile = scaled_profile(scale, **overrides)
+    rng = random.Random(seed)
+    clear_benchmark_data()
+
+    company = frappe.defaults.get_global_default("company") or frappe.db.get_value("Company", {}, "name")
+    approvers = [f"{BENCH_PREFIX}approver-{i}@example.com" for i in range(profile["approver_pool"])]
+    employee_users = [f"{BENCH_PREFIX}employee-{i}@example.com" for i in range(profile["employees"])]
+
+    _insert_users(approvers + employee_users)
+    employees = _insert_employees(employee_users, company)
+    projects = _insert_projects(profile, approvers, rng)
+    tasks = _insert_tasks(projects)
+    _insert_timesheets(profile, employees, projects, tasks, rng)
+
+    rebuild_hours_rollup()
+    refresh_timesheet_visibility(
+        frappe.get_all("Custom Timesheet", filters={"name": ("like", f"{BENCH_PREFIX}%")}, pluck="name")
+    )
+    frappe.db.commit()
+    frappe.cache().delete_value("gnapi_permission_context")
+    return profile
+
+def clear_benchmark_data() -> None:
+    like = f"{BENCH_PREFIX}%"
+    frappe.db.sql(
+        """
+        DELETE d FROM `tabCustom Timesheet Detail` d
+        INNER JOIN `tabCustom Timesheet` t ON t.name = d.parent
+        WHERE t.name LIKE %s
+        """,
+        like,
+    )
+    for doctype, column in (
+        ("Timesheet Approval", "timesheet"),
+        ("Approval Notification Queue", "timesheet"),
+        ("Timesheet Hours Rollup", "employee"),
+        ("Timesheet Visibility", "timesheet"),
+        ("Custom Timesheet", "name"),
+        ("Task", "name"),
+        ("Project Approver Map", "project"),
+        ("Project Approver Entry", "project"),
+        ("Project", "name"),
+        ("Employee", "name"),
+        ("Has Role", "parent"),
+        ("User", "name"),
+    ):
+        frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE `{column}` LIKE %s", like)
+    frappe.db.commit()
+
+def _bulk_insert(doctype: str, fields: list[str], rows) -> None:
+    timestamp = now()
+    audit = [timestamp, timestamp, "Administrator", "Administrator"]
+    batch = []
+    for row in rows:
+        batch.append([*row, *audit])
+        if len(batch) >= INSERT_BATCH:
+            frappe.db.bulk_insert(doctype, fields + ["creation", "modified", "owner", "modified_by"], batch)
+            batch = []
+    if batch:
+        frappe.db.bulk_insert(doctype, fields + ["creation", "modified", "owner", "modified_by"], batch)
+
+def _insert_users(users: list[str]) -> None:
+    _bulk_insert(
+        "User",
+        ["name", "email", "first_name", "enabled", "user_type"],
+        ((u, u, u.split("@")[0], 1, "System User") for u in users),
+    )
+    _bulk_insert(
+        "Has Role",
+        ["name", "parent", "parenttype", "parentfield", "role", "idx"],
+        ((f"{BENCH_PREFIX}{frappe.generate_hash(length=12)}", u, "User", "roles", "Employee", 1) for u in users),
+    )
+
+def _insert_employees(users: list[str], company: str | None) -> list[str]:
+    employees = [f"{BENCH_PREFIX}EMP-{i:06d}" for i in range(len(users))]
+    _bulk_insert(
+        "Employee",
+        ["name", "first_name", "employee_name", "user_id", "status", "company", "gender", "date_of_birth", "date_of_joining"],
+        (
+            (emp, emp, emp, user, "Active", company, "Male", "1990-01-01", "2020-01-01")
+            for emp, user in zip(employees, users)
+        ),
+    )
+    return employees
+
+def _insert_projects(profile: dict, approvers: list[str], rng: random.Random) -> dict[str, list[str]]:
+    projects = {}
+    for i in range(profile["projects"]):
+        count = rng.randint(1, profile["max_approvers_per_project"])
+        projects[f"{BENCH_PREFIX}PROJ-{i:05d}"] = rng.sample(approvers, min(count, len(approvers)))
+
+    _bulk_insert(
+        "Project",
+        ["name", "project_name", "status", "approver"],
+        ((name, name, "Open", ", ".join(users)) for name, users in projects.items()),
+    )
+    _bulk_insert(
+        "Project Approver Map",
+        ["name", "project", "user", "source", "priority"],
+        (
+            (f"{BENCH_PREFIX}{frappe.generate_hash(length=12)}", project, user, "Project", priority)
+            for project, users in projects.items()
+            for priority, user in enumerate(users)
+        ),
+    )
+    _bulk_insert(
+        "Project Approver Entry",
+        ["name", "project", "entry", "source"],
+        (
+            (f"{BENCH_PREFIX}{frappe.generate_hash(length=12)}", project, user, "Project")
+            for project, users in projects.items()
+            for user in users
+        ),
+    )
+    return projects
+
+def _insert_tasks(projects: dict[str, list[str]]) -> dict[str, str]:
+    tasks = {project: f"{BENCH_PREFIX}TASK-{project[len(BENCH_PREFIX):]}" for project in projects}
+    _bulk_insert(
+        "Task",
+        ["name", "subject", "project", "status"],
+        ((task, task, project, "Open") for project, task in tasks.items()),
+    )
+    return tasks
+
+def _insert_timesheets(
+    profile: dict, employees: list[str], projects: dict[str, list[str]], tasks: dict[str, str], rng: random.Random
+) -> None:
+    # Each sheet is one working day; an employee's sheets are on consecutive days, so nothing overlaps
+    rows_per_sheet = profile["rows_per_timesheet"]
+    sheet_count = max(1, profile["time_logs"] // rows_per_sheet)
+    project_names = list(projects)
+    base_day = datetime(2024, 1, 1, 8, 0)
+
+    def sheets():
+        for i in range(sheet_count):
+            employee = employees[i % len(employees)]
+            day = base_day + timedelta(days=i // len(employees))
+            roll = rng.random()
+            docstatus, status, approval = (
+                (0, "Draft", "Pending") if roll < 0.4
+                else (1, "Submitted", "Pending") if roll < 0.8
+                else (1, "Approved", "Approved")
+            )
+            sheet_projects = rng.sample(project_names, min(2, len(project_names)))
+            yield f"{BENCH_PREFIX}TS-{i:08d}", employee, day, docstatus, status, approval, sheet_projects
+
+    sheet_rows, detail_rows, approval_rows = [], [], []
+
+    def flush():
+        _bulk_insert(
+            "Custom Timesheet",
+            ["name", "employee", "total_hours", "status", "approval_status", "docstatus"],
+            sheet_rows,
+        )
+        _bulk_insert(
+            "Custom Timesheet Detail",
+            ["name", "parent", "parenttype", "parentfield", "idx", "project", "task",
+             "start_date_time", "end_date_time", "taken_hours", "is_billable", "docstatus"],
+            detail_rows,
+        )
+        _bulk_insert(
+            "Timesheet Approval",
+            ["name", "timesheet", "employee", "project", "approver", "approval_status",
+             "total_hours", "timesheet_date", "docstatus"],
+            approval_rows,
+        )
+        sheet_rows.clear()
+        detail_rows.clear()
+        approval_rows.clear()
+
+    for name, employee, day, docstatus, status, approval, sheet_projects in sheets():
+        sheet_rows.append((name, employee, float(rows_per_sheet), status, approval, docstatus))
+        for idx in range(rows_per_sheet):
+            project = sheet_projects[idx % len(sheet_projects)]
+            start = day + timedelta(hours=idx)
+            detail_rows.append((
+                f"{name}-{idx + 1}", name, "Custom Timesheet", "time_logs", idx + 1, project, tasks[project],
+                start, start + timedelta(hours=1), 1.0, idx % 2, docstatus,
+            ))
+        if docstatus == 1:
+            approvers = {}
+            for project in sheet_projects:
+                for approver in projects[project]:
+                    approvers.setdefault(approver, project)
+            for approver, project in approvers.items():
+                approval_rows.append((
+                    f"{name}-{approver}", name, employee, project, approver, approval,
+                    float(rows_per_sheet), day.date(), 0,
+                ))
+
+        if len(detail_rows) >= INSERT_BATCH:
+            flush()
+            frappe.db.commit()
+
+    flush()
+    frappe.db.commit()
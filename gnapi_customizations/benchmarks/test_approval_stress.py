@@ -0,0 +1,39 @@
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from gnapi_customizations.benchmarks.approval_stress import run_approval_stress
+from gnapi_customizations.benchmarks.synthetic_data import BENCH_PREFIX, clear_benchmark_data, seed_benchmark_data
+
+class TestApprovalStress(FrappeTestCase):
+    """Races real threads on their own connections, so the data is committed: run on a test site only"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # About 60 sheets, a third of them submitted and Pending, over 4 projects and 5 approvers
+        seed_benchmark_data(scale=0.002, seed=11, approver_pool=5, time_logs=480)
+
+    @classmethod
+    def tearDownClass(cls):
+        clear_benchmark_data()
+        super().tearDownClass()
+
+    def assert_single_winner(self, mode: str) -> None:
+        report = run_approval_stress(frappe.local.site, approvers=10, timesheets=15, mode=mode)
+        self.assertEqual(report["thread_errors"], [])
+        self.assertEqual(report["lost_updates"], [])
+        self.assertEqual(report["timesheets_without_single_winner"], [])
+        self.assertEqual(report["timesheets_with_stray_approvals"], [])
+        self.assertTrue(report["ok"])
+
+    def test_single_transitions_have_one_winner(self):
+        self.assert_single_winner("single")
+
+    def test_bulk_transitions_have_one_winner(self):
+        self.assert_single_winner("bulk")
+
+    def test_timesheets_are_pending_again_after_a_run(self):
+        run_approval_stress(frappe.local.site, approvers=3, timesheets=5, mode="single")
+        self.assertFalse(
+            frappe.db.exists("Timesheet Approval", {"timesheet": ("like", f"{BENCH_PREFIX}%"), "approval_status": "Superseded"})
+        )
@@ -0,0 +1,223 @@
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+@click.command("rebuild-hours-rollup")
+@pass_context
+def rebuild_hours_rollup(context):
+    """Recompute the Timesheet Hours Rollup from all Custom Timesheets"""
+    from gnapi_customizations.customizations.hours_rollup import rebuild_hours_rollup
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+    try:
+        rows = rebuild_hours_rollup()
+        frappe.db.commit()
+        click.echo(f"Rebuilt hours rollup: {rows} rows")
+    finally:
+        frappe.destroy()
+
+@click.command("rebuild-timesheet-visibility")
+@pass_context
+def rebuild_timesheet_visibility(context):
+    """Recompute the Timesheet Visibility table from all Custom Timesheets and approver routes"""
+    from gnapi_customizations.customizations.timesheet_visibility import rebuild_timesheet_visibility
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+    try:
+        rows = rebuild_timesheet_visibility()
+        frappe.db.commit()
+        click.echo(f"Rebuilt timesheet visibility: {rows} rows")
+    finally:
+        frappe.destroy()
+
+@click.command("check-query-plans")
+@pass_context
+def check_query_plans(context):
+    """EXPLAIN the approval hot-path queries and fail if any falls back to a full scan"""
+    from gnapi_customizations.query_plans import check_query_plans
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+    try:
+        report = check_query_plans(raise_on_failure=False)
+    finally:
+        frappe.destroy()
+
+    for row in report:
+        status = "ok" if row["ok"] else f"FULL SCAN on {', '.join(row['full_scans'])}"
+        click.echo(f"{row['query']}: {status}")
+
+    if not all(row["ok"] for row in report):
+        raise SystemExit(1)
+
+@click.command("seed-gnapi-benchmark-data")
+@click.option("--scale", default=1.0, type=float, help="Fraction of the full profile (5k employees, 1M time logs)")
+@click.option("--clear", is_flag=True, help="Only remove previously seeded benchmark data")
+@pass_context
+def seed_benchmark_data(context, scale, clear):
+    """Fill the site with synthetic employees, projects and timesheets for benchmarking"""
+    from gnapi_customizations.benchmarks.synthetic_data import clear_benchmark_data, seed_benchmark_data
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+    try:
+        if clear:
+            clear_benchmark_data()
+            click.echo("Removed benchmark data")
+        else:
+            profile = seed_benchmark_data(scale=scale)
+            click.echo(f"Seeded benchmark data: {profile}")
+    finally:
+        frappe.destroy()
+
+@click.command("run-gnapi-benchmarks")
+@click.option("--scales", default="0.01,0.1,1", help="Comma separated data sizes to seed and time")
+@click.option("--iterations", default=20, type=int)
+@click.option("--output", default="gnapi-benchmarks.json", help="Where to write the JSON results")
+@click.option("--no-reseed", is_flag=True, help="Time the data already on the site instead of seeding")
+@pass_context
+def run_benchmarks(context, scales, iterations, output, no_reseed):
+    """Time the timesheet event handlers at several data sizes and save the results as JSON"""
+    from gnapi_customizations.benchmarks.runner import run_benchmarks
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+    try:
+        report = run_benchmarks(
+            scales=[float(s) for s in scales.split(",") if s.strip()],
+            iterations=iterations,
+            output=output,
+            reseed=not no_reseed,
+        )
+    finally:
+        frappe.destroy()
+
+    for run in report["runs"]:
+        click.echo(f"scale {run['scale']}:")
+        for name, result in run["results"].items():
+            median = result["warm"]["median_ms"] if "warm" in result else result.get("median_ms")
+            click.echo(f"  {name}: median {median} ms")
+    click.echo(f"Results written to {output}")
+
+@click.command("import-time-logs")
+@click.argument("path")
+@click.option("--period", default="day", type=click.Choice(["day", "week", "month"]), help="One Custom Timesheet per employee and period")
+@click.option("--format", "file_format", type=click.Choice(["csv", "jsonl"]), help="Defaults to the file extension")
+@click.option("--error-report", help="Where to write rejected rows (default: <path>.errors.csv)")
+@pass_context
+def import_time_logs(context, path, period, file_format, error_report):
+    """Stream a CSV or JSON Lines file of time logs into draft Custom Timesheets"""
+    from gnapi_customizations.customizations.timesheet_import import import_time_logs
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+    try:
+        summary = import_time_logs(path, period=period, file_format=file_format, error_report=error_report)
+    finally:
+        frappe.destroy()
+
+    click.echo(
+        f"Imported {summary['imported_rows']} of {summary['rows']} rows into {summary['timesheets']} timesheets"
+    )
+    if summary["error_report"]:
+        click.echo(f"{summary['errors']} rows rejected, see {summary['error_report']}")
+
+@click.command("export-time-logs")
+@click.argument("path")
+@click.option("--format", "file_format", default="csv", type=click.Choice(["csv", "parquet"]))
+@click.option("--status", "approval_status", default="Approved", help="Approval status to export, empty for all")
+@click.option("--from-date")
+@click.option("--to-date")
+@click.option("--user", default="Administrator", help="Export only what this user may read")
+@click.option("--include-archived", is_flag=True, help="Also export timesheets moved to the archive tables")
+@pass_context
+def export_time_logs(context, path, file_format, approval_status, from_date, to_date, user, include_archived):
+    """Stream Custom Timesheet time logs to a CSV or Parquet file"""
+    from gnapi_customizations.customizations.timesheet_export import export_time_logs
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+    try:
+        frappe.set_user(user)
+        rows = export_time_logs(
+            path,
+            user=user,
+            file_format=file_format,
+            approval_status=approval_status or None,
+            from_date=from_date,
+            to_date=to_date,
+            include_archived=include_archived,
+        )
+    finally:
+        frappe.destroy()
+
+    click.echo(f"Exported {rows} time logs to {path}")
+
+@click.command("archive-timesheets")
+@click.option("--after-days", type=int, help="Minimum age in days (default: gnapi_archive_after_days or 365)")
+@click.option("--batch-size", type=int, help="Timesheets moved per transaction")
+@click.option("--max-batches", type=int, help="Stop after this many batches")
+@pass_context
+def archive_timesheets(context, after_days, batch_size, max_batches):
+    """Move old Approved/Rejected Custom Timesheets to the archive tables"""
+    from gnapi_customizations.customizations.timesheet_archive import archive_closed_timesheets
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+    try:
+        archived = archive_closed_timesheets(after_days, batch_size, max_batches)
+    finally:
+        frappe.destroy()
+
+    click.echo(f"Archived {archived} timesheets")
+
+@click.command("stress-gnapi-approvals")
+@click.option("--approvers", default=50, type=int, help="Concurrent approver threads")
+@click.option("--timesheets", default=200, type=int, help="Pending benchmark timesheets they race on")
+@click.option(
+    "--mode",
+    default="single",
+    type=click.Choice(["single", "bulk"]),
+    help="Race transition_timesheet, or the bulk approve/reject path in batches of approval rows",
+)
+@pass_context
+def stress_approvals(context, approvers, timesheets, mode):
+    """Race many approvers on the same timesheets and check that exactly one decision wins each"""
+    from gnapi_customizations.benchmarks.approval_stress import run_approval_stress
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        report = run_approval_stress(site, approvers=approvers, timesheets=timesheets, mode=mode)
+    finally:
+        frappe.destroy()
+
+    click.echo(
+        f"{report['attempts']} attempts by {report['approvers']} approvers on {report['timesheets']} timesheets "
+        f"({report['mode']}) in {report['seconds']}s ({report['attempts_per_second']}/s), "
+        f"{report['lock_errors']} lock errors"
+    )
+    for error in report["thread_errors"]:
+        click.echo(f"thread error: {error}")
+    if not report["ok"]:
+        click.echo(f"Lost updates: {report['lost_updates']}")
+        click.echo(f"Timesheets without a single winner: {report['timesheets_without_single_winner']}")
+        click.echo(f"Timesheets with stray approval rows: {report['timesheets_with_stray_approvals']}")
+        click.echo(f"Unexpected outcomes: {report['other_errors']}, thread errors: {len(report['thread_errors'])}")
+        raise SystemExit(1)
+    click.echo("No lost updates, every timesheet has exactly one winner")
+
+commands = [
+    rebuild_hours_rollup,
+    rebuild_timesheet_visibility,
+    check_query_plans,
+    seed_benchmark_data,
+    run_benchmarks,
+    import_time_logs,
+    export_time_logs,
+    archive_timesheets,
+    stress_approvals,
+]
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import frappe
+from frappe.utils import add_to_date, format_datetime, now, now_datetime
+
+QUEUE_DOCTYPE = "Approval Notification Queue"
+# Minutes events for one employee are held so they can be merged into a single mail
+DEFAULT_DIGEST_WINDOW_MINUTES = 15
+
+def queue_approval_notifications(events: list[dict]) -> None:
+    """Queue approve/reject notifications; the scheduled digest job sends them.
+
+    Each event needs timesheet, employee and action, and may carry comments.
+    """
+    events = [e for e in events if e.get("timesheet") and e.get("employee")]
+    if not events:
+        return
+
+    timestamp = now()
+    actor = frappe.session.user
+    frappe.db.bulk_insert(
+        QUEUE_DOCTYPE,
+        fields=[
+            "name", "timesheet", "employee", "action", "actor", "action_date", "comments",
+            "creation", "modified", "owner", "modified_by",
+        ],
+        values=[
+            (
+                frappe.generate_hash(length=10),
+                event["timesheet"],
+                event["employee"],
+                event["action"],
+                actor,
+                timestamp,
+                event.get("comments") or None,
+                timestamp,
+                timestamp,
+                actor,
+                actor,
+            )
+            for event in events
+        ],
+    )
+
+def get_digest_window() -> int:
+    return frappe.utils.cint(frappe.conf.get("gnapi_notification_digest_minutes") or DEFAULT_DIGEST_WINDOW_MINUTES)
+
+def send_approval_digests() -> None:
+    """Scheduled: send one digest per employee whose oldest queued event is older than the window"""
+    cutoff = add_to_date(now_datetime(), minutes=-get_digest_window())
+    employees = frappe.db.sql(
+        f"""
+        SELECT employee FROM `tab{QUEUE_DOCTYPE}`
+        GROUP BY employee
+        HAVING MIN(creation) <= %s
+        """,
+        cutoff,
+        pluck=True,
+    )
+    if not employees:
+        return
+
+    # Resolve every recipient in one query instead of one Employee lookup per mail
+    users = dict(
+        frappe.get_all(
+            "Employee", filters={"name": ("in", employees)}, fields=["name", "user_id"], as_list=True
+        )
+    )
+
+    for employee in employees:
+        events = frappe.get_all(
+            QUEUE_DOCTYPE,
+            filters={"employee": employee},
+            fields=["name", "timesheet", "action", "actor", "action_date", "comments"],
+            order_by="creation asc",
+        )
+        try:
+            if users.get(employee):
+                _send_digest(users[employee], employee, events)
+            frappe.db.delete(QUEUE_DOCTYPE, {"name": ("in", [e.name for e in events])})
+            frappe.db.commit()
+        except Exception as e:
+            frappe.db.rollback()
+            frappe.log_error(f"Error sending approval digest to {employee}: {str(e)}")
+
+def _send_digest(recipient: str, employee: str, events: list) -> None:
+    if len(events) == 1:
+        event = events[0]
+        subject = f"Timesheet {event.action.title()}: {event.timesheet}"
+    else:
+        subject = f"{len(events)} timesheet approval updates"
+
+    rows = "".join(
+        f"""
+        <tr>
+            <td><a href="/app/custom-timesheet/{e.timesheet}">{e.timesheet}</a></td>
+            <td>{e.action.title()}</td>
+            <td>{e.actor or ""}</td>
+            <td>{format_datetime(e.action_date) if e.action_date else ""}</td>
+            <td>{frappe.utils.escape_html(e.comments or "")}</td>
+        </tr>
+        """
+        for e in events
+    )
+    message = f"""
+    <p>The following timesheets for <strong>{employee}</strong> have been reviewed.</p>
+
+    <table class="table table-bordered">
+        <tr><th>Timesheet</th><th>Status</th><th>Approved/Rejected by</th><th>Date</th><th>Comments</th></tr>
+        {rows}
+    </table>
+    """
+
+    frappe.sendmail(
+        recipients=[recipient],
+        subject=subject,
+        message=message,
+        reference_doctype="Custom Timesheet",
+        reference_name=events[0].timesheet if len(events) == 1 else None,
+    )
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import frappe
+from frappe.utils import add_to_date, cint, flt, format_datetime, get_datetime, now
+
+from gnapi_customizations.customizations.form_bootstrap import clear_form_bootstrap
+from gnapi_customizations.customizations.pending_approvals import clear_pending_count
+
+DEFAULT_SLA_HOURS = 48
+DEFAULT_ESCALATION_BATCH_SIZE = 500
+# "<sla_due_at>|<name>" of the last approval examined, kept with frappe.db.set_global
+SLA_HIGH_WATER_MARK_KEY = "gnapi_sla_escalation_mark"
+_START_OF_TIME = "1900-01-01 00:00:00"
+
+def get_sla_hours() -> float:
+    return flt(frappe.conf.get("gnapi_approval_sla_hours") or DEFAULT_SLA_HOURS)
+
+def get_sla_due_at(start=None) -> str:
+    """When an approval created at `start` (default: now) becomes overdue"""
+    return str(add_to_date(get_datetime(start or now()), hours=get_sla_hours()))
+
+def escalate_overdue_approvals(batch_size: int | None = None) -> int:
+    """Scheduled: escalate Pending approvals whose SLA passed since the previous run.
+
+    Approvals are walked in (sla_due_at, name) order from the high-water mark up to now,
+    one indexed range per batch, so a run only reads approvals that became due since the
+    last one. Each overdue approval is handed to the approver's reports_to manager, or to
+    the site's fallback approver, as an extra Timesheet Approval; approvals of timesheets that
+    are no longer submitted and pending are passed over. Returns the number escalated.
+    """
+    batch_size = cint(
+        batch_size or frappe.conf.get("gnapi_sla_escalation_batch_size") or DEFAULT_ESCALATION_BATCH_SIZE
+    )
+    due_until = now()
+    mark_due, _sep, mark_name = (frappe.db.get_global(SLA_HIGH_WATER_MARK_KEY) or _START_OF_TIME).partition("|")
+
+    escalated = 0
+    while True:
+        # The timesheet is joined per row, so the batch window still walks the sla_due_at index;
+        # decided sheets come back with open = 0 and only move the mark past them
+        batch = frappe.db.sql(
+            """
+            SELECT a.name, a.timesheet, a.employee, a.project, a.approver, a.total_hours,
+                a.timesheet_date, a.sla_due_at,
+                (t.docstatus = 1 AND t.approval_status = 'Pending') AS open
+            FROM `tabTimesheet Approval` a
+            LEFT JOIN `tabCustom Timesheet` t ON t.name = a.timesheet
+            WHERE a.sla_due_at >= %(mark_due)s AND a.sla_due_at <= %(due_until)s
+                AND NOT (a.sla_due_at = %(mark_due)s AND a.name <= %(mark_name)s)
+                AND a.approval_status = 'Pending' AND a.escalated = 0
+            ORDER BY a.sla_due_at, a.name
+            LIMIT %(limit)s
+            """,
+            {"mark_due": mark_due, "mark_name": mark_name, "due_until": due_until, "limit": batch_size},
+            as_dict=True,
+        )
+        if not batch:
+            break
+
+        overdue = [row for row in batch if row.open]
+        if overdue:
+            escalated += _escalate(overdue)
+        last = batch[-1]
+        mark_due, mark_name = str(last.sla_due_at), last.name
+        frappe.db.set_global(SLA_HIGH_WATER_MARK_KEY, f"{mark_due}|{mark_name}")
+        frappe.db.commit()
+        if len(batch) < batch_size:
+            break
+    return escalated
+
+def _escalate(overdue: list[frappe._dict]) -> int:
+    targets = _get_escalation_targets({row.approver for row in overdue})
+    timesheets = list({row.timesheet for row in overdue})
+    existing = set(
+        frappe.get_all(
+            "Timesheet Approval",
+            filters={"timesheet": ("in", timesheets), "approver": ("in", list(set(targets.values())))},
+            fields=["timesheet", "approver"],
+            as_list=True,
+        )
+    ) if targets else set()
+
+    timestamp, user = now(), frappe.session.user
+    new_rows, handed_to = [], {}
+    for row in overdue:
+        target = targets.get(row.approver)
+        if not target:
+            continue
+        if (row.timesheet, target) not in existing:
+            existing.add((row.timesheet, target))
+            new_rows.append((
+                frappe.generate_hash(length=10), row.timesheet, row.employee, row.project, target, "Pending",
+                row.total_hours, row.timesheet_date, get_sla_due_at(timestamp), 0, row.approver,
+                0, timestamp, timestamp, user, user,
+            ))
+        handed_to.setdefault(target, []).append(row)
+
+    # Marked even without a target, so the next runs do not pick it up again
+    frappe.db.sql(
+        "UPDATE `tabTimesheet Approval` SET escalated = 1 WHERE name IN %(names)s",
+        {"names": tuple(row.name for row in overdue)},
+    )
+    if new_rows:
+        frappe.db.bulk_insert(
+            "Timesheet Approval",
+            fields=[
+                "name", "timesheet", "employee", "project", "approver", "approval_status",
+                "total_hours", "timesheet_date", "sla_due_at", "escalated", "escalated_from",
+                "docstatus", "creation", "modified", "owner", "modified_by",
+            ],
+            values=new_rows,
+        )
+        clear_pending_count(handed_to)
+        clear_form_bootstrap(timesheets)
+
+    for target, rows in handed_to.items():
+        _send_escalation_mail(target, rows)
+    return sum(len(rows) for rows in handed_to.values())
+
+def _get_escalation_targets(approvers: set[str]) -> dict[str, str]:
+    """approver -> user to escalate to: their reports_to manager, else the site's fallback approver"""
+    managers = dict(
+        frappe.db.sql(
+            """
+            SELECT e.user_id, m.user_id
+            FROM `tabEmployee` e
+            INNER JOIN `tabEmployee` m ON m.name = e.reports_to
+            WHERE e.user_id IN %(approvers)s AND IFNULL(m.user_id, '') != ''
+            """,
+            {"approvers": tuple(approvers)},
+        )
+    ) if approvers else {}
+    fallback = frappe.conf.get("gnapi_approval_fallback_approver")
+
+    targets = {}
+    for approver in approvers:
+        target = managers.get(approver) or fallback
+        if target and target != approver:
+            targets[approver] = target
+    return targets
+
+def _send_escalation_mail(recipient: str, rows: list[frappe._dict]) -> None:
+    items = "".join(
+        f"""
+        <tr>
+            <td><a href="/app/custom-timesheet/{row.timesheet}">{row.timesheet}</a></td>
+            <td>{row.employee or ""}</td>
+            <td>{row.project or ""}</td>
+            <td>{row.approver}</td>
+            <td>{format_datetime(row.sla_due_at)}</td>
+        </tr>
+        """
+        for row in rows
+    )
+    try:
+        frappe.sendmail(
+            recipients=[recipient],
+            subject=f"{len(rows)} overdue timesheet approval(s) escalated to you",
+            message=f"""
+            <p>These timesheets were not reviewed within {get_sla_hours():g} hours and now await your approval.</p>
+
+            <table class="table table-bordered">
+                <tr><th>Timesheet</th><th>Employee</th><th>Project</th><th>Approver</th><th>Due</th></tr>
+                {items}
+            </table>
+            """,
+        )
+    except Exception as e:
+        frappe.log_error(f"Error sending escalation mail to {recipient}: {str(e)}")
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import frappe
+
+APPROVAL_UPDATE_EVENT = "gnapi_approval_update"
+# Lists of either doctype only learn which timesheet changed, and re-fetch what they may read
+APPROVAL_CHANGE_EVENT = "gnapi_approval_change"
+APPROVAL_UPDATE_ROOMS = ("Custom Timesheet", "Timesheet Approval")
+
+def make_approval_update(
+    timesheet: str,
+    approval_status: str,
+    approved_by: str,
+    approval_date: str,
+    modified: str,
+    comments: str | None = None,
+    approvals: list[str] | None = None,
+    status: str | None = None,
+    superseded: list[str] | None = None,
+) -> dict:
+    """The fields an approve/reject changes, so clients can update in place instead of reloading"""
+    update = {
+        "timesheet": timesheet,
+        "status": status or approval_status,
+        "approval_status": approval_status,
+        "approved_by": approved_by,
+        "approval_date": str(approval_date),
+        "modified": str(modified),
+        "approvals": approvals or [],
+        "superseded": superseded or [],
+    }
+    if comments is not None:
+        update["approval_comments"] = comments
+    return update
+
+def publish_approval_updates(updates: list[dict]) -> None:
+    """Send the deltas once the transaction commits.
+
+    The full delta (comments, approver) goes only to the timesheet's document room and to
+    its employee and approvers; everyone else viewing either doctype gets just
+    {timesheet, modified} and re-fetches through the usual permission checks.
+    """
+    if not updates:
+        return
+
+    by_user = {}
+    recipients = _get_update_recipients([u["timesheet"] for u in updates])
+    for update in updates:
+        frappe.publish_realtime(
+            APPROVAL_UPDATE_EVENT,
+            {"updates": [update]},
+            doctype="Custom Timesheet",
+            docname=update["timesheet"],
+            after_commit=True,
+        )
+        for user in recipients.get(update["timesheet"], ()):
+            by_user.setdefault(user, []).append(update)
+
+    for user, user_updates in by_user.items():
+        frappe.publish_realtime(APPROVAL_UPDATE_EVENT, {"updates": user_updates}, user=user, after_commit=True)
+
+    changes = [{"timesheet": u["timesheet"], "modified": u["modified"]} for u in updates]
+    for doctype in APPROVAL_UPDATE_ROOMS:
+        frappe.publish_realtime(APPROVAL_CHANGE_EVENT, {"changes": changes}, doctype=doctype, after_commit=True)
+
+def _get_update_recipients(timesheets: list[str]) -> dict[str, set[str]]:
+    """timesheet -> users entitled to the full delta: its employee's user and its approvers"""
+    recipients = {}
+    for timesheet, user in frappe.db.sql(
+        """
+        SELECT t.name, e.user_id
+        FROM `tabCustom Timesheet` t
+        INNER JOIN `tabEmployee` e ON e.name = t.employee
+        WHERE t.name IN %(timesheets)s AND IFNULL(e.user_id, '') != ''
+        UNION
+        SELECT timesheet, approver FROM `tabTimesheet Approval` WHERE timesheet IN %(timesheets)s
+        """,
+        {"timesheets": tuple(set(timesheets))},
+    ):
+        recipients.setdefault(timesheet, set()).add(user)
+    return recipients
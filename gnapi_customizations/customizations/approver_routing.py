@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import frappe
+from frappe.model.document import Document
+
+from gnapi_customizations.customizations.permission_context import clear_all_permission_contexts, clear_permission_context
+from gnapi_customizations.customizations.project_approvers import (
+    APPROVER_ENTRY_DOCTYPE,
+    APPROVER_MAP_DOCTYPE,
+    get_entry_projects,
+    get_project_approvers,
+    insert_entries,
+    insert_routes,
+    parse_approver_list,
+    set_project_entries,
+    set_project_routes,
+)
+from gnapi_customizations.customizations.timesheet_visibility import (
+    rebuild_timesheet_visibility,
+    refresh_project_visibility,
+)
+from gnapi_customizations.instrumentation import instrument
+
+# Projects resolved per batch by a full rebuild
+REBUILD_BATCH_SIZE = 500
+
+# ---------------------------- resolver ----------------------------
+
+def resolve_approvers(project: str | None, customer: str | None = None) -> list[str]:
+    """Ordered approver users for a (project, customer) pair.
+
+    Projects are read from the precomputed routing table (which already includes the
+    approvers of the project's customer); a customer without a project is resolved directly.
+    """
+    if project:
+        approvers = resolve_project_approvers([project]).get(project, [])
+        if not customer or customer == frappe.db.get_value("Project", project, "customer", cache=True):
+            return approvers
+    else:
+        approvers = []
+
+    customer_value = frappe.db.get_value("Customer", customer, "timesheet_approver") if customer else None
+    for user, _source, _priority in _resolve_entries([(customer_value, "Customer")]):
+        if user not in approvers:
+            approvers.append(user)
+    return approvers
+
+def resolve_project_approvers(projects: list[str]) -> dict[str, list[str]]:
+    """Ordered approver users of each project, one read of the routing table"""
+    return get_project_approvers([p for p in projects if p])
+
+def compute_project_routes(projects: list[str]) -> dict[str, list[tuple[str, str, int]]]:
+    """(user, source, priority) routes of each project from all three sources.
+
+    Project.approver entries come first, in the order written, with Approver group names
+    expanded to their members' users in place; the project's Customer approvers follow.
+    A user listed more than once keeps their first position.
+    """
+    return _routes_from_entries(load_project_entries(projects))
+
+def load_project_entries(projects: list[str]) -> dict[str, list[tuple[str, str]]]:
+    """(entry, source) pairs of each project's own and Customer approver lists, as written"""
+    if not projects:
+        return {}
+
+    project_rows = frappe.get_all(
+        "Project", filters={"name": ("in", list(projects))}, fields=["name", "approver", "customer"]
+    )
+    customers = {row.customer for row in project_rows if row.customer}
+    customer_approvers = dict(
+        frappe.get_all(
+            "Customer", filters={"name": ("in", list(customers))}, fields=["name", "timesheet_approver"], as_list=True
+        )
+    ) if customers and frappe.db.has_column("Customer", "timesheet_approver") else {}
+
+    entries_by_project = {}
+    for row in project_rows:
+        entries = [(entry, "Project") for entry in parse_approver_list(row.get("approver"))]
+        entries += [(entry, "Customer") for entry in parse_approver_list(customer_approvers.get(row.customer))]
+        entries_by_project[row.name] = entries
+    return entries_by_project
+
+def _routes_from_entries(
+    entries_by_project: dict[str, list[tuple[str, str]]]
+) -> dict[str, list[tuple[str, str, int]]]:
+    groups, users = _load_entry_targets({entry for entries in entries_by_project.values() for entry, _s in entries})
+    return {
+        project: _expand_entries(entries, groups, users) for project, entries in entries_by_project.items()
+    }
+
+def _resolve_entries(entries: list[tuple[str, str]]) -> list[tuple[str, str, int]]:
+    # Customer approver lists use the same entry syntax as Project.approver
+    expanded = [(e, source) for value, source in entries for e in parse_approver_list(value)]
+    groups, users = _load_entry_targets({entry for entry, _source in expanded})
+    return _expand_entries(expanded, groups, users)
+
+def _load_entry_targets(entries: set[str]) -> tuple[dict[str, list[str]], set[str]]:
+    """Approver group members and plain users among the entries, one query each"""
+    if not entries:
+        return {}, set()
+
+    groups = {}
+    if frappe.db.table_exists("Approver"):
+        for group in frappe.get_all("Approver", filters={"name": ("in", list(entries))}, pluck="name"):
+            groups[group] = []
+        if groups:
+            for group, user in frappe.db.sql(
+                """
+                SELECT au.parent, e.user_id
+                FROM `tabApprover User` au
+                INNER JOIN `tabEmployee` e ON e.name = au.employee
+                WHERE au.parent IN %(groups)s AND au.parenttype = 'Approver' AND IFNULL(e.user_id, '') != ''
+                ORDER BY au.parent, au.idx
+                """,
+                {"groups": tuple(groups)},
+            ):
+                groups[group].append(user)
+
+    users = set(frappe.get_all("User", filters={"name": ("in", list(entries - set(groups)))}, pluck="name"))
+    return groups, users
+
+def _expand_entries(
+    entries: list[tuple[str, str]], groups: dict[str, list[str]], users: set[str]
+) -> list[tuple[str, str, int]]:
+    routes, seen = [], set()
+    for entry, source in entries:
+        if entry in groups:
+            candidates = [(user, "Approver Group") for user in groups[entry]]
+        elif entry in users:
+            candidates = [(entry, source)]
+        else:
+            continue
+        for user, route_source in candidates:
+            if user not in seen:
+                seen.add(user)
+                routes.append((user, route_source, len(routes)))
+    return routes
+
+# ---------------------------- maintenance ----------------------------
+
+def refresh_project_routes(projects: list[str] | set[str]) -> None:
+    """Recompute the entry and routing rows of the given projects and refresh what depends on
+    them: permission contexts of affected users and the visibility of the projects' timesheets"""
+    changed, changed_projects = set(), set()
+    projects = list({p for p in projects if p})
+    for start in range(0, len(projects), REBUILD_BATCH_SIZE):
+        batch = projects[start : start + REBUILD_BATCH_SIZE]
+        entries = load_project_entries(batch)
+        routes = _routes_from_entries(entries)
+        for project in batch:
+            set_project_entries(project, entries.get(project, []))
+            added, removed = set_project_routes(project, routes.get(project, []))
+            if added or removed:
+                changed |= added | removed
+                changed_projects.add(project)
+    clear_permission_context(changed)
+    refresh_project_visibility(changed_projects)
+
+def rebuild_approver_routes() -> int:
+    """Recompute the whole entry and routing tables; returns the number of routes"""
+    frappe.db.delete(APPROVER_MAP_DOCTYPE)
+    frappe.db.delete(APPROVER_ENTRY_DOCTYPE)
+    projects = frappe.get_all("Project", pluck="name", order_by="name")
+    for start in range(0, len(projects), REBUILD_BATCH_SIZE):
+        entries = load_project_entries(projects[start : start + REBUILD_BATCH_SIZE])
+        insert_entries(entries)
+        insert_routes(_routes_from_entries(entries))
+    clear_all_permission_contexts()
+    rebuild_timesheet_visibility()
+    return frappe.db.count(APPROVER_MAP_DOCTYPE)
+
+def _rename_in_list(doctype: str, name: str, fieldname: str, value: str | None, old: str, new: str) -> None:
+    entries = parse_approver_list(value)
+    if old not in entries:
+        return
+    renamed = list(dict.fromkeys(new if entry == old else entry for entry in entries))
+    frappe.db.set_value(doctype, name, fieldname, ", ".join(renamed), update_modified=False)
+
+# ---------------------------- doc events ----------------------------
+
+@instrument
+def on_project_update(doc: Document, method: str | None = None) -> None:
+    if doc.has_value_changed("approver") or doc.has_value_changed("customer"):
+        refresh_project_routes([doc.name])
+
+@instrument
+def on_project_trash(doc: Document, method: str | None = None) -> None:
+    users = frappe.get_all(APPROVER_MAP_DOCTYPE, filters={"project": doc.name}, pluck="user")
+    frappe.db.delete(APPROVER_MAP_DOCTYPE, {"project": doc.name})
+    frappe.db.delete(APPROVER_ENTRY_DOCTYPE, {"project": doc.name})
+    clear_permission_context(users)
+    refresh_project_visibility([doc.name])
+
+@instrument
+def on_customer_update(doc: Document, method: str | None = None) -> None:
+    if doc.has_value_changed("timesheet_approver"):
+        refresh_project_routes(frappe.get_all("Project", filters={"customer": doc.name}, pluck="name"))
+
+@instrument
+def on_approver_group_change(doc: Document, method: str | None = None) -> None:
+    # Membership changed or the group was removed; every list naming the group resolves differently
+    refresh_project_routes(get_entry_projects([doc.name]))
+
+@instrument
+def on_employee_update(doc: Document, method: str | None = None) -> None:
+    # Group members are routed through Employee.user_id
+    if not doc.has_value_changed("user_id"):
+        return
+    groups = frappe.get_all(
+        "Approver User", filters={"employee": doc.name, "parenttype": "Approver"}, pluck="parent", distinct=True
+    ) if frappe.db.table_exists("Approver User") else []
+    if groups:
+        refresh_project_routes(get_entry_projects(groups))
+
+@instrument
+def on_user_insert(doc: Document, method: str | None = None) -> None:
+    # Lists may name a user before the account exists; such entries resolve from now on
+    refresh_project_routes(get_entry_projects([doc.name]))
+
+@instrument
+def on_user_rename(
+    doc: Document, method: str | None = None, old: str | None = None, new: str | None = None, merge: bool = False
+) -> None:
+    # Approver lists name users as written, so point them at the new name and re-resolve
+    projects = get_entry_projects([old])
+    if not projects:
+        return
+    customers = set()
+    for row in frappe.get_all("Project", filters={"name": ("in", list(projects))}, fields=["name", "approver", "customer"]):
+        _rename_in_list("Project", row.name, "approver", row.approver, old, new)
+        if row.customer:
+            customers.add(row.customer)
+    if customers and frappe.db.has_column("Customer", "timesheet_approver"):
+        for row in frappe.get_all("Customer", filters={"name": ("in", list(customers))}, fields=["name", "timesheet_approver"]):
+            _rename_in_list("Customer", row.name, "timesheet_approver", row.timesheet_approver, old, new)
+    refresh_project_routes(projects)
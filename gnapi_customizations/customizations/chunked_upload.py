@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import frappe
+from frappe.utils import cint
+
+from gnapi_customizations.customizations.pending_approvals import make_cursor, parse_cursor
+from gnapi_customizations.instrumentation import instrument
+
+# Doctypes whose forms use the chunked uploader
+UPLOAD_DOCTYPES = ("Custom Timesheet",)
+DEFAULT_CHUNK_SIZE = 5 * 1024 * 1024
+MAX_CHUNK_SIZE = 20 * 1024 * 1024
+DEFAULT_MAX_UPLOAD_SIZE = 200 * 1024 * 1024
+# Unfinished uploads older than this are removed by the daily cleanup
+UPLOAD_TTL_SECONDS = 2 * 24 * 3600
+# Bytes copied per read when streaming chunks and hashing the assembled file
+COPY_BUFFER_SIZE = 1024 * 1024
+ATTACHMENT_PAGE_SIZE = 20
+MAX_ATTACHMENT_PAGE_SIZE = 200
+
+def get_upload_dir(upload_id: str | None = None) -> str:
+    path = frappe.get_site_path("private", "gnapi_uploads")
+    return os.path.join(path, upload_id) if upload_id else path
+
+@frappe.whitelist(methods=["POST"])
+@instrument
+def start_upload(
+    doctype: str,
+    docname: str,
+    file_name: str,
+    file_size: int,
+    chunk_size: int | None = None,
+    row: str | None = None,
+) -> dict:
+    """Reserve space for a file that will arrive in chunks; returns the upload id and chunk layout.
+
+    The file is assembled under the site's private folder and attached as a private
+    File when finish_upload is called; `row` names a time log whose attachments field
+    should point at it.
+    """
+    if doctype not in UPLOAD_DOCTYPES:
+        frappe.throw(f"Chunked uploads are not enabled for {doctype}")
+    frappe.has_permission(doctype, "write", doc=docname, throw=True)
+
+    file_size = cint(file_size)
+    max_size = cint(frappe.conf.get("gnapi_max_upload_size")) or DEFAULT_MAX_UPLOAD_SIZE
+    if file_size <= 0 or file_size > max_size:
+        frappe.throw(f"File size must be between 1 byte and {max_size // (1024 * 1024)} MB")
+    chunk_size = min(cint(chunk_size) or DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE)
+    if row and not frappe.db.exists("Custom Timesheet Detail", {"name": row, "parent": docname}):
+        frappe.throw(f"Row {row} is not part of {doctype} {docname}")
+
+    upload_id = frappe.generate_hash(length=20)
+    path = get_upload_dir(upload_id)
+    os.makedirs(path)
+    # Sparse file of the final size; chunks are written in place at their offsets
+    with open(os.path.join(path, "data"), "wb") as f:
+        f.truncate(file_size)
+
+    manifest = {
+        "user": frappe.session.user,
+        "doctype": doctype,
+        "docname": docname,
+        "row": row,
+        "file_name": os.path.basename(file_name) or "upload",
+        "file_size": file_size,
+        "chunk_size": chunk_size,
+        "total_chunks": -(-file_size // chunk_size),
+    }
+    _write_manifest(upload_id, manifest)
+    return {"upload_id": upload_id, **_status(upload_id, manifest)}
+
+@frappe.whitelist(methods=["POST"])
+@instrument
+def upload_chunk(upload_id: str, index: int) -> dict:
+    """Write one chunk (multipart field "chunk") at its offset; re-sending a chunk is harmless"""
+    manifest = _load_manifest(upload_id)
+    index = cint(index)
+    if index < 0 or index >= manifest["total_chunks"]:
+        frappe.throw(f"Chunk {index} is out of range")
+
+    chunk = frappe.request.files.get("chunk")
+    if not chunk:
+        frappe.throw("No chunk in the request")
+
+    offset = index * manifest["chunk_size"]
+    expected = min(manifest["chunk_size"], manifest["file_size"] - offset)
+    # Werkzeug spools large parts to a temporary file, so the chunk is streamed, never read whole
+    with open(os.path.join(get_upload_dir(upload_id), "data"), "r+b") as f:
+        f.seek(offset)
+        written = _copy(chunk.stream, f, expected)
+    if written != expected or chunk.stream.read(1):
+        frappe.throw(f"Chunk {index} does not have the expected {expected} bytes")
+
+    # One marker file per chunk, so chunks sent in parallel never overwrite each other's bookkeeping
+    open(os.path.join(get_upload_dir(upload_id), f"chunk-{index}"), "w").close()
+    return _status(upload_id, manifest)
+
+@frappe.whitelist()
+@instrument
+def get_upload_status(upload_id: str) -> dict:
+    """Chunks still missing, so an interrupted upload can continue where it stopped"""
+    return _status(upload_id, _load_manifest(upload_id))
+
+@frappe.whitelist(methods=["POST"])
+@instrument
+def finish_upload(upload_id: str) -> dict:
+    """Move the assembled file into private files and attach it"""
+    manifest = _load_manifest(upload_id)
+    status = _status(upload_id, manifest)
+    if status["missing"]:
+        frappe.throw(f"{len(status['missing'])} chunk(s) have not been uploaded yet")
+
+    source = os.path.join(get_upload_dir(upload_id), "data")
+    content_hash = _file_md5(source)
+    file_name = _unique_file_name(manifest["file_name"])
+    target = frappe.get_site_path("private", "files", file_name)
+    # Same filesystem, so this is a rename; the content is never loaded into memory
+    os.replace(source, target)
+
+    file_doc = frappe.get_doc({
+        "doctype": "File",
+        "file_name": file_name,
+        "file_url": f"/private/files/{file_name}",
+        "is_private": 1,
+        "file_size": manifest["file_size"],
+        # Set up front so File does not read the whole file to hash it
+        "content_hash": content_hash,
+        "attached_to_doctype": manifest["doctype"],
+        "attached_to_name": manifest["docname"],
+    })
+    file_doc.insert()
+
+    if manifest["row"]:
+        frappe.db.set_value("Custom Timesheet Detail", manifest["row"], "attachments", file_doc.file_url)
+    shutil.rmtree(get_upload_dir(upload_id), ignore_errors=True)
+    return {"name": file_doc.name, "file_name": file_doc.file_name, "file_url": file_doc.file_url}
+
+@frappe.whitelist()
+@instrument
+def get_timesheet_attachments(timesheet: str, after: str | None = None, limit: int = ATTACHMENT_PAGE_SIZE) -> dict:
+    """One page of a timesheet's attachments, oldest first, addressed by the previous page's next_cursor"""
+    frappe.has_permission("Custom Timesheet", "read", doc=timesheet, throw=True)
+    return get_attachment_page("Custom Timesheet", timesheet, after, limit)
+
+def get_attachment_page(doctype: str, name: str, after: str | None = None, limit: int = ATTACHMENT_PAGE_SIZE) -> dict:
+    limit = min(cint(limit) or ATTACHMENT_PAGE_SIZE, MAX_ATTACHMENT_PAGE_SIZE)
+    conditions = ["attached_to_doctype = %(doctype)s", "attached_to_name = %(name)s"]
+    values = {"doctype": doctype, "name": name, "limit": limit + 1}
+    if after:
+        creation, file_name = parse_cursor(after)
+        conditions.append("(creation > %(after_creation)s OR (creation = %(after_creation)s AND name > %(after_name)s))")
+        values.update({"after_creation": creation, "after_name": file_name})
+
+    items = frappe.db.sql(
+        f"""
+        SELECT name, file_name, file_url, file_size, creation
+        FROM `tabFile`
+        WHERE {" AND ".join(conditions)}
+        ORDER BY creation, name
+        LIMIT %(limit)s
+        """,
+        values,
+        as_dict=True,
+    )
+    has_more = len(items) > limit
+    items = items[:limit]
+    return {
+        "items": items,
+        "has_more": has_more,
+        "next_cursor": make_cursor(items[-1]) if has_more else None,
+    }
+
+def remove_stale_uploads() -> None:
+    """Scheduled: drop chunked uploads that were never finished"""
+    root = get_upload_dir()
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - UPLOAD_TTL_SECONDS
+    for upload_id in os.listdir(root):
+        path = os.path.join(root, upload_id)
+        if os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+
+def _status(upload_id: str, manifest: dict) -> dict:
+    received = {
+        cint(entry[len("chunk-"):]) for entry in os.listdir(get_upload_dir(upload_id)) if entry.startswith("chunk-")
+    }
+    return {
+        "chunk_size": manifest["chunk_size"],
+        "total_chunks": manifest["total_chunks"],
+        "received": len(received),
+        "missing": [i for i in range(manifest["total_chunks"]) if i not in received],
+    }
+
+def _load_manifest(upload_id: str) -> dict:
+    # Upload ids are generated hashes; anything else must not reach the filesystem
+    if not upload_id or not upload_id.isalnum():
+        frappe.throw(f"Upload {upload_id} not found or expired", frappe.DoesNotExistError)
+    path = os.path.join(get_upload_dir(upload_id), "manifest.json")
+    if not os.path.exists(path):
+        frappe.throw(f"Upload {upload_id} not found or expired", frappe.DoesNotExistError)
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest["user"] != frappe.session.user:
+        frappe.throw("This upload was started by another user", frappe.PermissionError)
+    return manifest
+
+def _write_manifest(upload_id: str, manifest: dict) -> None:
+    with open(os.path.join(get_upload_dir(upload_id), "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+def _copy(source, target, limit: int) -> int:
+    written = 0
+    while written < limit:
+        data = source.read(min(COPY_BUFFER_SIZE, limit - written))
+        if not data:
+            break
+        target.write(data)
+        written += len(data)
+    return written
+
+def _file_md5(path: str) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _unique_file_name(file_name: str) -> str:
+    if not os.path.exists(frappe.get_site_path("private", "files", file_name)):
+        return file_name
+    base, ext = os.path.splitext(file_name)
+    return f"{base}-{frappe.generate_hash(length=6)}{ext}"
@@ -2,14 +2,28 @@ from __future__ import annotations
 
 import frappe
 from frappe.model.document import Document
-from frappe.utils import get_datetime, time_diff_in_seconds
+from frappe.utils import get_datetime, now, time_diff_in_seconds
+
+from gnapi_customizations.customizations.approval_notifications import queue_approval_notifications
+from gnapi_customizations.customizations.approval_updates import make_approval_update, publish_approval_updates
+from gnapi_customizations.customizations.hours_rollup import RollupTracker
+from gnapi_customizations.customizations.pending_approvals import close_decided_approvals
+from gnapi_customizations.customizations.permission_context import get_permission_context
+from gnapi_customizations.customizations.project_approvers import is_project_approver
+from gnapi_customizations.customizations.projections import clear_projections
+from gnapi_customizations.customizations.timesheet_validation import validate_time_logs
+from gnapi_customizations.customizations.timesheet_visibility import visibility_condition
+from gnapi_customizations.instrumentation import instrument
 
 def _get_employee_for_user(user: str) -> str | None:
-    return frappe.db.get_value("Employee", {"user_id": user}, "name")
+    return get_permission_context(user).employee
 
+@instrument
 def on_custom_timesheet_validate(doc: Document, method: str | None = None) -> None:
+    roles = get_permission_context().roles
+    
     # Auto-assign employee for non-Administrator employees
-    if frappe.session.user != "Administrator" and "Employee" in frappe.get_roles():
+    if frappe.session.user != "Administrator" and "Employee" in roles:
         employee = _get_employee_for_user(frappe.session.user)
         if employee:
             doc.employee = employee
@@ -21,7 +35,7 @@ def on_custom_timesheet_validate(doc: Document, method: str | None = None) -> No
         doc.status = "Draft"
     
     # Set approval status based on user role
-    if "Employee" in frappe.get_roles() and "System Manager" not in frappe.get_roles():
+    if "Employee" in roles and "System Manager" not in roles:
         # Employees can only set status to Draft or Submitted
         allowed_statuses = ["Draft", "Submitted"]
         if doc.status and doc.status not in allowed_statuses:
@@ -35,14 +49,13 @@ def on_custom_timesheet_validate(doc: Document, method: str | None = None) -> No
     # Calculate total hours from start/end times
     if hasattr(doc, 'start_date') and hasattr(doc, 'start_time') and hasattr(doc, 'end_date') and hasattr(doc, 'end_time'):
         if doc.start_date and doc.start_time and doc.end_date and doc.end_time:
-            from frappe.utils import get_datetime, time_diff_in_seconds
-            
             start_datetime = get_datetime(f"{doc.start_date} {doc.start_time}")
             end_datetime = get_datetime(f"{doc.end_date} {doc.end_time}")
             
             if end_datetime > start_datetime:
                 total_seconds = time_diff_in_seconds(end_datetime, start_datetime)
                 doc.total_hours = round(total_seconds / 3600, 2)  # Convert seconds to hours
+                doc.flags.total_hours_from_header = True
             else:
                 frappe.throw("End date/time must be after start date/time")
     
@@ -61,40 +74,16 @@ def on_custom_timesheet_validate(doc: Document, method: str | None = None) -> No
         if not getattr(doc, "end_date", None) or not getattr(doc, "end_time", None):
             frappe.throw("End Date and End Time are required")
     
-    # Validate Custom Timesheet Detail child table (Time Logs)
-    # First check if at least one row exists
-    if not hasattr(doc, 'time_logs') or not doc.time_logs or len(doc.time_logs) == 0:
-        frappe.throw("At least one row is required in Custom Timesheet Details table")
-    
-    # Validate each row in the time_logs table
-    for i, row in enumerate(doc.time_logs, 1):
-        # Check if any required field is missing
-        missing_fields = []
-        
-        # Debug: Log the row data to see what's actually there
-        frappe.logger().info(f"Row {i} data: {dict(row)}")
-        
-        # Check for empty, None, or whitespace-only values
-        if not row.get('project') or not str(row.get('project', '')).strip():
-            missing_fields.append("Project")
-        if not row.get('task') or not str(row.get('task', '')).strip():
-            missing_fields.append("Task")
-        if not row.get('start_date_time'):
-            missing_fields.append("Start Date and Time")
-        if not row.get('end_date_time'):
-            missing_fields.append("End Date and Time")
-        
-        if missing_fields:
-            frappe.throw(f"Mandatory fields required in Custom Timesheet Details, Row {i}: {', '.join(missing_fields)}")
-        
-        # Validate that end time is after start time
-        if row.get('start_date_time') and row.get('end_date_time'):
-            start_dt = get_datetime(row.start_date_time)
-            end_dt = get_datetime(row.end_date_time)
-            if end_dt <= start_dt:
-                frappe.throw(f"End Date and Time must be after Start Date and Time in Custom Timesheet Details row {i}")
+    # Validate Custom Timesheet Detail child table (Time Logs) in a single pass:
+    # mandatory fields, end after start, taken_hours, total hours and overlapping rows
+    validate_time_logs(doc)
 
+@instrument
 def on_custom_timesheet_before_save(doc: Document, method: str | None = None) -> None:
+    # taken_hours was already computed by the validation pipeline during this save
+    if doc.flags.time_logs_validated:
+        return
+    
     # Recalculate taken_hours for each time log row if both datetimes exist
     for row in (doc.time_logs or []):
         if getattr(row, "start_date_time", None) and getattr(row, "end_date_time", None):
@@ -113,6 +102,7 @@ def on_custom_timesheet_before_save(doc: Document, method: str | None = None) ->
                 frappe.log_error(f"Error recalculating time log: {e}", "Custom Timesheet")
                 row.taken_hours = 0
 
+@instrument
 def on_custom_timesheet_detail_before_save(doc: Document, method: str | None = None) -> None:
     # Calculate taken_hours for a single detail row
     if getattr(doc, "start_date_time", None) and getattr(doc, "end_date_time", None):
@@ -135,250 +125,188 @@ def on_custom_timesheet_detail_before_save(doc: Document, method: str | None = N
     else:
         doc.taken_hours = 0
 
+@instrument
 def custom_timesheet_permission_query(user: str) -> str:
     # Admins see all
     if user == "Administrator":
         return ""
     
-    roles = frappe.get_roles(user)
-    employee = _get_employee_for_user(user)
+    context = get_permission_context(user)
+    roles, employee = context.roles, context.employee
     
     # System Managers see all
     if "System Manager" in roles:
         return ""
     
-    # Build permission conditions
-    conditions = []
-    
-    # Employees can see their own timesheets (all statuses)
-    if "Employee" in roles and employee:
-        conditions.append(f"`tabCustom Timesheet`.`employee` = {frappe.db.escape(employee)}")
-    
-    # Users who are approvers for projects can see timesheets for those projects (Submitted/Approved/Rejected only)
-    # Get all projects where this user is an approver (using new direct user-based approver field)
-    projects_where_approver = frappe.db.sql("""
-        SELECT DISTINCT name 
-        FROM `tabProject` 
-        WHERE approver IS NOT NULL 
-        AND (approver LIKE %s OR approver LIKE %s OR approver LIKE %s OR approver = %s)
-    """, (f"%{user},%", f"%,{user}%", f"%,{user},%", user), as_dict=False)
-    
-    if projects_where_approver:
-        project_list = "','".join([frappe.db.escape(p[0]) for p in projects_where_approver])
-        conditions.append(
-            f"(EXISTS (SELECT 1 FROM `tabCustom Timesheet Detail` "
-            f"WHERE `tabCustom Timesheet Detail`.`parent` = `tabCustom Timesheet`.`name` "
-            f"AND `tabCustom Timesheet Detail`.`project` IN ('{project_list}')) "
-            f"AND `tabCustom Timesheet`.`status` IN ('Submitted', 'Approved', 'Rejected'))"
-        )
-    
-    # Combine conditions with OR
-    if conditions:
-        return f"({' OR '.join(conditions)})"
+    # Employees can see their own timesheets (all statuses); approvers see the
+    # Submitted/Approved/Rejected timesheets of their projects. Both are materialized
+    # per user in Timesheet Visibility, so this is one indexed semi-join on the user.
+    include_employee = bool("Employee" in roles and employee)
+    if include_employee or context.approver_projects:
+        return visibility_condition(user, include_employee=include_employee)
     
     # No access if no conditions match
     return "`tabCustom Timesheet`.`name` = '_NO_ACCESS_'"
 
-def custom_timesheet_has_permission(doc: Document, user: str) -> bool:
+@instrument
+def custom_timesheet_has_permission(doc: Document, user: str | None = None) -> bool:
     # Row-level check: employees can access their own timesheets or timesheets they approve
+    user = user or frappe.session.user
     if user == "Administrator":
         return True
     
-    roles = frappe.get_roles(user)
+    context = get_permission_context(user)
     
     # System Managers have full access
-    if "System Manager" in roles:
+    if "System Manager" in context.roles:
         return True
     
-    employee = _get_employee_for_user(user)
-    if not employee:
-        return False
-    
     # Employee can access their own timesheets (all statuses)
-    if getattr(doc, "employee", None) == employee:
+    if context.employee and getattr(doc, "employee", None) == context.employee:
         return True
     
     # Check if user is an approver for any project in this timesheet
-    status = getattr(doc, "status", None)
-    if status in ["Submitted", "Approved", "Rejected"]:
-        for time_log in (doc.time_logs or []):
-            project = getattr(time_log, "project", None)
-            if project:
-                # Check if user is an approver for this project
-                is_approver = frappe.db.sql("""
-                    SELECT 1 FROM `tabProject` p
-                    INNER JOIN `tabApprover` a ON p.approver = a.name
-                    INNER JOIN `tabApprover User` au ON a.name = au.parent
-                    WHERE p.name = %s AND au.employee = %s
-                    LIMIT 1
-                """, (project, employee))
-                if is_approver:
-                    return True
-    
-    return False
+    approver_projects = set(context.approver_projects)
+    return any(getattr(row, "project", None) in approver_projects for row in (doc.time_logs or []))
 
 # ==================== APPROVAL WORKFLOW METHODS ====================
 
 @frappe.whitelist()
+@instrument
 def approve_timesheet(timesheet_name: str, comments: str = "") -> dict:
     """Approve a timesheet"""
-    try:
-        doc = frappe.get_doc("Custom Timesheet", timesheet_name)
-        
-        # Check if user is authorized to approve this timesheet
-        if not _can_user_approve_timesheet(doc, frappe.session.user):
-            frappe.throw("You are not authorized to approve this timesheet")
-        
-        # Update approval fields
-        doc.approval_status = "Approved"
-        doc.approved_by = frappe.session.user
-        doc.approval_date = frappe.utils.now()
-        doc.approval_comments = comments
-        
-        doc.save(ignore_permissions=True)
-        
-        # Send notification to employee
-        _send_approval_notification(doc, "approved", comments)
-        
-        return {"success": True, "message": "Timesheet approved successfully"}
-        
-    except Exception as e:
-        frappe.log_error(f"Error approving timesheet {timesheet_name}: {str(e)}")
-        frappe.throw(f"Error approving timesheet: {str(e)}")
+    result = transition_timesheet(timesheet_name, "Approved", comments)
+    result["message"] = (
+        "Timesheet approved successfully" if result["won"] else "Timesheet was already approved by you"
+    )
+    return result
 
 @frappe.whitelist()
+@instrument
 def reject_timesheet(timesheet_name: str, comments: str) -> dict:
     """Reject a timesheet"""
-    try:
-        doc = frappe.get_doc("Custom Timesheet", timesheet_name)
-        
-        # Check if user is authorized to reject this timesheet
-        if not _can_user_approve_timesheet(doc, frappe.session.user):
-            frappe.throw("You are not authorized to reject this timesheet")
-        
-        # Update approval fields
-        doc.approval_status = "Rejected"
-        doc.approved_by = frappe.session.user
-        doc.approval_date = frappe.utils.now()
-        doc.approval_comments = comments
-        
-        doc.save(ignore_permissions=True)
-        
-        # Send notification to employee
-        _send_approval_notification(doc, "rejected", comments)
-        
-        return {"success": True, "message": "Timesheet rejected"}
-        
-    except Exception as e:
-        frappe.log_error(f"Error rejecting timesheet {timesheet_name}: {str(e)}")
-        frappe.throw(f"Error rejecting timesheet: {str(e)}")
+    result = transition_timesheet(timesheet_name, "Rejected", comments)
+    result["message"] = "Timesheet rejected" if result["won"] else "Timesheet was already rejected by you"
+    return result
 
-def _can_user_approve_timesheet(timesheet_doc: Document, user: str) -> bool:
-    """Check if user can approve the given timesheet"""
-    
-    # System Manager can approve any timesheet
-    if "System Manager" in frappe.get_roles(user):
-        return True
-    
-    # Get projects from timesheet time logs
-    project_names = []
-    for row in (timesheet_doc.time_logs or []):
-        if getattr(row, "project", None):
-            project_names.append(row.project)
-    
-    if not project_names:
-        return False
-    
-    # Check if user is an approver for any of these projects
-    projects = frappe.get_all("Project", 
-        filters={"name": ["in", project_names]}, 
-        fields=["name", "approver"])
-    
-    for project in projects:
-        if project.approver:
-            approvers = [a.strip() for a in project.approver.split(",")]
-            if user in approvers:
-                return True
-    
-    return False
+def transition_timesheet(timesheet_name: str, approval_status: str, comments: str | None = None) -> dict:
+    """Move a Pending timesheet to Approved/Rejected with one conditional UPDATE.
 
-def _send_approval_notification(timesheet_doc: Document, action: str, comments: str):
-    """Send notification to employee about timesheet approval/rejection"""
-    try:
-        # Get employee's user ID
-        employee_user = frappe.db.get_value("Employee", timesheet_doc.employee, "user_id")
-        if not employee_user:
-            return
-        
-        subject = f"Timesheet {action.title()}: {timesheet_doc.name}"
-        
-        message = f"""
-        <p>Your timesheet <strong>{timesheet_doc.name}</strong> has been <strong>{action}</strong>.</p>
-        
-        <p><strong>Details:</strong></p>
-        <ul>
-            <li>Employee: {timesheet_doc.employee}</li>
-            <li>Status: {action.title()}</li>
-            <li>Approved/Rejected by: {frappe.session.user}</li>
-            <li>Date: {frappe.utils.format_datetime(frappe.utils.now())}</li>
-        </ul>
-        
-        {f"<p><strong>Comments:</strong><br>{comments}</p>" if comments else ""}
-        
-        <p>You can view your timesheet <a href="/app/custom-timesheet/{timesheet_doc.name}">here</a>.</p>
-        """
-        
-        frappe.sendmail(
-            recipients=[employee_user],
-            subject=subject,
-            message=message,
-            reference_doctype="Custom Timesheet",
-            reference_name=timesheet_doc.name
+    Concurrent approvers race on `approval_status = 'Pending'`; exactly one UPDATE matches
+    and that caller wins, as its affected-row count shows. The winner closes every Pending
+    approval row of the timesheet in the same transaction: its own take the decision, the
+    other approvers' are Superseded. Repeating a call that already won returns success
+    without writing again; losing to someone else raises with who decided and when.
+    """
+    user = frappe.session.user
+    if not _can_user_approve_timesheet(timesheet_name, user):
+        frappe.throw(f"You are not authorized to {'approve' if approval_status == 'Approved' else 'reject'} this timesheet")
+
+    timestamp = now()
+    rollup = RollupTracker([timesheet_name])
+    won = decide_timesheet(timesheet_name, approval_status, user, timestamp, comments)
+    clear_projections("Custom Timesheet", timesheet_name)
+    current = frappe.db.get_value(
+        "Custom Timesheet",
+        timesheet_name,
+        ["name", "employee", "status", "approval_status", "approved_by", "approval_date", "approval_comments", "modified"],
+        as_dict=True,
+    )
+    if not current:
+        frappe.throw(f"Custom Timesheet {timesheet_name} not found", frappe.DoesNotExistError)
+
+    if not won:
+        if current.approval_status == approval_status and current.approved_by == user:
+            # A retry of a call that already won
+            return {"success": True, "won": False, "already_applied": True, "update": _approval_update(current)}
+        frappe.throw(
+            f"Timesheet {timesheet_name} is already {current.approval_status}"
+            + (f" by {current.approved_by} at {current.approval_date}" if current.approved_by else ""),
+            title="Approval Conflict",
         )
-        
-    except Exception as e:
-        frappe.log_error(f"Error sending approval notification: {str(e)}")
 
-# Removed duplicate function - using the one above
+    rollup.apply()
+    own = frappe.get_all(
+        "Timesheet Approval",
+        filters={"timesheet": timesheet_name, "approver": user, "approval_status": "Pending"},
+        pluck="name",
+    )
+    superseded = close_decided_approvals({timesheet_name: own}, approval_status, user, timestamp, comments)
+
+    # Send notification to employee
+    _send_approval_notification(current, approval_status.lower(), comments)
+
+    update = _approval_update(current, approvals=own, superseded=superseded.get(timesheet_name))
+    publish_approval_updates([update])
+    return {"success": True, "won": True, "update": update}
+
+def decide_timesheet(
+    timesheet_name: str, approval_status: str, user: str, timestamp: str, comments: str | None = None
+) -> bool:
+    """Compare-and-set a Pending timesheet to the decision; True if this call changed it.
+
+    Single and bulk transitions both go through here so they write the same fields.
+    Comments are only written when given.
+    """
+    comment_sql = ", approval_comments = %(comments)s" if comments is not None else ""
+    frappe.db.sql(
+        f"""
+        UPDATE `tabCustom Timesheet`
+        SET status = %(status)s, approval_status = %(status)s, approved_by = %(user)s,
+            approval_date = %(timestamp)s, modified = %(timestamp)s, modified_by = %(user)s{comment_sql}
+        WHERE name = %(name)s AND approval_status = 'Pending'
+        """,
+        {"status": approval_status, "user": user, "timestamp": timestamp, "comments": comments, "name": timesheet_name},
+    )
+    return frappe.db.sql("SELECT ROW_COUNT()")[0][0] == 1
 
-def custom_timesheet_has_permission(doc, user):
-    """Custom has_permission for Custom Timesheet"""
+def _approval_update(
+    timesheet: frappe._dict, approvals: list[str] | None = None, superseded: list[str] | None = None
+) -> dict:
+    return make_approval_update(
+        timesheet.name, timesheet.approval_status, timesheet.approved_by, timesheet.approval_date,
+        timesheet.modified, timesheet.approval_comments, approvals, status=timesheet.status, superseded=superseded,
+    )
+
+def _can_user_approve_timesheet(timesheet_name: str, user: str) -> bool:
+    """Check if user can approve the given timesheet"""
     
-    if not user:
-        user = frappe.session.user
+    context = get_permission_context(user)
     
-    # System Manager has full access
-    if "System Manager" in frappe.get_roles(user):
+    # System Manager can approve any timesheet
+    if "System Manager" in context.roles:
         return True
     
-    # Employee can access their own timesheets
-    employee = frappe.db.get_value("Employee", {"user_id": user}, "name")
-    if employee and doc.employee == employee:
+    # Approvals escalated to a manager or fallback approver name them directly
+    if frappe.db.exists("Timesheet Approval", {"timesheet": timesheet_name, "approver": user}):
         return True
     
-    # Check if user is an approver for any project in this timesheet
-    if hasattr(doc, 'time_logs') and doc.time_logs:
-        project_names = []
-        for row in doc.time_logs:
-            if getattr(row, "project", None):
-                project_names.append(row.project)
-        
-        if project_names:
-            # Check if user is an approver for any of these projects using new structure
-            projects = frappe.get_all("Project", 
-                filters={"name": ["in", project_names]}, 
-                fields=["name", "approver"])
-            
-            for project in projects:
-                if project.approver:
-                    # Check if user is in the comma-separated list of approvers
-                    approvers = [a.strip() for a in project.approver.split(",")]
-                    if user in approvers:
-                        return True
+    if not context.approver_projects:
+        return False
     
-    return False
+    # Approver if the routing table sends any of the time logs' projects to the user
+    projects = frappe.get_all(
+        "Custom Timesheet Detail",
+        filters={"parent": timesheet_name, "parenttype": "Custom Timesheet", "project": ("is", "set")},
+        pluck="project",
+        distinct=True,
+    )
+    return is_project_approver(user, projects)
+
+def _send_approval_notification(timesheet_doc: Document | frappe._dict, action: str, comments: str):
+    """Queue a notification to the employee; the digest job renders and sends it"""
+    try:
+        queue_approval_notifications([{
+            "timesheet": timesheet_doc.name,
+            "employee": timesheet_doc.employee,
+            "action": action,
+            "comments": comments,
+        }])
+    except Exception as e:
+        frappe.log_error(f"Error queueing approval notification: {str(e)}")
 
 @frappe.whitelist()
+@instrument
 def debug_approver_access(user_email=None):
     """Debug function to check approver access for a specific user"""
     if not user_email:
@@ -392,14 +320,15 @@ def debug_approver_access(user_email=None):
     }
     
     # Get projects where user is approver
-    projects = frappe.db.sql("""
-        SELECT name, approver 
-        FROM `tabProject` 
-        WHERE approver IS NOT NULL 
-        AND (approver LIKE %s OR approver LIKE %s OR approver LIKE %s OR approver = %s)
-    """, (f"%{user_email},%", f"%,{user_email}%", f"%,{user_email},%", user_email), as_dict=True)
-    
-    result["projects_as_approver"] = projects
+    project_names = get_permission_context(user_email).approver_projects
+    if project_names:
+        # Where each route comes from: Project.approver, an Approver group or the Customer
+        result["projects_as_approver"] = frappe.get_all(
+            "Project Approver Map",
+            filters={"user": user_email},
+            fields=["project", "source", "priority"],
+            order_by="project asc",
+        )
     
     # Get permission query result
     permission_query = custom_timesheet_permission_query(user_email)
@@ -417,10 +346,15 @@ def debug_approver_access(user_email=None):
     
     return result
 
+@instrument
 def on_custom_timesheet_after_submit(doc: Document, method: str | None = None) -> None:
-    """Create approval records when timesheet is submitted"""
+    """Create approval records in the background once the submit is committed"""
     try:
-        from gnapi_customizations.customizations.timesheet_approval_events import create_approval_for_timesheet
-        create_approval_for_timesheet(doc.name)
+        frappe.enqueue(
+            "gnapi_customizations.customizations.timesheet_approval_events.create_approval_for_timesheet",
+            queue="short",
+            enqueue_after_commit=True,
+            timesheet_name=doc.name,
+        )
     except Exception as e:
         frappe.log_error(f"Error creating approval for timesheet {doc.name}: {str(e)}")
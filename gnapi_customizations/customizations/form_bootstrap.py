@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import frappe
+from frappe.model.document import Document
+
+from gnapi_customizations.customizations.chunked_upload import get_attachment_page
+from gnapi_customizations.customizations.custom_timesheet_events import _can_user_approve_timesheet
+from gnapi_customizations.instrumentation import instrument
+
+FORM_BOOTSTRAP_CACHE_KEY = "gnapi_timesheet_form"
+ONLOAD_KEY = "gnapi_form"
+# Route and role changes do not touch the timesheet's `modified`, so a hash only lives this long
+FORM_BOOTSTRAP_TTL = 600
+
+def get_form_bootstrap(doc: Document, user: str | None = None) -> dict:
+    """Approver flag, allowed approval actions and attachments of a timesheet, for its form.
+
+    Cached in one Redis hash per timesheet, keyed by user and only valid for the doc's
+    current `modified`; File changes and approval fan-out drop the hash, and it expires
+    after FORM_BOOTSTRAP_TTL seconds.
+    """
+    user = user or frappe.session.user
+    key = f"{FORM_BOOTSTRAP_CACHE_KEY}|{doc.name}"
+    modified = str(doc.modified)
+
+    cached = frappe.cache().hget(key, user)
+    if cached and cached.get("modified") == modified:
+        return cached["payload"]
+
+    payload = _build_form_bootstrap(doc, user)
+    cache = frappe.cache()
+    cache.hset(key, user, {"modified": modified, "payload": payload})
+    cache.expire(cache.make_key(key), FORM_BOOTSTRAP_TTL)
+    return payload
+
+def _build_form_bootstrap(doc: Document, user: str) -> dict:
+    # Same rule approve/reject enforce, so the buttons never offer an action the server refuses
+    is_approver = _can_user_approve_timesheet(doc.name, user)
+    can_act = is_approver and doc.docstatus == 1 and doc.approval_status == "Pending"
+    # First page only; the form pages through the rest with get_timesheet_attachments
+    attachments = get_attachment_page(doc.doctype, doc.name)
+    return {
+        "is_approver": is_approver,
+        "allowed_actions": ["Approve", "Reject"] if can_act else [],
+        "attachments": attachments["items"],
+        "attachments_next_cursor": attachments["next_cursor"],
+    }
+
+def clear_form_bootstrap(timesheets: list[str] | set[str] | str | None) -> None:
+    if isinstance(timesheets, str):
+        timesheets = [timesheets]
+    for timesheet in {t for t in timesheets or [] if t}:
+        frappe.cache().delete_value(f"{FORM_BOOTSTRAP_CACHE_KEY}|{timesheet}")
+
+@instrument
+def on_custom_timesheet_onload(doc: Document, method: str | None = None) -> None:
+    if not doc.is_new():
+        doc.set_onload(ONLOAD_KEY, get_form_bootstrap(doc))
+
+@instrument
+def on_file_change(doc: Document, method: str | None = None) -> None:
+    if doc.attached_to_doctype == "Custom Timesheet":
+        clear_form_bootstrap(doc.attached_to_name)
+
+@frappe.whitelist()
+@instrument
+def get_timesheet_form_bootstrap(timesheet: str) -> dict:
+    """Fresh bootstrap payload, for the form to re-render after an upload or delete"""
+    doc = frappe.get_doc("Custom Timesheet", timesheet)
+    doc.check_permission("read")
+    return get_form_bootstrap(doc)
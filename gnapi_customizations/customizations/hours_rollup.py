@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cstr, now
+
+from gnapi_customizations.customizations.permission_context import get_permission_context
+from gnapi_customizations.instrumentation import instrument
+
+ROLLUP_DOCTYPE = "Timesheet Hours Rollup"
+ROLLUP_KEY_FIELDS = ("employee", "project", "task", "log_date", "approval_state")
+ROLLUP_VALUE_FIELDS = ("hours", "billable_hours", "entries")
+ROLLUP_GROUP_FIELDS = ROLLUP_KEY_FIELDS
+# Rows written per INSERT ... ON DUPLICATE KEY UPDATE statement
+ROLLUP_WRITE_BATCH = 500
+
+# Draft sheets are tracked separately so dashboards can show submitted hours only
+_STATE_SQL = (
+    "CASE WHEN t.docstatus = 0 THEN 'Draft' "
+    "ELSE COALESCE(NULLIF(t.approval_status, ''), 'Pending') END"
+)
+
+_CONTRIBUTION_SQL = f"""
+    SELECT IFNULL(t.employee, '') AS employee, IFNULL(d.project, '') AS project,
+        IFNULL(d.task, '') AS task, DATE(d.start_date_time) AS log_date,
+        {_STATE_SQL} AS approval_state,
+        SUM(IFNULL(d.taken_hours, 0)) AS hours,
+        SUM(IF(IFNULL(d.is_billable, 0), IFNULL(d.taken_hours, 0), 0)) AS billable_hours,
+        COUNT(*) AS entries
+    FROM `tabCustom Timesheet Detail` d
+    INNER JOIN `tabCustom Timesheet` t ON t.name = d.parent
+    WHERE d.parenttype = 'Custom Timesheet' AND d.start_date_time IS NOT NULL AND t.docstatus < 2
+        {{conditions}}
+    GROUP BY 1, 2, 3, 4, 5
+"""
+
+def rollup_name(key: tuple) -> str:
+    # Deterministic name so the primary key doubles as the unique rollup key
+    return hashlib.md5("|".join(cstr(v) for v in key).encode()).hexdigest()
+
+def get_timesheet_contributions(timesheet_names: list[str]) -> dict[tuple, list[float]]:
+    """Current rollup contribution of the given timesheets as stored in the database"""
+    if not timesheet_names:
+        return {}
+
+    rows = frappe.db.sql(
+        _CONTRIBUTION_SQL.format(conditions="AND t.name IN %(names)s"),
+        {"names": tuple(timesheet_names)},
+        as_dict=True,
+    )
+    return {
+        tuple(cstr(row[f]) for f in ROLLUP_KEY_FIELDS): [row[f] or 0 for f in ROLLUP_VALUE_FIELDS]
+        for row in rows
+    }
+
+def apply_contribution_delta(before: dict[tuple, list[float]], after: dict[tuple, list[float]]) -> None:
+    """Add (after - before) to the rollup"""
+    delta = {}
+    for key in set(before) | set(after):
+        old, new = before.get(key, [0, 0, 0]), after.get(key, [0, 0, 0])
+        change = [n - o for n, o in zip(new, old)]
+        if any(change):
+            delta[key] = change
+
+    if not delta:
+        return
+
+    timestamp, user = now(), frappe.session.user
+    items = list(delta.items())
+    for start in range(0, len(items), ROLLUP_WRITE_BATCH):
+        batch = items[start : start + ROLLUP_WRITE_BATCH]
+        values = []
+        for key, change in batch:
+            values.append((rollup_name(key), *(v or None for v in key), *change, timestamp, timestamp, user, user))
+
+        placeholders = ", ".join(["(" + ", ".join(["%s"] * 13) + ")"] * len(values))
+        frappe.db.sql(
+            f"""
+            INSERT INTO `tab{ROLLUP_DOCTYPE}`
+                (name, employee, project, task, log_date, approval_state,
+                hours, billable_hours, entries, creation, modified, owner, modified_by)
+            VALUES {placeholders}
+            ON DUPLICATE KEY UPDATE
+                hours = hours + VALUES(hours),
+                billable_hours = billable_hours + VALUES(billable_hours),
+                entries = entries + VALUES(entries),
+                modified = VALUES(modified)
+            """,
+            [v for row in values for v in row],
+        )
+        frappe.db.sql(
+            f"DELETE FROM `tab{ROLLUP_DOCTYPE}` WHERE name IN %(names)s AND entries <= 0",
+            {"names": tuple(row[0] for row in values)},
+        )
+
+class RollupTracker:
+    """Snapshot timesheet contributions before a change and apply the difference after it"""
+
+    def __init__(self, timesheet_names: list[str], snapshot: bool = True):
+        self.timesheet_names = list(timesheet_names)
+        self.before = get_timesheet_contributions(self.timesheet_names) if snapshot else {}
+
+    def apply(self) -> None:
+        apply_contribution_delta(self.before, get_timesheet_contributions(self.timesheet_names))
+
+# ---------------------------- doc events ----------------------------
+
+@instrument
+def capture_rollup_baseline(doc: Document, method: str | None = None) -> None:
+    # Runs in the before_* events while the database still has the old rows
+    doc.flags.hours_rollup = RollupTracker([doc.name], snapshot=not doc.is_new())
+
+@instrument
+def apply_rollup_change(doc: Document, method: str | None = None) -> None:
+    # Runs in the matching on_* events once the new rows are written
+    tracker = doc.flags.pop("hours_rollup", None)
+    if tracker:
+        tracker.apply()
+
+@instrument
+def remove_from_rollup(doc: Document, method: str | None = None) -> None:
+    apply_contribution_delta(get_timesheet_contributions([doc.name]), {})
+
+# ---------------------------- rebuild & query ----------------------------
+
+def rebuild_hours_rollup() -> int:
+    """Recompute the whole rollup from Custom Timesheet Detail; returns the number of rollup rows"""
+    from gnapi_customizations.customizations.timesheet_archive import archive_exists, archive_table
+
+    sources = [_CONTRIBUTION_SQL.format(conditions="")]
+    # Archived timesheets keep counting towards historical hours
+    if archive_exists():
+        sources.append(
+            sources[0]
+            .replace("`tabCustom Timesheet Detail`", archive_table("Custom Timesheet Detail"))
+            .replace("`tabCustom Timesheet`", archive_table("Custom Timesheet"))
+        )
+
+    frappe.db.sql(f"DELETE FROM `tab{ROLLUP_DOCTYPE}`")
+    timestamp, user = now(), frappe.session.user
+    for source in sources:
+        frappe.db.sql(
+            f"""
+            INSERT INTO `tab{ROLLUP_DOCTYPE}`
+                (name, employee, project, task, log_date, approval_state,
+                hours, billable_hours, entries, creation, modified, owner, modified_by)
+            SELECT MD5(CONCAT_WS('|', c.employee, c.project, c.task, c.log_date, c.approval_state)),
+                NULLIF(c.employee, ''), NULLIF(c.project, ''), NULLIF(c.task, ''), c.log_date, c.approval_state,
+                c.hours, c.billable_hours, c.entries, %(timestamp)s, %(timestamp)s, %(user)s, %(user)s
+            FROM ({source}) c
+            ON DUPLICATE KEY UPDATE
+                hours = hours + VALUES(hours),
+                billable_hours = billable_hours + VALUES(billable_hours),
+                entries = entries + VALUES(entries)
+            """,
+            {"timestamp": timestamp, "user": user},
+        )
+    return frappe.db.count(ROLLUP_DOCTYPE)
+
+@frappe.whitelist()
+@instrument
+def get_hours_summary(
+    from_date: str | None = None,
+    to_date: str | None = None,
+    group_by: str | list | None = None,
+    employee: str | None = None,
+    project: str | None = None,
+    approval_state: str | None = None,
+) -> list[dict]:
+    """Aggregated hours read only from the rollup table"""
+    group_fields = group_by or ["employee", "project"]
+    if isinstance(group_fields, str):
+        group_fields = (
+            frappe.parse_json(group_fields)
+            if group_fields.startswith("[")
+            else [f.strip() for f in group_fields.split(",") if f.strip()]
+        )
+    invalid = [f for f in group_fields if f not in ROLLUP_GROUP_FIELDS]
+    if invalid or not group_fields:
+        frappe.throw(f"Cannot group hours by: {', '.join(invalid) or 'nothing'}")
+
+    conditions, values = [], {}
+    for fieldname, value in (
+        ("employee", employee),
+        ("project", project),
+        ("approval_state", approval_state),
+    ):
+        if value:
+            conditions.append(f"`{fieldname}` = %({fieldname})s")
+            values[fieldname] = value
+    if from_date:
+        conditions.append("log_date >= %(from_date)s")
+        values["from_date"] = from_date
+    if to_date:
+        conditions.append("log_date <= %(to_date)s")
+        values["to_date"] = to_date
+
+    # Non-managers only see their own hours and hours on projects they approve
+    context = get_permission_context()
+    if frappe.session.user != "Administrator" and "System Manager" not in context.roles:
+        scope = []
+        if context.employee:
+            scope.append("employee = %(own_employee)s")
+            values["own_employee"] = context.employee
+        if context.approver_projects:
+            scope.append("project IN %(approver_projects)s")
+            values["approver_projects"] = tuple(context.approver_projects)
+        conditions.append(f"({' OR '.join(scope)})" if scope else "1 = 0")
+
+    columns = ", ".join(f"`{f}`" for f in group_fields)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return frappe.db.sql(
+        f"""
+        SELECT {columns}, SUM(hours) AS hours, SUM(billable_hours) AS billable_hours, SUM(entries) AS entries
+        FROM `tab{ROLLUP_DOCTYPE}`
+        {where}
+        GROUP BY {columns}
+        ORDER BY {columns}
+        """,
+        values,
+        as_dict=True,
+    )
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import frappe
+from frappe.utils import cint, get_datetime
+
+from gnapi_customizations.instrumentation import instrument
+
+PENDING_COUNT_CACHE_KEY = "gnapi_pending_approval_count"
+# Status of the other approvers' rows once someone decided their timesheet
+SUPERSEDED_STATUS = "Superseded"
+# Safety net for changes that bypass clear_pending_count
+PENDING_COUNT_TTL = 300
+MAX_PAGE_LENGTH = 500
+
+def make_cursor(row: dict) -> str:
+    """Keyset cursor of the last row of a page, ordered by (creation, name)"""
+    return f"{row['creation']}|{row['name']}"
+
+def parse_cursor(after: str) -> tuple:
+    """(creation, name) of a make_cursor value; refuses anything else instead of paging from ''"""
+    creation, sep, name = (after or "").partition("|")
+    try:
+        creation = get_datetime(creation) if creation and sep and name else None
+    except Exception:
+        creation = None
+    if not creation:
+        frappe.throw(f"Invalid page cursor: {after}")
+    return creation, name
+
+@frappe.whitelist()
+@instrument
+def get_pending_approvals(
+    limit: int = 50,
+    after: str | None = None,
+    project: str | None = None,
+    timesheet: str | None = None,
+    with_counts: int = 1,
+) -> dict:
+    """Timesheet approvals waiting on the current user, newest first.
+
+    Pages are addressed by the `next_cursor` of the previous page (keyset pagination on
+    approver, approval_status, creation, name), so every page is a bounded index range scan.
+    """
+    user = frappe.session.user
+    limit = min(cint(limit) or 50, MAX_PAGE_LENGTH)
+
+    conditions = ["approver = %(user)s", "approval_status = 'Pending'"]
+    values = {"user": user, "limit": limit + 1}
+    if project:
+        conditions.append("project = %(project)s")
+        values["project"] = project
+    if timesheet:
+        conditions.append("timesheet = %(timesheet)s")
+        values["timesheet"] = timesheet
+    if after:
+        creation, name = parse_cursor(after)
+        conditions.append("(creation < %(after_creation)s OR (creation = %(after_creation)s AND name < %(after_name)s))")
+        values.update({"after_creation": creation, "after_name": name})
+
+    items = frappe.db.sql(
+        f"""
+        SELECT name, timesheet, employee, project, total_hours, timesheet_date, creation
+        FROM `tabTimesheet Approval`
+        WHERE {" AND ".join(conditions)}
+        ORDER BY creation DESC, name DESC
+        LIMIT %(limit)s
+        """,
+        values,
+        as_dict=True,
+    )
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    response = {
+        "items": items,
+        "has_more": has_more,
+        "next_cursor": make_cursor(items[-1]) if has_more else None,
+    }
+
+    if cint(with_counts):
+        response.update(_get_counts(user))
+    return response
+
+def _get_counts(user: str) -> dict:
+    by_project = frappe.db.sql(
+        """
+        SELECT project, COUNT(*) AS count
+        FROM `tabTimesheet Approval`
+        WHERE approver = %s AND approval_status = 'Pending'
+        GROUP BY project
+        """,
+        user,
+        as_dict=True,
+    )
+    by_status = frappe.db.sql(
+        """
+        SELECT approval_status, COUNT(*) AS count
+        FROM `tabTimesheet Approval`
+        WHERE approver = %s
+        GROUP BY approval_status
+        """,
+        user,
+        as_dict=True,
+    )
+    return {
+        "counts_by_project": {row.project: row.count for row in by_project},
+        "counts_by_status": {row.approval_status: row.count for row in by_status},
+    }
+
+@frappe.whitelist()
+@instrument
+def get_pending_count() -> int:
+    """Cached number of pending approvals for the current user, for badges"""
+    key = f"{PENDING_COUNT_CACHE_KEY}|{frappe.session.user}"
+    count = frappe.cache().get_value(key)
+    if count is None:
+        count = frappe.db.count(
+            "Timesheet Approval", {"approver": frappe.session.user, "approval_status": "Pending"}
+        )
+        frappe.cache().set_value(key, count, expires_in_sec=PENDING_COUNT_TTL)
+    return count
+
+def clear_pending_count(users: list[str] | set[str]) -> None:
+    for user in {u for u in users if u}:
+        frappe.cache().delete_value(f"{PENDING_COUNT_CACHE_KEY}|{user}")
+
+def close_decided_approvals(
+    decisions: dict[str, list[str]],
+    approval_status: str,
+    user: str,
+    timestamp: str,
+    comments: str | None = None,
+) -> dict[str, list[str]]:
+    """Close every Pending approval of timesheets the caller just decided, in the caller's transaction.
+
+    `decisions` maps each decided timesheet to the approval rows that carried the decision;
+    those take `approval_status`, every other Pending row of the timesheet is Superseded so it
+    leaves the other approvers' lists, counts and SLA escalation. Returns timesheet -> superseded rows.
+    """
+    if not decisions:
+        return {}
+
+    pending = frappe.db.sql(
+        """
+        SELECT name, timesheet, approver FROM `tabTimesheet Approval`
+        WHERE timesheet IN %(timesheets)s AND approval_status = 'Pending'
+        ORDER BY name
+        FOR UPDATE
+        """,
+        {"timesheets": tuple(decisions)},
+        as_dict=True,
+    )
+    deciding = {name for names in decisions.values() for name in names}
+    decided = tuple(row.name for row in pending if row.name in deciding)
+    superseded = [row for row in pending if row.name not in deciding]
+
+    values = {"timestamp": timestamp, "user": user, "comments": comments}
+    if decided:
+        comment_sql = ", approval_comments = %(comments)s" if comments is not None else ""
+        frappe.db.sql(
+            f"""
+            UPDATE `tabTimesheet Approval`
+            SET approval_status = %(status)s, approval_date = %(timestamp)s,
+                modified = %(timestamp)s, modified_by = %(user)s{comment_sql}
+            WHERE name IN %(names)s
+            """,
+            dict(values, status=approval_status, names=decided),
+        )
+    if superseded:
+        # modified_by marks who decided the timesheet
+        frappe.db.sql(
+            """
+            UPDATE `tabTimesheet Approval`
+            SET approval_status = %(status)s, approval_date = %(timestamp)s,
+                modified = %(timestamp)s, modified_by = %(user)s
+            WHERE name IN %(names)s
+            """,
+            dict(values, status=SUPERSEDED_STATUS, names=tuple(row.name for row in superseded)),
+        )
+    clear_pending_count({row.approver for row in pending})
+
+    by_timesheet = {}
+    for row in superseded:
+        by_timesheet.setdefault(row.timesheet, []).append(row.name)
+    return by_timesheet
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import frappe
+from frappe.model.document import Document
+
+from gnapi_customizations.customizations.project_approvers import get_approver_projects
+from gnapi_customizations.instrumentation import instrument
+
+PERMISSION_CONTEXT_CACHE_KEY = "gnapi_permission_context"
+
+def get_permission_context(user: str | None = None) -> frappe._dict:
+    """Roles, linked employee and approvable projects of a user.
+
+    Looked up once per request (frappe.local) and once per change (Redis site cache).
+    """
+    user = user or frappe.session.user
+    local_contexts = _get_local_contexts()
+    if user in local_contexts:
+        return local_contexts[user]
+
+    context = frappe.cache().hget(PERMISSION_CONTEXT_CACHE_KEY, user)
+    if context is None:
+        context = _build_permission_context(user)
+        frappe.cache().hset(PERMISSION_CONTEXT_CACHE_KEY, user, context)
+
+    context = frappe._dict(context)
+    local_contexts[user] = context
+    return context
+
+def _build_permission_context(user: str) -> dict:
+    return {
+        "user": user,
+        "roles": frappe.get_roles(user),
+        "employee": frappe.db.get_value("Employee", {"user_id": user}, "name"),
+        "approver_projects": get_approver_projects(user),
+    }
+
+def _get_local_contexts() -> dict:
+    if not hasattr(frappe.local, "gnapi_permission_contexts"):
+        frappe.local.gnapi_permission_contexts = {}
+    return frappe.local.gnapi_permission_contexts
+
+def clear_permission_context(users: list[str] | set[str] | str | None) -> None:
+    """Drop cached contexts for the given users"""
+    if isinstance(users, str):
+        users = [users]
+    users = [u for u in (users or []) if u]
+    if not users:
+        return
+
+    local_contexts = _get_local_contexts()
+    for user in users:
+        frappe.cache().hdel(PERMISSION_CONTEXT_CACHE_KEY, user)
+        local_contexts.pop(user, None)
+
+def clear_all_permission_contexts() -> None:
+    # Registered as a clear_cache hook so `bench clear-cache` resets every context
+    frappe.cache().delete_value(PERMISSION_CONTEXT_CACHE_KEY)
+    _get_local_contexts().clear()
+
+@instrument
+def on_employee_update(doc: Document, method: str | None = None) -> None:
+    # Relinking an Employee changes the employee of both the old and the new user
+    if not doc.has_value_changed("user_id"):
+        return
+    previous = doc.get_doc_before_save()
+    clear_permission_context([doc.user_id, previous.user_id if previous else None])
+
+@instrument
+def on_employee_trash(doc: Document, method: str | None = None) -> None:
+    clear_permission_context(doc.user_id)
+
+@instrument
+def on_user_update(doc: Document, method: str | None = None) -> None:
+    # Roles are a child table of User, so any save may have changed them
+    clear_permission_context(doc.name)
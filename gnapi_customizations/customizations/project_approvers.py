@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import frappe
+
+APPROVER_MAP_DOCTYPE = "Project Approver Map"
+# Unexpanded (project, entry, source) rows behind the routes
+APPROVER_ENTRY_DOCTYPE = "Project Approver Entry"
+
+def parse_approver_list(value: str | None) -> list[str]:
+    """Split a comma-separated approver field into unique user ids, keeping order"""
+    approvers = []
+    for part in (value or "").split(","):
+        user = part.strip()
+        if user and user not in approvers:
+            approvers.append(user)
+    return approvers
+
+def set_project_routes(project: str, routes: list[tuple[str, str, int]]) -> tuple[set[str], set[str]]:
+    """Bring the routing rows of a project in line with the given (user, source, priority) routes.
+
+    Returns the (added, removed) user sets so callers can react to the change.
+    """
+    current = {
+        row.user: row
+        for row in frappe.get_all(
+            APPROVER_MAP_DOCTYPE, filters={"project": project}, fields=["name", "user", "source", "priority"]
+        )
+    }
+    wanted = {user: (source, priority) for user, source, priority in routes}
+    added, removed = set(wanted) - set(current), set(current) - set(wanted)
+
+    if removed:
+        frappe.db.delete(APPROVER_MAP_DOCTYPE, {"project": project, "user": ("in", list(removed))})
+
+    for user in set(wanted) & set(current):
+        row = current[user]
+        if (row.source, row.priority) != wanted[user]:
+            frappe.db.set_value(
+                APPROVER_MAP_DOCTYPE, row.name, {"source": wanted[user][0], "priority": wanted[user][1]}
+            )
+
+    if added:
+        insert_routes({project: [route for route in routes if route[0] in added]})
+
+    return added, removed
+
+def set_project_approvers(project: str, approvers: list[str]) -> tuple[set[str], set[str]]:
+    """Route a project to the given users directly, in order"""
+    return set_project_routes(project, [(user, "Project", i) for i, user in enumerate(approvers)])
+
+def insert_routes(routes_by_project: dict[str, list[tuple[str, str, int]]]) -> None:
+    now = frappe.utils.now()
+    owner = frappe.session.user
+    values = [
+        (frappe.generate_hash(length=10), project, user, source, priority, now, now, owner, owner)
+        for project, routes in routes_by_project.items()
+        for user, source, priority in routes
+    ]
+    if values:
+        frappe.db.bulk_insert(
+            APPROVER_MAP_DOCTYPE,
+            fields=["name", "project", "user", "source", "priority", "creation", "modified", "owner", "modified_by"],
+            values=values,
+        )
+
+def set_project_entries(project: str, entries: list[tuple[str, str]]) -> None:
+    """Replace the (entry, source) rows of a project; lists are short, so delete and insert"""
+    frappe.db.delete(APPROVER_ENTRY_DOCTYPE, {"project": project})
+    insert_entries({project: entries})
+
+def insert_entries(entries_by_project: dict[str, list[tuple[str, str]]]) -> None:
+    now = frappe.utils.now()
+    owner = frappe.session.user
+    values = [
+        (frappe.generate_hash(length=10), project, entry, source, now, now, owner, owner)
+        for project, entries in entries_by_project.items()
+        for entry, source in dict.fromkeys(entries)
+    ]
+    if values:
+        frappe.db.bulk_insert(
+            APPROVER_ENTRY_DOCTYPE,
+            fields=["name", "project", "entry", "source", "creation", "modified", "owner", "modified_by"],
+            values=values,
+        )
+
+def get_entry_projects(entries: list[str] | set[str]) -> set[str]:
+    """Projects whose own or customer approver list names any of the entries (indexed on entry)"""
+    entries = [e for e in entries if e]
+    if not entries:
+        return set()
+    return set(
+        frappe.get_all(APPROVER_ENTRY_DOCTYPE, filters={"entry": ("in", entries)}, pluck="project", distinct=True)
+    )
+
+def get_approver_projects(user: str) -> list[str]:
+    """Projects the user is listed as an approver for"""
+    return frappe.get_all(
+        APPROVER_MAP_DOCTYPE, filters={"user": user}, pluck="project", distinct=True, order_by="project"
+    )
+
+def get_project_approvers(projects: list[str]) -> dict[str, list[str]]:
+    """Ordered approver users for each of the given projects"""
+    if not projects:
+        return {}
+
+    approvers = {}
+    for row in frappe.get_all(
+        APPROVER_MAP_DOCTYPE,
+        filters={"project": ("in", list(set(projects)))},
+        fields=["project", "user"],
+        order_by="priority asc, creation asc",
+    ):
+        approvers.setdefault(row.project, []).append(row.user)
+    return approvers
+
+def is_project_approver(user: str, projects: list[str]) -> bool:
+    """True if the user approves at least one of the given projects"""
+    projects = [p for p in projects if p]
+    if not projects:
+        return False
+    return bool(frappe.db.exists(APPROVER_MAP_DOCTYPE, {"user": user, "project": ("in", projects)}))
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import frappe
+
+def load_projection(
+    doctype: str,
+    name: str,
+    fields: list[str],
+    child: tuple[str, list[str], dict] | None = None,
+) -> frappe._dict | None:
+    """Only the named fields of a document, plus at most its first matching child row.
+
+    `child` is (child doctype, child fields, filters); the first row by idx that matches
+    the filters is returned under the "child" key (None if there is none). Results are
+    cached for the rest of the request, so hooks running in the same request share one read.
+    Returns None if the document does not exist.
+    """
+    if not name:
+        return None
+
+    key = (doctype, name, tuple(fields), frappe.as_json(child) if child else None)
+    cache = _get_local_projections()
+    if key in cache:
+        return cache[key]
+
+    projection = frappe.db.get_value(doctype, name, list(fields), as_dict=True)
+    if projection is not None and child:
+        child_doctype, child_fields, filters = child
+        rows = frappe.get_all(
+            child_doctype,
+            filters={"parent": name, "parenttype": doctype, **(filters or {})},
+            fields=list(child_fields),
+            order_by="idx asc",
+            limit=1,
+        )
+        projection.child = rows[0] if rows else None
+
+    cache[key] = projection
+    return projection
+
+def clear_projections(doctype: str, names: list[str] | set[str] | tuple | str) -> None:
+    """Drop cached projections of documents changed in this request"""
+    if isinstance(names, str):
+        names = [names]
+    names = set(names)
+    cache = _get_local_projections()
+    for key in [k for k in cache if k[0] == doctype and k[1] in names]:
+        del cache[key]
+
+def _get_local_projections() -> dict:
+    if not hasattr(frappe.local, "gnapi_projections"):
+        frappe.local.gnapi_projections = {}
+    return frappe.local.gnapi_projections
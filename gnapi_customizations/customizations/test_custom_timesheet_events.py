@@ -0,0 +1,115 @@
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from gnapi_customizations.benchmarks.synthetic_data import BENCH_PREFIX, clear_benchmark_data, seed_benchmark_data
+from gnapi_customizations.customizations.custom_timesheet_events import transition_timesheet
+from gnapi_customizations.customizations.pending_approvals import SUPERSEDED_STATUS
+from gnapi_customizations.customizations.timesheet_approval_events import _write_transitions
+
+class TestApprovalTransitions(FrappeTestCase):
+    """Compare-and-set transitions on a seeded Pending timesheet with two or more approvers.
+
+    The seed is committed (the seeder commits per batch); every test rolls its own writes back.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed_benchmark_data(scale=0.002, seed=3, approver_pool=5, time_logs=480)
+        cls.timesheet = frappe.db.sql(
+            """
+            SELECT a.timesheet FROM `tabTimesheet Approval` a
+            INNER JOIN `tabCustom Timesheet` t ON t.name = a.timesheet
+            WHERE t.name LIKE %s AND t.docstatus = 1 AND t.approval_status = 'Pending'
+            GROUP BY a.timesheet
+            HAVING COUNT(DISTINCT a.approver) >= 2
+            ORDER BY a.timesheet
+            LIMIT 1
+            """,
+            f"{BENCH_PREFIX}%",
+            pluck=True,
+        )[0]
+        approvals = frappe.get_all(
+            "Timesheet Approval", filters={"timesheet": cls.timesheet}, fields=["name", "approver"], order_by="name"
+        )
+        cls.approvals = {}
+        for approval in approvals:
+            cls.approvals.setdefault(approval.approver, []).append(approval.name)
+        cls.first, cls.second = sorted(cls.approvals)[:2]
+
+    @classmethod
+    def tearDownClass(cls):
+        frappe.set_user("Administrator")
+        clear_benchmark_data()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.addCleanup(frappe.set_user, "Administrator")
+        self.addCleanup(frappe.db.rollback)
+
+    def stored(self) -> frappe._dict:
+        return frappe.db.get_value(
+            "Custom Timesheet", self.timesheet, ["status", "approval_status", "approved_by"], as_dict=True
+        )
+
+    def approval_statuses(self) -> dict[str, str]:
+        return dict(
+            frappe.get_all(
+                "Timesheet Approval", filters={"timesheet": self.timesheet}, fields=["name", "approval_status"], as_list=True
+            )
+        )
+
+    def test_first_decision_wins_and_closes_every_pending_row(self):
+        frappe.set_user(self.first)
+        result = transition_timesheet(self.timesheet, "Approved")
+
+        self.assertTrue(result["won"])
+        self.assertEqual(self.stored(), {"status": "Approved", "approval_status": "Approved", "approved_by": self.first})
+        statuses = self.approval_statuses()
+        for approver, names in self.approvals.items():
+            expected = "Approved" if approver == self.first else SUPERSEDED_STATUS
+            self.assertEqual({statuses[name] for name in names}, {expected})
+        self.assertEqual(set(result["update"]["superseded"]), {
+            name for approver, names in self.approvals.items() if approver != self.first for name in names
+        })
+
+    def test_later_decision_conflicts_and_changes_nothing(self):
+        frappe.set_user(self.first)
+        transition_timesheet(self.timesheet, "Approved")
+
+        frappe.set_user(self.second)
+        with self.assertRaises(frappe.ValidationError):
+            transition_timesheet(self.timesheet, "Rejected")
+        self.assertEqual(self.stored().approved_by, self.first)
+        self.assertEqual({self.approval_statuses()[name] for name in self.approvals[self.second]}, {SUPERSEDED_STATUS})
+
+    def test_retry_by_the_winner_is_already_applied(self):
+        frappe.set_user(self.first)
+        transition_timesheet(self.timesheet, "Rejected", "Wrong project")
+        result = transition_timesheet(self.timesheet, "Rejected", "Wrong project")
+        self.assertFalse(result["won"])
+        self.assertTrue(result["already_applied"])
+
+    def test_non_approver_is_refused(self):
+        frappe.set_user(f"{BENCH_PREFIX}employee-0@example.com")
+        with self.assertRaises(frappe.ValidationError):
+            transition_timesheet(self.timesheet, "Approved")
+        self.assertEqual(self.stored().approval_status, "Pending")
+
+    def test_bulk_writes_the_same_fields_as_a_single_transition(self):
+        approvals = [frappe._dict(name=name, timesheet=self.timesheet) for name in self.approvals[self.first]]
+        results = _write_transitions(approvals, "Approved", None, self.first)
+
+        self.assertEqual({r["status"] for r in results.values()}, {"updated"})
+        self.assertEqual(self.stored(), {"status": "Approved", "approval_status": "Approved", "approved_by": self.first})
+        self.assertNotIn("Pending", self.approval_statuses().values())
+
+    def test_bulk_reports_a_conflict_for_a_decided_timesheet(self):
+        frappe.set_user(self.first)
+        transition_timesheet(self.timesheet, "Approved")
+
+        approvals = [frappe._dict(name=name, timesheet=self.timesheet) for name in self.approvals[self.second]]
+        results = _write_transitions(approvals, "Rejected", "Too late", self.second)
+        self.assertEqual({r["status"] for r in results.values()}, {"conflict"})
+        self.assertEqual(self.stored().approved_by, self.first)
+        self.assertEqual({self.approval_statuses()[name] for name in self.approvals[self.second]}, {SUPERSEDED_STATUS})
@@ -0,0 +1,31 @@
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from gnapi_customizations.customizations.hours_rollup import ROLLUP_DOCTYPE, apply_contribution_delta, rollup_name
+
+KEY = ("_Test Rollup Employee", "_Test Rollup Project", "_Test Rollup Task", "2024-01-01", "Pending")
+OTHER_KEY = KEY[:4] + ("Approved",)
+
+class TestContributionDelta(FrappeTestCase):
+    def setUp(self):
+        self.addCleanup(frappe.db.rollback)
+
+    def stored(self, key: tuple) -> list | None:
+        row = frappe.db.get_value(ROLLUP_DOCTYPE, rollup_name(key), ["hours", "billable_hours", "entries"])
+        return [float(v) for v in row] if row else None
+
+    def test_only_the_difference_is_applied(self):
+        apply_contribution_delta({}, {KEY: [3, 1, 2]})
+        apply_contribution_delta({KEY: [3, 1, 2]}, {KEY: [4, 1, 3]})
+        self.assertEqual(self.stored(KEY), [4, 1, 3])
+
+    def test_state_change_moves_hours_between_rows(self):
+        apply_contribution_delta({}, {KEY: [3, 1, 2]})
+        apply_contribution_delta({KEY: [3, 1, 2]}, {OTHER_KEY: [3, 1, 2]})
+        # A row whose entries drop to zero is removed rather than left at zero
+        self.assertIsNone(self.stored(KEY))
+        self.assertEqual(self.stored(OTHER_KEY), [3, 1, 2])
+
+    def test_unchanged_contributions_write_nothing(self):
+        apply_contribution_delta({KEY: [3, 1, 2]}, {KEY: [3, 1, 2]})
+        self.assertIsNone(self.stored(KEY))
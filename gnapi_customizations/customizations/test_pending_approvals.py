@@ -0,0 +1,19 @@
+from datetime import datetime
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from gnapi_customizations.customizations.pending_approvals import make_cursor, parse_cursor
+
+class TestPageCursor(FrappeTestCase):
+    def test_round_trip(self):
+        row = frappe._dict(creation=datetime(2024, 3, 1, 9, 30, 15, 250000), name="abc|def")
+        creation, name = parse_cursor(make_cursor(row))
+        self.assertEqual(creation, row.creation)
+        # Only the first separator splits, names may contain it
+        self.assertEqual(name, "abc|def")
+
+    def test_rejects_malformed_cursors(self):
+        for cursor in ("", "2024-03-01 09:30:15", "2024-03-01 09:30:15|", "|name", "yesterday|name"):
+            with self.subTest(cursor=cursor), self.assertRaises(frappe.ValidationError):
+                parse_cursor(cursor)
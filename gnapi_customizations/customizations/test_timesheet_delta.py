@@ -0,0 +1,31 @@
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from gnapi_customizations.customizations.timesheet_delta import _contributions
+
+def log(project: str, task: str, start: str, hours: float, billable: int = 0) -> frappe._dict:
+    return frappe._dict(project=project, task=task, start_date_time=start, taken_hours=hours, is_billable=billable)
+
+class TestContributions(FrappeTestCase):
+    def test_rows_are_summed_per_employee_project_task_and_day(self):
+        header = frappe._dict(employee="EMP-1")
+        contributions = _contributions(header, [
+            log("P1", "T1", "2024-01-01 08:00:00", 1.5, billable=1),
+            log("P1", "T1", "2024-01-01 13:00:00", 2),
+            log("P1", "T1", "2024-01-02 08:00:00", 1),
+            log("P2", "T2", "2024-01-01 10:00:00", 0.5, billable=1),
+        ])
+        self.assertEqual(contributions, {
+            ("EMP-1", "P1", "T1", "2024-01-01", "Draft"): [3.5, 1.5, 2],
+            ("EMP-1", "P1", "T1", "2024-01-02", "Draft"): [1, 0, 1],
+            ("EMP-1", "P2", "T2", "2024-01-01", "Draft"): [0.5, 0.5, 1],
+        })
+
+    def test_rows_without_a_start_are_skipped(self):
+        header = frappe._dict(employee="EMP-1")
+        self.assertEqual(_contributions(header, [log("P1", "T1", None, 2)]), {})
+
+    def test_missing_links_key_as_empty_strings(self):
+        # Same shape as get_timesheet_contributions, which reads NULLs through cstr
+        contributions = _contributions(frappe._dict(employee=None), [log(None, None, "2024-01-01 08:00:00", 1)])
+        self.assertEqual(list(contributions), [("", "", "", "2024-01-01", "Draft")])
@@ -0,0 +1,92 @@
+import csv
+import io
+from datetime import date, datetime
+from unittest.mock import patch
+
+from frappe.tests.utils import FrappeTestCase
+
+from gnapi_customizations.customizations import timesheet_import
+from gnapi_customizations.customizations.timesheet_import import ERROR_REPORT_FIELDS, TimeLogImporter
+from gnapi_customizations.customizations.timesheet_validation import TimeLogInterval, split_overlapping
+
+def interval(start_hour: int, end_hour: int, idx: int, timesheet: str | None = None) -> TimeLogInterval:
+    return TimeLogInterval(datetime(2024, 1, 1, start_hour), datetime(2024, 1, 1, end_hour), idx, timesheet)
+
+class TestSplitOverlapping(FrappeTestCase):
+    def test_keeps_rows_that_do_not_clash(self):
+        own = [interval(8, 9, 0), interval(9, 10, 1), interval(11, 12, 2)]
+        accepted, rejected = split_overlapping(own, [interval(10, 11, 1, "TS-OTHER")])
+        self.assertEqual(accepted, own)
+        self.assertEqual(rejected, [])
+
+    def test_drops_the_later_of_two_clashing_rows(self):
+        first, second, third = interval(8, 10, 0), interval(9, 11, 1), interval(10, 12, 2)
+        accepted, rejected = split_overlapping([first, second, third])
+        self.assertEqual(accepted, [first, third])
+        self.assertEqual(rejected, [(second, first)])
+
+    def test_drops_rows_clashing_with_other_sheets(self):
+        own, other = interval(9, 11, 0), interval(10, 12, 1, "TS-OTHER")
+        self.assertEqual(split_overlapping([own], [other]), ([], [(own, other)]))
+
+        own, other = interval(10, 12, 0), interval(9, 11, 1, "TS-OTHER")
+        self.assertEqual(split_overlapping([own], [other]), ([], [(own, other)]))
+
+class TestImportGrouping(FrappeTestCase):
+    def make_importer(self, period: str = "day") -> TimeLogImporter:
+        employees = [("EMP-1", "one@example.com"), ("EMP-2", None)]
+        with patch.object(timesheet_import.frappe, "get_all", return_value=employees):
+            importer = TimeLogImporter(period=period)
+        importer.report = csv.DictWriter(io.StringIO(), fieldnames=ERROR_REPORT_FIELDS, extrasaction="ignore")
+        return importer
+
+    def add(self, importer: TimeLogImporter, row_number: int, start: str, end: str, **row) -> None:
+        row.setdefault("employee", "EMP-1")
+        importer._add_row(row_number, {"project": "P", "task": "T", "start_date_time": start, "end_date_time": end, **row})
+
+    def test_one_group_per_employee_and_day(self):
+        importer = self.make_importer()
+        self.add(importer, 1, "2024-01-01 08:00", "2024-01-01 09:00")
+        self.add(importer, 2, "2024-01-01 10:00", "2024-01-01 11:00")
+        self.add(importer, 3, "2024-01-02 08:00", "2024-01-02 09:00")
+        self.add(importer, 4, "2024-01-01 08:00", "2024-01-01 09:00", employee="EMP-2")
+        self.assertEqual(
+            {key: [row.row for row in rows] for key, rows in importer.open_groups.items()},
+            {
+                ("EMP-1", date(2024, 1, 1)): [1, 2],
+                ("EMP-1", date(2024, 1, 2)): [3],
+                ("EMP-2", date(2024, 1, 1)): [4],
+            },
+        )
+
+    def test_week_and_month_periods(self):
+        importer = self.make_importer("week")
+        # Wednesday and the following Sunday share the week starting Monday 2024-01-01
+        self.add(importer, 1, "2024-01-03 08:00", "2024-01-03 09:00")
+        self.add(importer, 2, "2024-01-07 08:00", "2024-01-07 09:00")
+        self.assertEqual(list(importer.open_groups), [("EMP-1", date(2024, 1, 1))])
+
+        importer = self.make_importer("month")
+        self.add(importer, 1, "2024-02-29 08:00", "2024-02-29 09:00")
+        self.assertEqual(list(importer.open_groups), [("EMP-1", date(2024, 2, 1))])
+
+    def test_employee_resolved_from_user(self):
+        importer = self.make_importer()
+        self.add(importer, 1, "2024-01-01 08:00", "2024-01-01 09:00", employee="", user="one@example.com")
+        self.assertEqual(list(importer.open_groups), [("EMP-1", date(2024, 1, 1))])
+
+    def test_invalid_rows_are_reported_not_grouped(self):
+        importer = self.make_importer()
+        self.add(importer, 1, "2024-01-01 09:00", "2024-01-01 08:00")
+        self.add(importer, 2, "2024-01-01 08:00", "2024-01-01 09:00", employee="EMP-404")
+        self.add(importer, 3, "", "2024-01-01 09:00")
+        self.assertEqual(importer.summary["errors"], 3)
+        self.assertFalse(importer.open_groups)
+
+    def test_full_group_is_closed(self):
+        importer = self.make_importer()
+        with patch.object(timesheet_import, "MAX_ROWS_PER_TIMESHEET", 2):
+            for i in range(3):
+                self.add(importer, i + 1, f"2024-01-01 {8 + i:02d}:00", f"2024-01-01 {9 + i:02d}:00")
+        self.assertEqual([[row.row for row in rows] for _key, rows in importer.ready_groups], [[1, 2]])
+        self.assertEqual([row.row for row in importer.open_groups[("EMP-1", date(2024, 1, 1))]], [3])
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from frappe.tests.utils import FrappeTestCase
+
+from gnapi_customizations.customizations.timesheet_validation import TimeLogInterval, find_first_overlap, row_hours
+
+def interval(start_hour: int, end_hour: int, idx: int, timesheet: str | None = None) -> TimeLogInterval:
+    return TimeLogInterval(datetime(2024, 1, 1, start_hour), datetime(2024, 1, 1, end_hour), idx, timesheet)
+
+class TestFindFirstOverlap(FrappeTestCase):
+    def test_no_overlap(self):
+        own = [interval(8, 9, 1), interval(9, 10, 2), interval(12, 13, 3)]
+        others = [interval(10, 12, 1, "TS-OTHER")]
+        self.assertIsNone(find_first_overlap(own, others))
+
+    def test_touching_rows_do_not_overlap(self):
+        self.assertIsNone(find_first_overlap([interval(9, 10, 2), interval(8, 9, 1)]))
+
+    def test_overlap_within_the_sheet(self):
+        first, second = interval(8, 11, 1), interval(10, 12, 2)
+        self.assertEqual(find_first_overlap([second, first]), (second, first))
+
+    def test_row_inside_an_earlier_long_interval(self):
+        # The latest end seen is remembered, not the end of the interval that started last
+        long_other, short_other = interval(8, 17, 1, "TS-A"), interval(9, 10, 1, "TS-B")
+        own = interval(12, 13, 1)
+        self.assertEqual(find_first_overlap([own], [long_other, short_other]), (own, long_other))
+
+    def test_overlap_with_another_sheet_either_way(self):
+        own, other = interval(9, 11, 1), interval(10, 12, 4, "TS-OTHER")
+        self.assertEqual(find_first_overlap([own], [other]), (own, other))
+
+        own, other = interval(10, 12, 1), interval(9, 11, 4, "TS-OTHER")
+        self.assertEqual(find_first_overlap([own], [other]), (own, other))
+
+    def test_other_sheets_may_overlap_each_other(self):
+        others = [interval(8, 12, 1, "TS-A"), interval(9, 11, 1, "TS-B")]
+        self.assertIsNone(find_first_overlap([interval(13, 14, 1)], others))
+
+class TestRowHours(FrappeTestCase):
+    def test_rounds_to_two_places(self):
+        self.assertEqual(row_hours(datetime(2024, 1, 1, 8), datetime(2024, 1, 1, 9, 20)), 1.33)
+
+    def test_non_positive_span_counts_as_a_tenth(self):
+        self.assertEqual(row_hours(datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 9)), 0.1)
@@ -1,103 +1,240 @@
 import frappe
 from frappe import _
-from frappe.utils import now, get_datetime
+from frappe.utils import now
 from frappe.model.document import Document
 
-class TimesheetApproval(Document):
-    def validate(self):
-        # Auto-populate fields from linked timesheet
-        if self.timesheet and not self.employee:
-            timesheet_doc = frappe.get_doc("Custom Timesheet", self.timesheet)
-            self.employee = timesheet_doc.employee
-            self.total_hours = timesheet_doc.total_hours
-            self.timesheet_date = timesheet_doc.creation.date()
-            
-            # Get project from timesheet details
-            if timesheet_doc.time_logs:
-                for log in timesheet_doc.time_logs:
-                    if log.project:
-                        self.project = log.project
-                        break
-
-    def before_save(self):
-        # Set approver to current user if not set
-        if not self.approver:
-            self.approver = frappe.session.user
+from gnapi_customizations.customizations.approval_notifications import queue_approval_notifications
+from gnapi_customizations.customizations.approval_sla import get_sla_due_at
+from gnapi_customizations.customizations.approval_updates import make_approval_update, publish_approval_updates
+from gnapi_customizations.customizations.approver_routing import resolve_project_approvers
+from gnapi_customizations.customizations.custom_timesheet_events import decide_timesheet
+from gnapi_customizations.customizations.form_bootstrap import clear_form_bootstrap
+from gnapi_customizations.customizations.hours_rollup import RollupTracker
+from gnapi_customizations.customizations.pending_approvals import clear_pending_count, close_decided_approvals
+from gnapi_customizations.customizations.permission_context import get_permission_context
+from gnapi_customizations.customizations.projections import clear_projections, load_projection
+from gnapi_customizations.instrumentation import instrument
+
+# Timesheet Approval is a fixture doctype with no controller class, so its hooks are doc_events
+@instrument
+def on_timesheet_approval_validate(doc: Document, method: str | None = None) -> None:
+    # Auto-populate fields from linked timesheet; only the header fields and the first
+    # time log with a project are read, not the whole time_logs table
+    if doc.timesheet and not doc.employee:
+        timesheet = load_projection(
+            "Custom Timesheet",
+            doc.timesheet,
+            ["employee", "total_hours", "creation"],
+            child=("Custom Timesheet Detail", ["project"], {"project": ("is", "set")}),
+        )
+        if not timesheet:
+            frappe.throw(f"Custom Timesheet {doc.timesheet} not found")
+        doc.employee = timesheet.employee
+        doc.total_hours = timesheet.total_hours
+        doc.timesheet_date = timesheet.creation.date()
+
+        # Get project from timesheet details
+        if timesheet.child:
+            doc.project = timesheet.child.project
+
+@instrument
+def on_timesheet_approval_before_save(doc: Document, method: str | None = None) -> None:
+    # Set approver to current user if not set
+    if not doc.approver:
+        doc.approver = frappe.session.user
+
+# Selections larger than this are handed to a background job
+BULK_BACKGROUND_THRESHOLD = 200
+# Approvals written per transaction
+BULK_CHUNK_SIZE = 100
+BULK_PROGRESS_EVENT = "gnapi_bulk_approval_progress"
+# Times a chunk is replayed after InnoDB picks it as a deadlock victim
+DEADLOCK_RETRIES = 2
 
 @frappe.whitelist()
+@instrument
 def bulk_approve(approvals):
     """Bulk approve multiple timesheet approvals"""
-    approved_count = 0
-    
-    for approval_name in approvals:
-        try:
-            approval_doc = frappe.get_doc("Timesheet Approval", approval_name)
-            
-            # Check if user has permission to approve
-            if not can_user_approve(approval_doc):
-                frappe.throw(_("You don't have permission to approve this timesheet"))
-            
-            # Update approval
-            approval_doc.approval_status = "Approved"
-            approval_doc.approval_date = now()
-            approval_doc.save()
-            
-            # Update the original timesheet
-            timesheet_doc = frappe.get_doc("Custom Timesheet", approval_doc.timesheet)
-            timesheet_doc.status = "Approved"
-            timesheet_doc.approval_status = "Approved"
-            timesheet_doc.approved_by = frappe.session.user
-            timesheet_doc.approval_date = now()
-            timesheet_doc.save()
-            
-            approved_count += 1
-            
-        except Exception as e:
-            frappe.log_error(f"Error approving {approval_name}: {str(e)}")
-    
-    return {"approved": approved_count}
+    return _bulk_transition(approvals, "Approved")
 
 @frappe.whitelist()
+@instrument
 def bulk_reject(approvals, comments):
     """Bulk reject multiple timesheet approvals"""
-    rejected_count = 0
-    
-    for approval_name in approvals:
-        try:
-            approval_doc = frappe.get_doc("Timesheet Approval", approval_name)
-            
-            # Check if user has permission to approve
-            if not can_user_approve(approval_doc):
-                frappe.throw(_("You don't have permission to reject this timesheet"))
-            
-            # Update approval
-            approval_doc.approval_status = "Rejected"
-            approval_doc.approval_date = now()
-            approval_doc.approval_comments = comments
-            approval_doc.save()
-            
-            # Update the original timesheet
-            timesheet_doc = frappe.get_doc("Custom Timesheet", approval_doc.timesheet)
-            timesheet_doc.status = "Rejected"
-            timesheet_doc.approval_status = "Rejected"
-            timesheet_doc.approved_by = frappe.session.user
-            timesheet_doc.approval_date = now()
-            timesheet_doc.approval_comments = comments
-            timesheet_doc.save()
-            
-            rejected_count += 1
-            
-        except Exception as e:
-            frappe.log_error(f"Error rejecting {approval_name}: {str(e)}")
-    
-    return {"rejected": rejected_count}
+    return _bulk_transition(approvals, "Rejected", comments)
+
+def _bulk_transition(approvals, approval_status, comments=None):
+    names = list(dict.fromkeys(frappe.parse_json(approvals) or []))
+    if not names:
+        return _bulk_response(approval_status, [])
+
+    if len(names) > BULK_BACKGROUND_THRESHOLD:
+        job = frappe.enqueue(
+            "gnapi_customizations.customizations.timesheet_approval_events.run_bulk_transition",
+            queue="long",
+            timeout=1800,
+            names=names,
+            approval_status=approval_status,
+            comments=comments,
+            publish_progress=True,
+        )
+        return {"queued": True, "job_id": job.id if job else None, "total": len(names)}
+
+    return run_bulk_transition(names, approval_status, comments)
+
+@instrument
+def run_bulk_transition(names, approval_status, comments=None, publish_progress=False):
+    """Authorize all approvals in one pass, then write the transitions in chunked transactions"""
+    user = frappe.session.user
+    results = {name: {"name": name, "status": "not_found"} for name in names}
+
+    authorized = []
+    for approval in frappe.get_all(
+        "Timesheet Approval",
+        filters={"name": ("in", names)},
+        fields=["name", "timesheet", "employee", "project", "approver"],
+    ):
+        if _can_approve_row(approval, user):
+            authorized.append(approval)
+        else:
+            results[approval.name] = {
+                "name": approval.name,
+                "status": "not_permitted",
+                "message": _("You don't have permission to update this timesheet"),
+            }
+
+    # A fixed lock order keeps concurrent bulk runs over overlapping selections from deadlocking
+    authorized.sort(key=lambda a: a.name)
+    total, done = len(authorized), 0
+    for start in range(0, total, BULK_CHUNK_SIZE):
+        chunk = authorized[start : start + BULK_CHUNK_SIZE]
+        for attempt in range(DEADLOCK_RETRIES + 1):
+            try:
+                results.update(_write_transitions(chunk, approval_status, comments, user))
+                frappe.db.commit()
+                break
+            except Exception as e:
+                frappe.db.rollback()
+                # Transitions are conditional, so replaying a chunk cannot apply anything twice
+                if frappe.db.is_deadlocked(e) and attempt < DEADLOCK_RETRIES:
+                    continue
+                frappe.log_error(f"Error updating approvals to {approval_status}: {str(e)}")
+                for approval in chunk:
+                    results[approval.name] = {"name": approval.name, "status": "error", "message": str(e)}
+                break
+
+        done += len(chunk)
+        if publish_progress:
+            frappe.publish_realtime(
+                BULK_PROGRESS_EVENT,
+                {"approval_status": approval_status, "done": done, "total": total},
+                user=user,
+            )
+
+    response = _bulk_response(approval_status, list(results.values()))
+    if publish_progress:
+        frappe.publish_realtime(BULK_PROGRESS_EVENT, dict(response, finished=True), user=user)
+    return response
+
+def _can_approve_row(approval, user):
+    context = get_permission_context(user)
+    return (
+        "System Manager" in context.roles
+        or approval.approver == user
+        or (approval.project and approval.project in context.approver_projects)
+    )
+
+def _write_transitions(approvals, approval_status, comments, user):
+    """Compare-and-set the timesheet of every approval in the chunk; returns the result per approval.
+
+    An approval is updated only if the `approval_status = 'Pending'` UPDATE of its timesheet
+    matched, i.e. this call decided the timesheet; its Pending approval rows are then closed
+    (the selected ones take the decision, the other approvers' are Superseded). Approvals
+    whose timesheet someone else already decided are reported as conflicts and left as they
+    are. A timesheet already in the requested state by the same user is already_applied,
+    which makes retries idempotent.
+    """
+    timestamp = now()
+    by_timesheet = {}
+    for approval in approvals:
+        by_timesheet.setdefault(approval.timesheet, []).append(approval)
+    timesheet_names = sorted(t for t in by_timesheet if t)
+
+    rollup = RollupTracker(timesheet_names)
+    decided = {}
+    for timesheet in timesheet_names:
+        if decide_timesheet(timesheet, approval_status, user, timestamp, comments):
+            decided[timesheet] = [a.name for a in by_timesheet[timesheet]]
+    clear_projections("Custom Timesheet", timesheet_names)
+
+    timesheets = {
+        t.name: t
+        for t in frappe.get_all(
+            "Custom Timesheet",
+            filters={"name": ("in", timesheet_names)},
+            fields=["name", "employee", "status", "approval_status", "approved_by", "approval_date", "approval_comments", "modified"],
+        )
+    } if timesheet_names else {}
+
+    results = {}
+    for approval in approvals:
+        t = timesheets.get(approval.timesheet)
+        if not t:
+            results[approval.name] = {"name": approval.name, "status": "not_found"}
+        elif t.name in decided:
+            results[approval.name] = {"name": approval.name, "status": "updated", "timesheet": t.name}
+        elif t.approval_status == approval_status and t.approved_by == user:
+            results[approval.name] = {"name": approval.name, "status": "already_applied", "timesheet": t.name}
+        else:
+            results[approval.name] = {
+                "name": approval.name,
+                "status": "conflict",
+                "timesheet": t.name,
+                "message": _("Already {0} by {1} at {2}").format(t.approval_status, t.approved_by, t.approval_date),
+            }
+
+    if not decided:
+        return results
+
+    rollup.apply()
+    superseded = close_decided_approvals(decided, approval_status, user, timestamp, comments)
+    publish_approval_updates([
+        make_approval_update(
+            t.name, t.approval_status, t.approved_by, t.approval_date, t.modified, t.approval_comments,
+            decided[t.name], status=t.status, superseded=superseded.get(t.name),
+        )
+        for t in timesheets.values()
+        if t.name in decided
+    ])
+
+    # Notifications are queued in the same transaction and merged into digests later,
+    # only for the timesheets this call actually decided
+    action = "approved" if approval_status == "Approved" else "rejected"
+    queue_approval_notifications([
+        {"timesheet": t.name, "employee": t.employee, "action": action, "comments": comments}
+        for t in timesheets.values()
+        if t.name in decided
+    ])
+    return results
+
+def _bulk_response(approval_status, results):
+    updated = sum(1 for r in results if r["status"] == "updated")
+    return {
+        "approval_status": approval_status,
+        "total": len(results),
+        "updated": updated,
+        "approved" if approval_status == "Approved" else "rejected": updated,
+        "conflicts": sum(1 for r in results if r["status"] == "conflict"),
+        "results": results,
+    }
 
 def can_user_approve(approval_doc):
     """Check if current user can approve this timesheet"""
     current_user = frappe.session.user
+    context = get_permission_context(current_user)
     
     # System Manager can approve anything
-    if "System Manager" in frappe.get_roles():
+    if "System Manager" in context.roles:
         return True
     
     # Check if user is the assigned approver
@@ -105,49 +242,67 @@ def can_user_approve(approval_doc):
         return True
     
     # Check if user is approver for the project
-    if approval_doc.project:
-        project_doc = frappe.get_doc("Project", approval_doc.project)
-        if project_doc.approver and current_user in project_doc.approver.split(','):
-            return True
+    if approval_doc.project and approval_doc.project in context.approver_projects:
+        return True
     
     return False
 
-@frappe.whitelist()
+@instrument
 def create_approval_for_timesheet(timesheet_name):
-    """Create approval record when timesheet is submitted"""
+    """Create approval records when timesheet is submitted; run by the on_submit job, not whitelisted"""
     try:
-        timesheet_doc = frappe.get_doc("Custom Timesheet", timesheet_name)
+        timesheet = load_projection("Custom Timesheet", timesheet_name, ["name", "employee", "total_hours", "creation"])
+        if not timesheet:
+            return {"status": "error", "message": f"Custom Timesheet {timesheet_name} not found"}
+        
+        # Every distinct project across the time logs, in row order
+        projects = frappe.db.sql("""
+            SELECT project FROM `tabCustom Timesheet Detail`
+            WHERE parent = %s AND parenttype = 'Custom Timesheet' AND IFNULL(project, '') != ''
+            GROUP BY project
+            ORDER BY MIN(idx)
+        """, timesheet_name, pluck=True)
+        
+        # Resolve all approvers in one query; an approver of several projects gets one record
+        approver_projects = {}
+        project_approvers = resolve_project_approvers(projects)
+        for project in projects:
+            for approver in project_approvers.get(project, []):
+                approver_projects.setdefault(approver, project)
+        
+        if not approver_projects:
+            return {"status": "success", "created": 0}
         
-        # Get project from timesheet
-        project_name = timesheet_doc.project
+        # Pre-check existing approvals in one query
+        existing = set(frappe.get_all("Timesheet Approval", filters={
+            "timesheet": timesheet_name,
+            "approver": ("in", list(approver_projects))
+        }, pluck="approver"))
         
-        if project_name:
-            project_doc = frappe.get_doc("Project", project_name)
-            
-            if project_doc.approver:
-                approvers = [a.strip() for a in project_doc.approver.split(',') if a.strip()]
-                
-                for approver in approvers:
-                    # Check if approval already exists
-                    existing = frappe.db.exists("Timesheet Approval", {
-                        "timesheet": timesheet_name,
-                        "approver": approver
-                    })
-                    
-                    if not existing:
-                        approval_doc = frappe.get_doc({
-                            "doctype": "Timesheet Approval",
-                            "timesheet": timesheet_name,
-                            "employee": timesheet_doc.employee,
-                            "project": project_name,
-                            "approver": approver,
-                            "approval_status": "Pending",
-                            "total_hours": timesheet_doc.total_hours,
-                            "timesheet_date": timesheet_doc.creation.date()
-                        })
-                        approval_doc.insert()
+        missing = [a for a in approver_projects if a not in existing]
+        if missing:
+            timestamp, user = now(), frappe.session.user
+            sla_due_at = get_sla_due_at(timestamp)
+            frappe.db.bulk_insert(
+                "Timesheet Approval",
+                fields=[
+                    "name", "timesheet", "employee", "project", "approver", "approval_status",
+                    "total_hours", "timesheet_date", "sla_due_at",
+                    "docstatus", "creation", "modified", "owner", "modified_by",
+                ],
+                values=[
+                    (
+                        frappe.generate_hash(length=10), timesheet_name, timesheet.employee,
+                        approver_projects[approver], approver, "Pending", timesheet.total_hours,
+                        timesheet.creation.date(), sla_due_at, 0, timestamp, timestamp, user, user,
+                    )
+                    for approver in missing
+                ],
+            )
+            clear_pending_count(missing)
+            clear_form_bootstrap(timesheet_name)
         
-        return {"status": "success"}
+        return {"status": "success", "created": len(missing)}
         
     except Exception as e:
         frappe.log_error(f"Error creating approval for {timesheet_name}: {str(e)}")
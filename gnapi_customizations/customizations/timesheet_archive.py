@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import frappe
+from frappe.utils import add_days, cint, nowdate
+
+from gnapi_customizations.customizations.approval_notifications import QUEUE_DOCTYPE
+from gnapi_customizations.customizations.chunked_upload import ATTACHMENT_PAGE_SIZE, get_attachment_page
+from gnapi_customizations.customizations.pending_approvals import clear_pending_count
+from gnapi_customizations.instrumentation import instrument
+
+# Hot doctype -> cold table with the same columns and indexes (CREATE TABLE ... LIKE)
+ARCHIVE_TABLES = {
+    "Custom Timesheet": "tabCustom Timesheet Archive",
+    "Custom Timesheet Detail": "tabCustom Timesheet Detail Archive",
+    "Timesheet Approval": "tabTimesheet Approval Archive",
+    "Timesheet Visibility": "tabTimesheet Visibility Archive",
+    "Comment": "tabTimesheet Comment Archive",
+    "Version": "tabTimesheet Version Archive",
+}
+# Rows moved with a batch of timesheets: doctype -> condition on the batch's %(names)s.
+# File rows stay in tabFile so their files keep being served; the read path looks them up there.
+_ARCHIVED_ROWS = {
+    "Timesheet Approval": "timesheet IN %(names)s",
+    "Timesheet Visibility": "timesheet IN %(names)s",
+    "Comment": "reference_doctype = 'Custom Timesheet' AND reference_name IN %(names)s",
+    "Version": "ref_doctype = 'Custom Timesheet' AND docname IN %(names)s",
+    "Custom Timesheet Detail": "parent IN %(names)s AND parenttype = 'Custom Timesheet'",
+    "Custom Timesheet": "name IN %(names)s",
+}
+# Only decided timesheets are moved; anything still in the approval flow stays hot
+ARCHIVE_STATUSES = ("Approved", "Rejected")
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+# Timesheets moved (with their rows and approvals) per transaction
+DEFAULT_ARCHIVE_BATCH_SIZE = 500
+
+def archive_table(doctype: str) -> str:
+    return f"`{ARCHIVE_TABLES[doctype]}`"
+
+def archive_exists() -> bool:
+    # table_exists prefixes "tab" itself
+    return frappe.db.table_exists(ARCHIVE_TABLES["Custom Timesheet"][len("tab"):], cached=False)
+
+def ensure_archive_tables() -> None:
+    """Create missing archive tables and add columns and indexes the hot tables gained since;
+    safe to run repeatedly"""
+    for doctype, table in ARCHIVE_TABLES.items():
+        if not frappe.db.table_exists(doctype):
+            continue
+        frappe.db.sql_ddl(f"CREATE TABLE IF NOT EXISTS `{table}` LIKE `tab{doctype}`")
+
+        archived = {row[0] for row in frappe.db.sql(f"SHOW COLUMNS FROM `{table}`")}
+        for column in frappe.db.sql(f"SHOW COLUMNS FROM `tab{doctype}`", as_dict=True):
+            if column.Field not in archived:
+                frappe.db.sql_ddl(f"ALTER TABLE `{table}` ADD COLUMN `{column.Field}` {column.Type} NULL")
+
+        archived_indexes = {row.Key_name for row in frappe.db.sql(f"SHOW INDEX FROM `{table}`", as_dict=True)}
+        missing = {}
+        for row in frappe.db.sql(f"SHOW INDEX FROM `tab{doctype}`", as_dict=True):
+            if row.Key_name not in archived_indexes:
+                missing.setdefault(row.Key_name, {})[row.Seq_in_index] = row.Column_name
+        for index_name, columns in missing.items():
+            # Mirrored as plain indexes: rows archived earlier may not satisfy a newer unique key
+            frappe.db.sql_ddl(
+                f"ALTER TABLE `{table}` ADD INDEX `{index_name}` "
+                f"({', '.join(f'`{columns[i]}`' for i in sorted(columns))})"
+            )
+
+def archive_closed_timesheets(
+    after_days: int | None = None, batch_size: int | None = None, max_batches: int | None = None
+) -> int:
+    """Move Approved/Rejected timesheets decided more than `after_days` ago to the archive tables.
+
+    Each batch copies the timesheets, their time logs, approvals, comments and versions,
+    deletes them from the hot tables and commits. Timesheets with notifications still queued
+    wait for the digest to send them. Returns the number of timesheets archived.
+    """
+    after_days = cint(after_days or frappe.conf.get("gnapi_archive_after_days") or DEFAULT_ARCHIVE_AFTER_DAYS)
+    batch_size = cint(batch_size or frappe.conf.get("gnapi_archive_batch_size") or DEFAULT_ARCHIVE_BATCH_SIZE)
+    cutoff = add_days(nowdate(), -after_days)
+    ensure_archive_tables()
+
+    archived = batches = 0
+    while max_batches is None or batches < max_batches:
+        names = frappe.db.sql_list(
+            f"""
+            SELECT name FROM `tabCustom Timesheet` t
+            WHERE docstatus = 1 AND approval_status IN %(statuses)s AND approval_date < %(cutoff)s
+                AND NOT EXISTS (SELECT 1 FROM `tab{QUEUE_DOCTYPE}` q WHERE q.timesheet = t.name)
+            ORDER BY approval_date, name
+            LIMIT %(limit)s
+            """,
+            {"statuses": ARCHIVE_STATUSES, "cutoff": cutoff, "limit": batch_size},
+        )
+        if not names:
+            break
+        _move_to_archive(names)
+        frappe.db.commit()
+        archived += len(names)
+        batches += 1
+    return archived
+
+def _move_to_archive(names: list[str]) -> None:
+    pending_approvers = frappe.db.sql_list(
+        """
+        SELECT DISTINCT approver FROM `tabTimesheet Approval`
+        WHERE timesheet IN %(names)s AND approval_status = 'Pending'
+        """,
+        {"names": tuple(names)},
+    )
+    # The whole batch is one transaction, committed by the caller
+    for doctype, condition in _ARCHIVED_ROWS.items():
+        columns = ", ".join(f"`{c}`" for c in frappe.db.get_table_columns(doctype))
+        # REPLACE keeps a re-run of a half-finished batch idempotent
+        frappe.db.sql(
+            f"REPLACE INTO {archive_table(doctype)} ({columns}) SELECT {columns} FROM `tab{doctype}` WHERE {condition}",
+            {"names": tuple(names)},
+        )
+        frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE {condition}", {"names": tuple(names)})
+    clear_pending_count(pending_approvers)
+
+# ---------------------------- read path ----------------------------
+
+def archived_permission_condition(user: str) -> str:
+    """custom_timesheet_permission_query pointed at the archived visibility rows.
+
+    Queries over the archive alias the archived timesheets as `tabCustom Timesheet`,
+    so only the visibility subquery needs redirecting. Archived rows keep the
+    visibility the timesheet had when it was archived.
+    """
+    from gnapi_customizations.customizations.custom_timesheet_events import custom_timesheet_permission_query
+
+    condition = custom_timesheet_permission_query(user)
+    return condition.replace("`tabTimesheet Visibility`", archive_table("Timesheet Visibility"))
+
+def _check_archived_access(timesheet: str) -> dict:
+    frappe.has_permission("Custom Timesheet", "read", throw=True)
+    if not archive_exists():
+        frappe.throw(f"Custom Timesheet {timesheet} not found in the archive", frappe.DoesNotExistError)
+
+    condition = archived_permission_condition(frappe.session.user)
+    rows = frappe.db.sql(
+        f"""
+        SELECT * FROM {archive_table("Custom Timesheet")} AS `tabCustom Timesheet`
+        WHERE `tabCustom Timesheet`.name = %(name)s {f"AND {condition}" if condition else ""}
+        """,
+        {"name": timesheet},
+        as_dict=True,
+    )
+    if not rows:
+        frappe.throw(f"Custom Timesheet {timesheet} not found in the archive", frappe.DoesNotExistError)
+    return rows[0]
+
+@frappe.whitelist()
+@instrument
+def get_archived_timesheet(timesheet: str) -> dict:
+    """An archived timesheet with its time logs, approvals, comments, versions and first page
+    of attachments, if the current user may read it"""
+    doc = _check_archived_access(timesheet)
+    doc.time_logs = frappe.db.sql(
+        f"SELECT * FROM {archive_table('Custom Timesheet Detail')} WHERE parent = %s ORDER BY idx",
+        timesheet,
+        as_dict=True,
+    )
+    doc.approvals = frappe.db.sql(
+        f"SELECT * FROM {archive_table('Timesheet Approval')} WHERE timesheet = %s ORDER BY creation",
+        timesheet,
+        as_dict=True,
+    )
+    doc.comments = frappe.db.sql(
+        f"""
+        SELECT name, comment_type, comment_email, content, creation FROM {archive_table('Comment')}
+        WHERE reference_doctype = 'Custom Timesheet' AND reference_name = %s ORDER BY creation
+        """,
+        timesheet,
+        as_dict=True,
+    )
+    doc.versions = frappe.db.sql(
+        f"""
+        SELECT name, owner, data, creation FROM {archive_table('Version')}
+        WHERE ref_doctype = 'Custom Timesheet' AND docname = %s ORDER BY creation
+        """,
+        timesheet,
+        as_dict=True,
+    )
+    attachments = get_attachment_page("Custom Timesheet", timesheet)
+    doc.attachments = attachments["items"]
+    doc.attachments_next_cursor = attachments["next_cursor"]
+    return doc
+
+@frappe.whitelist()
+@instrument
+def get_archived_timesheet_attachments(
+    timesheet: str, after: str | None = None, limit: int = ATTACHMENT_PAGE_SIZE
+) -> dict:
+    """get_timesheet_attachments for an archived timesheet; its File rows stay in tabFile"""
+    _check_archived_access(timesheet)
+    return get_attachment_page("Custom Timesheet", timesheet, after, limit)
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import frappe
+from frappe.utils import cint, cstr, flt, get_datetime, now
+
+from gnapi_customizations.customizations.hours_rollup import apply_contribution_delta
+from gnapi_customizations.customizations.permission_context import get_permission_context
+from gnapi_customizations.customizations.projections import clear_projections
+from gnapi_customizations.customizations.timesheet_validation import (
+    TimeLogInterval,
+    find_first_overlap,
+    get_neighbour_intervals,
+    row_hours,
+    throw_overlap,
+)
+from gnapi_customizations.customizations.timesheet_visibility import refresh_timesheet_visibility
+from gnapi_customizations.instrumentation import instrument
+
+DETAIL_DOCTYPE = "Custom Timesheet Detail"
+# Row fields a delta may set; everything else is derived on the server
+DELTA_ROW_FIELDS = ("project", "task", "start_date_time", "end_date_time", "is_billable", "description")
+_STORED_ROW_FIELDS = ("name", "idx", "taken_hours") + DELTA_ROW_FIELDS
+
+@frappe.whitelist(methods=["POST"])
+@instrument
+def save_time_log_delta(
+    timesheet: str,
+    modified: str,
+    added: str | list | None = None,
+    changed: str | list | None = None,
+    removed: str | list | None = None,
+) -> dict:
+    """Save only the added, changed and removed time_logs of a draft Custom Timesheet.
+
+    `added` rows carry the client's temporary `name`, `changed` rows their `name` plus
+    the fields that changed, `removed` is a list of row names. The save is refused if the
+    sheet was modified after `modified`. Only the touched rows and the rows they could
+    overlap are read and validated; total_hours and the hours rollup move by the difference.
+    """
+    added = frappe.parse_json(added) or []
+    changed = frappe.parse_json(changed) or []
+    removed = set(frappe.parse_json(removed) or [])
+
+    header = _lock_header(timesheet)
+    if get_datetime(header.modified) != get_datetime(modified):
+        frappe.throw(
+            f"Custom Timesheet {timesheet} has been modified after you opened it. Refresh it to get the latest version.",
+            frappe.TimestampMismatchError,
+        )
+
+    stored = _get_stored_rows(timesheet, {row.get("name") for row in changed} | removed)
+    touched, before = [], []
+    for update in changed:
+        old = stored[update.get("name")]
+        if old.name in removed:
+            frappe.throw(f"Custom Timesheet Details row {old.idx} cannot be changed and removed at once")
+        row = frappe._dict(old, **{f: update[f] for f in DELTA_ROW_FIELDS if f in update})
+        before.append(old)
+        touched.append(row)
+    before += [stored[name] for name in removed]
+
+    next_idx = cint(
+        frappe.db.sql(
+            f"SELECT MAX(idx) FROM `tab{DETAIL_DOCTYPE}` WHERE parent = %s AND parenttype = 'Custom Timesheet'",
+            timesheet,
+        )[0][0]
+    )
+    for new in added:
+        next_idx += 1
+        row = frappe._dict({f: new.get(f) for f in DELTA_ROW_FIELDS})
+        row.update({"client_name": new.get("name"), "name": frappe.generate_hash(length=10), "idx": next_idx})
+        touched.append(row)
+
+    if removed and not added and _count_rows(timesheet) <= len(removed):
+        frappe.throw("At least one row is required in Custom Timesheet Details table")
+
+    _validate_touched_rows(header, touched, exclude_rows={row.name for row in before})
+
+    timestamp, user = now(), frappe.session.user
+    _write_rows(
+        timesheet,
+        removed,
+        changed=[row for row in touched if not row.client_name],
+        added=[row for row in touched if row.client_name],
+        timestamp=timestamp,
+    )
+
+    total_hours = header.total_hours
+    if not _total_hours_from_header(header):
+        added_hours = sum(flt(r.taken_hours) for r in touched)
+        removed_hours = sum(flt(r.taken_hours) for r in before)
+        total_hours = round(flt(header.total_hours) + added_hours - removed_hours, 2)
+    frappe.db.sql(
+        """
+        UPDATE `tabCustom Timesheet`
+        SET total_hours = %(total_hours)s, modified = %(timestamp)s, modified_by = %(user)s
+        WHERE name = %(name)s
+        """,
+        {"total_hours": total_hours, "timestamp": timestamp, "user": user, "name": timesheet},
+    )
+    apply_contribution_delta(_contributions(header, before), _contributions(header, touched))
+    # Added, removed or re-projected rows change which approvers see the sheet
+    refresh_timesheet_visibility([timesheet])
+    clear_projections("Custom Timesheet", timesheet)
+
+    return {
+        "modified": timestamp,
+        "total_hours": total_hours,
+        "rows": [
+            {"name": row.name, "client_name": row.client_name, "idx": row.idx, "taken_hours": row.taken_hours}
+            for row in touched
+        ],
+    }
+
+def _lock_header(timesheet: str) -> frappe._dict:
+    # Row lock so two delta saves of the same sheet apply one after the other
+    rows = frappe.db.sql(
+        """
+        SELECT name, employee, docstatus, modified, total_hours, start_date, start_time, end_date, end_time
+        FROM `tabCustom Timesheet`
+        WHERE name = %s
+        FOR UPDATE
+        """,
+        timesheet,
+        as_dict=True,
+    )
+    if not rows:
+        frappe.throw(f"Custom Timesheet {timesheet} not found", frappe.DoesNotExistError)
+    header = rows[0]
+
+    frappe.has_permission("Custom Timesheet", "write", throw=True)
+    # Same ownership rule on_custom_timesheet_validate enforces on a full save
+    context = get_permission_context()
+    if (
+        frappe.session.user != "Administrator"
+        and "System Manager" not in context.roles
+        and header.employee != context.employee
+    ):
+        frappe.throw(f"You are not allowed to edit Custom Timesheet {timesheet}", frappe.PermissionError)
+    if header.docstatus != 0:
+        frappe.throw("Only draft timesheets can be edited row by row")
+    return header
+
+def _get_stored_rows(timesheet: str, names: set[str]) -> dict[str, frappe._dict]:
+    if not names:
+        return {}
+    rows = {
+        row.name: row
+        for row in frappe.get_all(
+            DETAIL_DOCTYPE,
+            filters={"parent": timesheet, "parenttype": "Custom Timesheet", "name": ("in", list(names))},
+            fields=list(_STORED_ROW_FIELDS),
+        )
+    }
+    missing = [name for name in names if name not in rows]
+    if missing:
+        frappe.throw(f"Rows {', '.join(map(str, missing))} are not part of Custom Timesheet {timesheet}")
+    return rows
+
+def _count_rows(timesheet: str) -> int:
+    return frappe.db.count(DETAIL_DOCTYPE, {"parent": timesheet, "parenttype": "Custom Timesheet"})
+
+def _validate_touched_rows(header: frappe._dict, rows: list[frappe._dict], exclude_rows: set[str]) -> None:
+    """validate_time_logs for just these rows: mandatory fields, ordering, links, taken_hours, overlaps"""
+    if not rows:
+        return
+
+    intervals = []
+    for row in rows:
+        missing_fields = []
+        if not str(row.get("project") or "").strip():
+            missing_fields.append("Project")
+        if not str(row.get("task") or "").strip():
+            missing_fields.append("Task")
+        if not row.get("start_date_time"):
+            missing_fields.append("Start Date and Time")
+        if not row.get("end_date_time"):
+            missing_fields.append("End Date and Time")
+        if missing_fields:
+            frappe.throw(
+                f"Mandatory fields required in Custom Timesheet Details, Row {row.idx}: {', '.join(missing_fields)}"
+            )
+
+        row.start_date_time = get_datetime(row.start_date_time)
+        row.end_date_time = get_datetime(row.end_date_time)
+        if row.end_date_time <= row.start_date_time:
+            frappe.throw(
+                f"End Date and Time must be after Start Date and Time in Custom Timesheet Details row {row.idx}"
+            )
+        row.taken_hours = row_hours(row.start_date_time, row.end_date_time)
+        row.is_billable = cint(row.is_billable)
+        intervals.append(TimeLogInterval(row.start_date_time, row.end_date_time, row.idx))
+
+    _check_links(rows)
+
+    # Untouched rows outside the edited span cannot overlap anything that changed
+    neighbours = get_neighbour_intervals(
+        header.name,
+        header.employee,
+        min(iv.start for iv in intervals),
+        max(iv.end for iv in intervals),
+        exclude_rows=exclude_rows | {row.name for row in rows},
+    )
+    overlap = find_first_overlap(intervals, neighbours)
+    if overlap:
+        throw_overlap(*overlap)
+
+def _check_links(rows: list[frappe._dict]) -> None:
+    projects = set(
+        frappe.get_all("Project", filters={"name": ("in", list({r.project for r in rows}))}, pluck="name")
+    )
+    tasks = dict(
+        frappe.get_all(
+            "Task", filters={"name": ("in", list({r.task for r in rows}))}, fields=["name", "project"], as_list=True
+        )
+    )
+    for row in rows:
+        if row.project not in projects:
+            frappe.throw(f"Project {row.project} not found in Custom Timesheet Details row {row.idx}")
+        if row.task not in tasks:
+            frappe.throw(f"Task {row.task} not found in Custom Timesheet Details row {row.idx}")
+        if tasks[row.task] and tasks[row.task] != row.project:
+            frappe.throw(f"Task {row.task} does not belong to project {row.project} in Custom Timesheet Details row {row.idx}")
+
+def _write_rows(
+    timesheet: str, removed: set[str], changed: list[frappe._dict], added: list[frappe._dict], timestamp: str
+) -> None:
+    user = frappe.session.user
+    if removed:
+        frappe.db.sql(
+            f"DELETE FROM `tab{DETAIL_DOCTYPE}` WHERE parent = %(parent)s AND name IN %(names)s",
+            {"parent": timesheet, "names": tuple(removed)},
+        )
+    for row in changed:
+        frappe.db.set_value(
+            DETAIL_DOCTYPE,
+            row.name,
+            {
+                **{f: row.get(f) for f in DELTA_ROW_FIELDS},
+                "taken_hours": row.taken_hours,
+                "modified": timestamp,
+                "modified_by": user,
+            },
+            update_modified=False,
+        )
+    if added:
+        frappe.db.bulk_insert(
+            DETAIL_DOCTYPE,
+            fields=[
+                "name", "parent", "parenttype", "parentfield", "idx",
+                "project", "task", "start_date_time", "end_date_time", "taken_hours",
+                "is_billable", "description",
+                "docstatus", "creation", "modified", "owner", "modified_by",
+            ],
+            values=[
+                (
+                    row.name, timesheet, "Custom Timesheet", "time_logs", row.idx,
+                    row.project, row.task, row.start_date_time, row.end_date_time, row.taken_hours,
+                    row.is_billable, row.get("description") or None,
+                    0, timestamp, timestamp, user, user,
+                )
+                for row in added
+            ],
+        )
+
+def _total_hours_from_header(header: frappe._dict) -> bool:
+    # on_custom_timesheet_validate takes the total from the header span when it is complete
+    return bool(header.start_date and header.start_time and header.end_date and header.end_time)
+
+def _contributions(header: frappe._dict, rows: list[frappe._dict]) -> dict[tuple, list[float]]:
+    """Rollup contribution of some rows of a draft sheet, shaped like get_timesheet_contributions"""
+    contributions = {}
+    for row in rows:
+        if not row.start_date_time:
+            continue
+        key = (
+            cstr(header.employee), cstr(row.project), cstr(row.task),
+            cstr(get_datetime(row.start_date_time).date()), "Draft",
+        )
+        hours = flt(row.taken_hours)
+        values = contributions.setdefault(key, [0, 0, 0])
+        values[0] += hours
+        values[1] += hours if cint(row.is_billable) else 0
+        values[2] += 1
+    return contributions
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import csv
+import io
+from typing import Iterator
+
+import frappe
+from frappe.utils import add_days, cint, getdate
+from werkzeug.wrappers import Response
+
+from gnapi_customizations.customizations.custom_timesheet_events import custom_timesheet_permission_query
+from gnapi_customizations.customizations.timesheet_archive import (
+    archive_exists,
+    archive_table,
+    archived_permission_condition,
+)
+from gnapi_customizations.instrumentation import instrument
+
+# Rows fetched from the server-side cursor and written per chunk
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_COLUMNS = [
+    ("timesheet", "d.parent"),
+    ("employee", "`tabCustom Timesheet`.employee"),
+    ("project", "d.project"),
+    ("task", "d.task"),
+    ("start_date_time", "d.start_date_time"),
+    ("end_date_time", "d.end_date_time"),
+    ("taken_hours", "d.taken_hours"),
+    ("is_billable", "d.is_billable"),
+    ("description", "d.description"),
+    ("approval_status", "`tabCustom Timesheet`.approval_status"),
+    ("approved_by", "`tabCustom Timesheet`.approved_by"),
+    ("approval_date", "`tabCustom Timesheet`.approval_date"),
+]
+
+def build_export_queries(
+    user: str,
+    approval_status: str | None = "Approved",
+    from_date: str | None = None,
+    to_date: str | None = None,
+    include_archived: bool = False,
+) -> list[tuple[str, dict]]:
+    """Time log queries limited to what `user` may read, as the list view would limit it.
+
+    With `include_archived` a second query runs the same selection over the archive tables.
+    The two are streamed one after the other rather than merged, so neither is sorted as a whole.
+    """
+    conditions = ["d.parenttype = 'Custom Timesheet'", "`tabCustom Timesheet`.docstatus < 2"]
+    values = {}
+    if approval_status:
+        conditions.append("`tabCustom Timesheet`.approval_status = %(approval_status)s")
+        values["approval_status"] = approval_status
+    if from_date:
+        conditions.append("d.start_date_time >= %(from_date)s")
+        values["from_date"] = getdate(from_date)
+    if to_date:
+        conditions.append("d.start_date_time < %(before_date)s")
+        values["before_date"] = add_days(getdate(to_date), 1)
+
+    # A date range is read in start_date_time order off its index; an unbounded export would
+    # have to sort every time log, so it comes back in storage order instead
+    order_by = "ORDER BY d.start_date_time" if from_date or to_date else ""
+    columns = ", ".join(expr for _field, expr in EXPORT_COLUMNS)
+    permission_condition = custom_timesheet_permission_query(user)
+    # The outer timesheet table keeps its real name so the permission condition applies unchanged
+    queries = [(
+        f"""
+        SELECT {columns}
+        FROM `tabCustom Timesheet Detail` d
+        INNER JOIN `tabCustom Timesheet` ON `tabCustom Timesheet`.name = d.parent
+        WHERE {" AND ".join(conditions + ([permission_condition] if permission_condition else []))}
+        {order_by}
+        """,
+        values,
+    )]
+    if include_archived and archive_exists():
+        archived_condition = archived_permission_condition(user)
+        queries.append((
+            f"""
+            SELECT {columns}
+            FROM {archive_table("Custom Timesheet Detail")} d
+            INNER JOIN {archive_table("Custom Timesheet")} AS `tabCustom Timesheet` ON `tabCustom Timesheet`.name = d.parent
+            WHERE {" AND ".join(conditions + ([archived_condition] if archived_condition else []))}
+            {order_by}
+            """,
+            values,
+        ))
+    return queries
+
+def iter_export_chunks(
+    user: str,
+    approval_status: str | None = "Approved",
+    from_date: str | None = None,
+    to_date: str | None = None,
+    include_archived: bool = False,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[list[tuple]]:
+    """Yield lists of row tuples from an unbuffered cursor, so memory does not grow with the result"""
+    queries = build_export_queries(user, approval_status, from_date, to_date, include_archived)
+    chunk = []
+    for query, values in queries:
+        # No other query may run on this connection until the cursor is exhausted
+        with frappe.db.unbuffered_cursor():
+            for row in frappe.db.sql(query, values, as_iterator=True):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+def iter_csv(chunks: Iterator[list[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([field for field, _expr in EXPORT_COLUMNS])
+    # The header goes out before the query runs, so the client gets bytes immediately
+    yield buffer.getvalue().encode()
+
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+
+def write_parquet(chunks: Iterator[list[tuple]], path: str) -> int:
+    """Write chunks as row groups of a Parquet file; needs pyarrow"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        frappe.throw("Parquet export needs pyarrow, install it with: bench pip install pyarrow")
+
+    schema = pa.schema([
+        ("timesheet", pa.string()),
+        ("employee", pa.string()),
+        ("project", pa.string()),
+        ("task", pa.string()),
+        ("start_date_time", pa.timestamp("us")),
+        ("end_date_time", pa.timestamp("us")),
+        ("taken_hours", pa.float64()),
+        ("is_billable", pa.int8()),
+        ("description", pa.string()),
+        ("approval_status", pa.string()),
+        ("approved_by", pa.string()),
+        ("approval_date", pa.timestamp("us")),
+    ])
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            ))
+            rows += len(chunk)
+    return rows
+
+def export_time_logs(
+    path: str,
+    user: str = "Administrator",
+    file_format: str = "csv",
+    approval_status: str | None = "Approved",
+    from_date: str | None = None,
+    to_date: str | None = None,
+    include_archived: bool = False,
+) -> int:
+    """Export to a local file; returns the number of rows written"""
+    chunks = iter_export_chunks(user, approval_status, from_date, to_date, include_archived)
+    if file_format == "parquet":
+        return write_parquet(chunks, path)
+    if file_format != "csv":
+        frappe.throw(f"Unsupported export format: {file_format}")
+
+    rows = 0
+
+    def counted(chunks):
+        nonlocal rows
+        for chunk in chunks:
+            rows += len(chunk)
+            yield chunk
+
+    with open(path, "wb") as f:
+        for data in iter_csv(counted(chunks)):
+            f.write(data)
+    return rows
+
+@frappe.whitelist(methods=["GET"])
+@instrument
+def download_time_logs(
+    approval_status: str | None = "Approved",
+    from_date: str | None = None,
+    to_date: str | None = None,
+    include_archived: int = 0,
+) -> Response:
+    """Stream the time logs the current user may read as CSV, optionally including archived timesheets"""
+    frappe.has_permission("Custom Timesheet", "read", throw=True)
+    site, user = frappe.local.site, frappe.session.user
+
+    def generate():
+        # The request context (and its db connection) is torn down before the body is sent,
+        # so the generator opens its own
+        frappe.init(site=site)
+        frappe.connect()
+        try:
+            frappe.set_user(user)
+            yield from iter_csv(
+                iter_export_chunks(user, approval_status or None, from_date, to_date, cint(include_archived))
+            )
+        finally:
+            frappe.destroy()
+
+    filename = f"timesheets-{from_date or 'all'}-{to_date or 'all'}.csv"
+    return Response(
+        generate(),
+        mimetype="text/csv",
+        direct_passthrough=True,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+import frappe
+from frappe.utils import cint, get_datetime, now
+
+from gnapi_customizations.customizations.hours_rollup import apply_contribution_delta, get_timesheet_contributions
+from gnapi_customizations.customizations.permission_context import get_permission_context
+from gnapi_customizations.customizations.timesheet_validation import (
+    TimeLogInterval,
+    get_employee_intervals,
+    row_hours,
+    split_overlapping,
+)
+from gnapi_customizations.customizations.timesheet_visibility import refresh_timesheet_visibility
+from gnapi_customizations.instrumentation import instrument
+
+IMPORT_PERIODS = ("day", "week", "month")
+# Open (employee, period) groups kept in memory; the oldest is written out when exceeded
+MAX_OPEN_GROUPS = 500
+MAX_ROWS_PER_TIMESHEET = 200
+# Time logs validated and inserted together
+IMPORT_CHUNK_ROWS = 2000
+IMPORT_DONE_EVENT = "gnapi_time_log_import_done"
+ERROR_REPORT_FIELDS = ["row", "employee", "start_date_time", "error"]
+
+class TimeLogImporter:
+    """Stream time logs into draft Custom Timesheets, one sheet per employee and period.
+
+    Applies the rules of on_custom_timesheet_validate to whole chunks: mandatory fields,
+    end after start, employee resolution from one user -> employee map and overlaps
+    against existing sheets with one range query per chunk. Rows that fail are written
+    to the error report and skipped; the rest of the file is still imported.
+    """
+
+    def __init__(self, period: str = "day", error_report: str | None = None, restrict_to_employee: str | None = None):
+        if period not in IMPORT_PERIODS:
+            frappe.throw(f"Period must be one of {', '.join(IMPORT_PERIODS)}")
+
+        self.period = period
+        self.restrict_to_employee = restrict_to_employee
+        self.error_report = error_report
+        self.open_groups: OrderedDict[tuple, list] = OrderedDict()
+        self.ready_groups: list[tuple[tuple, list]] = []
+        self.ready_rows = 0
+        self.summary = {"rows": 0, "imported_rows": 0, "timesheets": 0, "errors": 0}
+
+        employees = frappe.get_all("Employee", fields=["name", "user_id"], as_list=True)
+        self.employees = {name for name, _user in employees}
+        self.user_employees = {user: name for name, user in employees if user}
+
+    def run(self, rows: Iterable[dict]) -> dict:
+        with open(self.error_report or os.devnull, "w", newline="") as report:
+            self.report = csv.DictWriter(report, fieldnames=ERROR_REPORT_FIELDS, extrasaction="ignore")
+            self.report.writeheader()
+
+            for row_number, raw in enumerate(rows, 1):
+                self.summary["rows"] += 1
+                self._add_row(row_number, raw)
+
+            while self.open_groups:
+                self._close_group(*self.open_groups.popitem(last=False))
+            self._flush()
+
+        if self.summary["errors"]:
+            self.summary["error_report"] = self.error_report
+        else:
+            self.summary["error_report"] = None
+            if self.error_report and os.path.exists(self.error_report):
+                os.remove(self.error_report)
+        return self.summary
+
+    # ---------------------------- parsing ----------------------------
+
+    def _add_row(self, row_number: int, raw: dict) -> None:
+        row = frappe._dict({k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in raw.items() if k})
+        row.row = row_number
+
+        error = self._parse_row(row)
+        if error:
+            self._log_error(row, error)
+            return
+
+        key = (row.employee, self._period_start(row.start))
+        group = self.open_groups.get(key)
+        if group is None:
+            if len(self.open_groups) >= MAX_OPEN_GROUPS:
+                self._close_group(*self.open_groups.popitem(last=False))
+            group = self.open_groups[key] = []
+        group.append(row)
+
+        if len(group) >= MAX_ROWS_PER_TIMESHEET:
+            self._close_group(key, self.open_groups.pop(key))
+
+    def _parse_row(self, row: frappe._dict) -> str | None:
+        employee = row.get("employee") or self.user_employees.get(row.get("user") or row.get("user_id") or "")
+        if not employee:
+            return "No Employee record for this row (give employee or user)"
+        if employee not in self.employees:
+            return f"Employee {employee} not found"
+        if self.restrict_to_employee and employee != self.restrict_to_employee:
+            return "You can only import your own time logs"
+        row.employee = employee
+
+        missing_fields = [
+            label
+            for fieldname, label in (
+                ("project", "Project"),
+                ("task", "Task"),
+                ("start_date_time", "Start Date and Time"),
+                ("end_date_time", "End Date and Time"),
+            )
+            if not str(row.get(fieldname) or "").strip()
+        ]
+        if missing_fields:
+            return f"Mandatory fields required: {', '.join(missing_fields)}"
+
+        try:
+            row.start = get_datetime(row.start_date_time)
+            row.end = get_datetime(row.end_date_time)
+        except Exception:
+            return "Invalid Start or End Date and Time"
+        if row.end <= row.start:
+            return "End Date and Time must be after Start Date and Time"
+        return None
+
+    def _period_start(self, start: datetime):
+        day = start.date()
+        if self.period == "week":
+            return day - timedelta(days=day.weekday())
+        if self.period == "month":
+            return day.replace(day=1)
+        return day
+
+    def _log_error(self, row: frappe._dict, error: str) -> None:
+        self.summary["errors"] += 1
+        self.report.writerow({
+            "row": row.row,
+            "employee": row.get("employee") or row.get("user") or "",
+            "start_date_time": row.get("start_date_time") or "",
+            "error": error,
+        })
+
+    # ---------------------------- writing ----------------------------
+
+    def _close_group(self, key: tuple, rows: list) -> None:
+        self.ready_groups.append((key, rows))
+        self.ready_rows += len(rows)
+        if self.ready_rows >= IMPORT_CHUNK_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self.ready_groups:
+            return
+
+        groups, self.ready_groups, self.ready_rows = self.ready_groups, [], 0
+        all_rows = [row for _key, rows in groups for row in rows]
+        valid_links = self._get_valid_links(all_rows)
+        existing = get_employee_intervals(
+            list({key[0] for key, _rows in groups}),
+            min(row.start for row in all_rows),
+            max(row.end for row in all_rows),
+        )
+
+        sheets, details, names = [], [], []
+        timestamp, user = now(), frappe.session.user
+        for (employee, _period), rows in groups:
+            rows = [row for row in rows if self._check_links(row, valid_links)]
+            if not rows:
+                continue
+
+            # Sheets written earlier in this import are part of `existing` for later groups
+            accepted, rejected = split_overlapping(
+                [TimeLogInterval(row.start, row.end, i) for i, row in enumerate(rows)],
+                existing.get(employee),
+            )
+            for interval, clash in rejected:
+                where = f"timesheet {clash.timesheet}" if clash.timesheet else f"row {rows[clash.idx].row}"
+                self._log_error(rows[interval.idx], f"Overlaps with {where} ({clash.start} - {clash.end})")
+            if not accepted:
+                continue
+
+            name = frappe.generate_hash(length=10)
+            accepted.sort(key=lambda iv: iv.start)
+            first, last = rows[accepted[0].idx], max((rows[iv.idx] for iv in accepted), key=lambda r: r.end)
+            sheets.append((
+                name, employee, first.project, "Draft", "Pending",
+                first.start.date(), first.start.time(), last.end.date(), last.end.time(),
+                # Header span, as on_custom_timesheet_validate computes it from these fields
+                round((last.end - first.start).total_seconds() / 3600, 2),
+                0, timestamp, timestamp, user, user,
+            ))
+            for idx, interval in enumerate(accepted, 1):
+                row = rows[interval.idx]
+                details.append((
+                    frappe.generate_hash(length=10), name, "Custom Timesheet", "time_logs", idx,
+                    row.project, row.task, row.start, row.end, row_hours(row.start, row.end),
+                    cint(row.get("is_billable")), row.get("description") or None,
+                    0, timestamp, timestamp, user, user,
+                ))
+                existing.setdefault(employee, []).append(TimeLogInterval(row.start, row.end, idx, name))
+            names.append(name)
+
+        if not names:
+            return
+
+        frappe.db.bulk_insert(
+            "Custom Timesheet",
+            fields=[
+                "name", "employee", "project", "status", "approval_status",
+                "start_date", "start_time", "end_date", "end_time", "total_hours",
+                "docstatus", "creation", "modified", "owner", "modified_by",
+            ],
+            values=sheets,
+        )
+        frappe.db.bulk_insert(
+            "Custom Timesheet Detail",
+            fields=[
+                "name", "parent", "parenttype", "parentfield", "idx",
+                "project", "task", "start_date_time", "end_date_time", "taken_hours",
+                "is_billable", "description",
+                "docstatus", "creation", "modified", "owner", "modified_by",
+            ],
+            values=details,
+        )
+        apply_contribution_delta({}, get_timesheet_contributions(names))
+        refresh_timesheet_visibility(names)
+        frappe.db.commit()
+
+        self.summary["timesheets"] += len(names)
+        self.summary["imported_rows"] += len(details)
+
+    def _get_valid_links(self, rows: list) -> dict[str, dict]:
+        """Existing projects and task -> project for the chunk, one query each"""
+        projects = {row.project for row in rows}
+        tasks = {row.task for row in rows}
+        return {
+            "projects": set(frappe.get_all("Project", filters={"name": ("in", list(projects))}, pluck="name")),
+            "tasks": dict(
+                frappe.get_all("Task", filters={"name": ("in", list(tasks))}, fields=["name", "project"], as_list=True)
+            ),
+        }
+
+    def _check_links(self, row: frappe._dict, valid_links: dict) -> bool:
+        if row.project not in valid_links["projects"]:
+            self._log_error(row, f"Project {row.project} not found")
+        elif row.task not in valid_links["tasks"]:
+            self._log_error(row, f"Task {row.task} not found")
+        elif valid_links["tasks"][row.task] and valid_links["tasks"][row.task] != row.project:
+            self._log_error(row, f"Task {row.task} does not belong to project {row.project}")
+        else:
+            return True
+        return False
+
+def read_time_log_rows(path: str, file_format: str | None = None) -> Iterator[dict]:
+    """Yield rows of a CSV or JSON Lines file one at a time"""
+    file_format = (file_format or os.path.splitext(path)[1].lstrip(".") or "csv").lower()
+    if file_format == "csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+    elif file_format in ("jsonl", "ndjson", "json"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        frappe.throw(f"Unsupported import format: {file_format}")
+
+def import_time_logs(
+    path: str,
+    period: str = "day",
+    file_format: str | None = None,
+    error_report: str | None = None,
+    restrict_to_employee: str | None = None,
+) -> dict:
+    importer = TimeLogImporter(period, error_report or f"{path}.errors.csv", restrict_to_employee)
+    return importer.run(read_time_log_rows(path, file_format))
+
+@frappe.whitelist()
+@instrument
+def bulk_import_time_logs(file_url: str, period: str = "day", file_format: str | None = None) -> dict:
+    """Queue an import of an uploaded CSV / JSON Lines file of time logs into draft Custom Timesheets"""
+    frappe.has_permission("Custom Timesheet", "create", throw=True)
+    file_doc = frappe.get_doc("File", {"file_url": file_url})
+    file_doc.check_permission("read")
+    if period not in IMPORT_PERIODS:
+        frappe.throw(f"Period must be one of {', '.join(IMPORT_PERIODS)}")
+
+    context = get_permission_context()
+    restrict_to_employee = None
+    if "System Manager" not in context.roles:
+        if not context.employee:
+            frappe.throw(f"No Employee record linked to user {frappe.session.user}")
+        restrict_to_employee = context.employee
+
+    frappe.enqueue(
+        "gnapi_customizations.customizations.timesheet_import.run_queued_import",
+        queue="long",
+        timeout=3600,
+        enqueue_after_commit=True,
+        file_name=file_doc.name,
+        period=period,
+        file_format=file_format,
+        restrict_to_employee=restrict_to_employee,
+    )
+    return {"queued": True}
+
+def run_queued_import(file_name: str, period: str, file_format: str | None, restrict_to_employee: str | None):
+    file_doc = frappe.get_doc("File", file_name)
+    report_name = f"timesheet-import-errors-{frappe.generate_hash(length=8)}.csv"
+    report_path = frappe.get_site_path("private", "files", report_name)
+    try:
+        summary = import_time_logs(
+            file_doc.get_full_path(),
+            period=period,
+            file_format=file_format,
+            error_report=report_path,
+            restrict_to_employee=restrict_to_employee,
+        )
+    except Exception:
+        frappe.log_error(f"Time log import of {file_doc.file_url} failed")
+        frappe.publish_realtime(IMPORT_DONE_EVENT, {"file_url": file_doc.file_url, "failed": True}, user=frappe.session.user)
+        raise
+
+    if summary["error_report"]:
+        report = frappe.get_doc({
+            "doctype": "File",
+            "file_name": report_name,
+            "file_url": f"/private/files/{report_name}",
+            "is_private": 1,
+        }).insert(ignore_permissions=True)
+        summary["error_report"] = report.file_url
+
+    frappe.db.commit()
+    frappe.publish_realtime(IMPORT_DONE_EVENT, {"file_url": file_doc.file_url, **summary}, user=frappe.session.user)
+    return summary
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import NamedTuple
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import get_datetime
+
+class TimeLogInterval(NamedTuple):
+    start: datetime
+    end: datetime
+    idx: int
+    # Parent timesheet for rows loaded from other sheets, None for rows of the sheet being saved
+    timesheet: str | None = None
+
+def row_hours(start: datetime, end: datetime) -> float:
+    hours = (end - start).total_seconds() / 3600.0
+    return round(hours if hours > 0 else 0.1, 2)
+
+def validate_time_logs(doc: Document) -> None:
+    """Parse every time log once: mandatory fields, ordering, taken_hours, total and overlaps"""
+    if not doc.get("time_logs"):
+        frappe.throw("At least one row is required in Custom Timesheet Details table")
+
+    intervals = []
+    total_hours = 0.0
+    for i, row in enumerate(doc.time_logs, 1):
+        # Check for empty, None, or whitespace-only values
+        missing_fields = []
+        if not str(row.get("project") or "").strip():
+            missing_fields.append("Project")
+        if not str(row.get("task") or "").strip():
+            missing_fields.append("Task")
+        if not row.get("start_date_time"):
+            missing_fields.append("Start Date and Time")
+        if not row.get("end_date_time"):
+            missing_fields.append("End Date and Time")
+
+        if missing_fields:
+            frappe.throw(f"Mandatory fields required in Custom Timesheet Details, Row {i}: {', '.join(missing_fields)}")
+
+        start_dt = get_datetime(row.start_date_time)
+        end_dt = get_datetime(row.end_date_time)
+        if end_dt <= start_dt:
+            frappe.throw(f"End Date and Time must be after Start Date and Time in Custom Timesheet Details row {i}")
+
+        row.taken_hours = row_hours(start_dt, end_dt)
+        total_hours += row.taken_hours
+        intervals.append(TimeLogInterval(start_dt, end_dt, i))
+
+    if not doc.flags.total_hours_from_header:
+        doc.total_hours = round(total_hours, 2)
+
+    _check_overlaps(doc, intervals)
+    doc.flags.time_logs_validated = True
+
+def _check_overlaps(doc: Document, intervals: list[TimeLogInterval]) -> None:
+    others = _get_other_intervals(doc, intervals) if doc.get("employee") else []
+
+    overlap = find_first_overlap(intervals, others)
+    if overlap:
+        throw_overlap(*overlap)
+
+def throw_overlap(own: TimeLogInterval, other: TimeLogInterval) -> None:
+    if other.timesheet:
+        frappe.throw(
+            f"Custom Timesheet Details row {own.idx} overlaps with row {other.idx} of timesheet "
+            f"{other.timesheet} ({other.start} - {other.end})"
+        )
+    frappe.throw(f"Custom Timesheet Details rows {other.idx} and {own.idx} overlap")
+
+def find_first_overlap(
+    own: list[TimeLogInterval], others: list[TimeLogInterval] | None = None
+) -> tuple[TimeLogInterval, TimeLogInterval] | None:
+    """Sort-and-sweep over both interval sets.
+
+    Intervals are visited by start time while remembering the interval with the
+    latest end seen so far, separately for this sheet and for the other sheets.
+    A row overlaps something earlier exactly when it starts before that latest end,
+    so one pass finds clashes within the sheet and against other sheets.
+    Returns (row of this sheet, interval it clashes with) or None.
+    """
+    events = sorted(
+        [(iv.start, 0, iv) for iv in own] + [(iv.start, 1, iv) for iv in (others or [])],
+        key=lambda e: (e[0], e[1]),
+    )
+
+    latest_own = latest_other = None
+    for _start, is_other, interval in events:
+        if is_other:
+            if latest_own and interval.start < latest_own.end:
+                return latest_own, interval
+            if not latest_other or interval.end > latest_other.end:
+                latest_other = interval
+        else:
+            if latest_own and interval.start < latest_own.end:
+                return interval, latest_own
+            if latest_other and interval.start < latest_other.end:
+                return interval, latest_other
+            if not latest_own or interval.end > latest_own.end:
+                latest_own = interval
+    return None
+
+def split_overlapping(
+    own: list[TimeLogInterval], others: list[TimeLogInterval] | None = None
+) -> tuple[list[TimeLogInterval], list[tuple[TimeLogInterval, TimeLogInterval]]]:
+    """Same sweep as find_first_overlap, but keeps going: rows that clash are dropped instead of failing.
+
+    Accepted rows never overlap each other, so only the last accepted row can clash
+    with an interval of another sheet that starts later.
+    Returns (accepted rows, [(rejected row, interval it clashes with)]).
+    """
+    events = sorted(
+        [(iv.start, 1, iv) for iv in own] + [(iv.start, 0, iv) for iv in (others or [])],
+        key=lambda e: (e[0], e[1]),
+    )
+
+    accepted, rejected = [], []
+    latest_other = None
+    for _start, is_own, interval in events:
+        if not is_own:
+            if accepted and interval.start < accepted[-1].end:
+                rejected.append((accepted.pop(), interval))
+            if not latest_other or interval.end > latest_other.end:
+                latest_other = interval
+        elif accepted and interval.start < accepted[-1].end:
+            rejected.append((interval, accepted[-1]))
+        elif latest_other and interval.start < latest_other.end:
+            rejected.append((interval, latest_other))
+        else:
+            accepted.append(interval)
+    return accepted, rejected
+
+def get_employee_intervals(
+    employees: list[str], min_start: datetime, max_end: datetime
+) -> dict[str, list[TimeLogInterval]]:
+    """Non-cancelled time logs of several employees within a range, in one query"""
+    if not employees:
+        return {}
+
+    rows = frappe.db.sql(
+        """
+        SELECT t.employee, d.parent, d.idx, d.start_date_time, d.end_date_time
+        FROM `tabCustom Timesheet Detail` d
+        INNER JOIN `tabCustom Timesheet` t ON t.name = d.parent
+        WHERE t.employee IN %(employees)s
+            AND t.docstatus < 2
+            AND d.parenttype = 'Custom Timesheet'
+            AND d.start_date_time < %(max_end)s
+            AND d.end_date_time > %(min_start)s
+        """,
+        {"employees": tuple(employees), "min_start": min_start, "max_end": max_end},
+        as_dict=True,
+    )
+    intervals = {}
+    for r in rows:
+        if r.start_date_time and r.end_date_time:
+            intervals.setdefault(r.employee, []).append(
+                TimeLogInterval(get_datetime(r.start_date_time), get_datetime(r.end_date_time), r.idx, r.parent)
+            )
+    return intervals
+
+def get_neighbour_intervals(
+    timesheet: str, employee: str | None, min_start: datetime, max_end: datetime, exclude_rows: set[str] | None = None
+) -> list[TimeLogInterval]:
+    """Time logs of a sheet and of the employee's other sheets that intersect a range.
+
+    These are the only rows an edited row within the range can overlap; rows of
+    `timesheet` itself come back with timesheet None, `exclude_rows` are skipped.
+    """
+    rows = frappe.db.sql(
+        """
+        SELECT d.name, d.parent, d.idx, d.start_date_time, d.end_date_time
+        FROM `tabCustom Timesheet Detail` d
+        INNER JOIN `tabCustom Timesheet` t ON t.name = d.parent
+        WHERE (t.name = %(name)s OR t.employee = %(employee)s)
+            AND t.docstatus < 2
+            AND d.parenttype = 'Custom Timesheet'
+            AND d.start_date_time < %(max_end)s
+            AND d.end_date_time > %(min_start)s
+        """,
+        {"name": timesheet, "employee": employee or "", "min_start": min_start, "max_end": max_end},
+        as_dict=True,
+    )
+    exclude_rows = exclude_rows or set()
+    return [
+        TimeLogInterval(
+            get_datetime(r.start_date_time),
+            get_datetime(r.end_date_time),
+            r.idx,
+            None if r.parent == timesheet else r.parent,
+        )
+        for r in rows
+        if r.start_date_time and r.end_date_time and r.name not in exclude_rows
+    ]
+
+def _get_other_intervals(doc: Document, intervals: list[TimeLogInterval]) -> list[TimeLogInterval]:
+    # One range query for the employee's other non-cancelled sheets around this sheet's span
+    rows = frappe.db.sql(
+        """
+        SELECT d.parent, d.idx, d.start_date_time, d.end_date_time
+        FROM `tabCustom Timesheet Detail` d
+        INNER JOIN `tabCustom Timesheet` t ON t.name = d.parent
+        WHERE t.employee = %(employee)s
+            AND t.name != %(name)s
+            AND t.docstatus < 2
+            AND d.parenttype = 'Custom Timesheet'
+            AND d.start_date_time < %(max_end)s
+            AND d.end_date_time > %(min_start)s
+        """,
+        {
+            "employee": doc.employee,
+            "name": doc.name or "",
+            "min_start": min(iv.start for iv in intervals),
+            "max_end": max(iv.end for iv in intervals),
+        },
+        as_dict=True,
+    )
+    return [
+        TimeLogInterval(get_datetime(r.start_date_time), get_datetime(r.end_date_time), r.idx, r.parent)
+        for r in rows
+        if r.start_date_time and r.end_date_time
+    ]
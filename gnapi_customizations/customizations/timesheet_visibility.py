@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now
+
+from gnapi_customizations.customizations.project_approvers import APPROVER_MAP_DOCTYPE
+from gnapi_customizations.customizations.timesheet_archive import archive_exists, archive_table, ensure_archive_tables
+from gnapi_customizations.instrumentation import instrument
+
+VISIBILITY_DOCTYPE = "Timesheet Visibility"
+# Approvers only see timesheets that have left Draft
+APPROVER_VISIBLE_STATUSES = ("Submitted", "Approved", "Rejected")
+# Timesheets recomputed per statement
+REFRESH_BATCH_SIZE = 500
+
+# Every (timesheet, user) pair custom_timesheet_permission_query used to derive per row:
+# the user linked to the timesheet's employee, and the approvers of any of its projects.
+# Names are an md5 of the pair and reason so re-inserting a row is a no-op.
+_VISIBILITY_SQL = f"""
+    INSERT IGNORE INTO {{visibility}}
+        (name, timesheet, user, reason, creation, modified, owner, modified_by)
+    SELECT MD5(CONCAT(t.name, '|', e.user_id, '|Employee')), t.name, e.user_id, 'Employee',
+        %(now)s, %(now)s, %(owner)s, %(owner)s
+    FROM {{timesheets}} t
+    INNER JOIN `tabEmployee` e ON e.name = t.employee
+    WHERE t.name IN %(names)s AND IFNULL(e.user_id, '') != ''
+    UNION ALL
+    SELECT DISTINCT MD5(CONCAT(t.name, '|', m.user, '|Approver')), t.name, m.user, 'Approver',
+        %(now)s, %(now)s, %(owner)s, %(owner)s
+    FROM {{timesheets}} t
+    INNER JOIN {{details}} d ON d.parent = t.name AND d.parenttype = 'Custom Timesheet'
+    INNER JOIN `tab{APPROVER_MAP_DOCTYPE}` m ON m.project = d.project
+    WHERE t.name IN %(names)s AND t.status IN %(statuses)s
+"""
+_HOT_TABLES = {
+    "visibility": f"`tab{VISIBILITY_DOCTYPE}`",
+    "timesheets": "`tabCustom Timesheet`",
+    "details": "`tabCustom Timesheet Detail`",
+}
+
+def refresh_timesheet_visibility(timesheets: list[str] | set[str]) -> None:
+    """Recompute the visibility rows of the given timesheets from their employee, status and projects"""
+    timesheets = sorted({t for t in timesheets if t})
+    for start in range(0, len(timesheets), REFRESH_BATCH_SIZE):
+        names = tuple(timesheets[start : start + REFRESH_BATCH_SIZE])
+        frappe.db.sql(f"DELETE FROM `tab{VISIBILITY_DOCTYPE}` WHERE timesheet IN %(names)s", {"names": names})
+        _insert_visibility(names)
+
+def refresh_project_visibility(projects: list[str] | set[str]) -> None:
+    """Recompute the timesheets with time logs on any of the given projects, after their approvers changed"""
+    projects = tuple({p for p in projects if p})
+    if not projects:
+        return
+    refresh_timesheet_visibility(
+        frappe.db.sql_list(
+            """
+            SELECT DISTINCT parent FROM `tabCustom Timesheet Detail`
+            WHERE project IN %(projects)s AND parenttype = 'Custom Timesheet'
+            """,
+            {"projects": projects},
+        )
+    )
+
+def rebuild_timesheet_visibility() -> int:
+    """Recompute the whole visibility table, and its archive when there is one; returns the number of hot rows"""
+    frappe.db.delete(VISIBILITY_DOCTYPE)
+    timesheets = frappe.get_all("Custom Timesheet", pluck="name", order_by="name")
+    for start in range(0, len(timesheets), REFRESH_BATCH_SIZE):
+        _insert_visibility(tuple(timesheets[start : start + REFRESH_BATCH_SIZE]))
+
+    if archive_exists():
+        ensure_archive_tables()
+        tables = {
+            "visibility": archive_table(VISIBILITY_DOCTYPE),
+            "timesheets": archive_table("Custom Timesheet"),
+            "details": archive_table("Custom Timesheet Detail"),
+        }
+        frappe.db.sql(f"DELETE FROM {tables['visibility']}")
+        archived = frappe.db.sql_list(f"SELECT name FROM {tables['timesheets']} ORDER BY name")
+        for start in range(0, len(archived), REFRESH_BATCH_SIZE):
+            _insert_visibility(tuple(archived[start : start + REFRESH_BATCH_SIZE]), tables)
+    return frappe.db.count(VISIBILITY_DOCTYPE)
+
+def _insert_visibility(names: tuple[str, ...], tables: dict[str, str] = _HOT_TABLES) -> None:
+    frappe.db.sql(
+        _VISIBILITY_SQL.format(**tables),
+        {
+            "names": names,
+            "now": now(),
+            "owner": frappe.session.user,
+            "statuses": APPROVER_VISIBLE_STATUSES,
+        },
+    )
+
+def visibility_condition(user: str, include_employee: bool = True) -> str:
+    """Permission query condition: timesheets visible to the user, one indexed lookup on (user, timesheet)"""
+    reason = "" if include_employee else " AND reason = 'Approver'"
+    return (
+        f"`tabCustom Timesheet`.`name` IN (SELECT timesheet FROM `tab{VISIBILITY_DOCTYPE}` "
+        f"WHERE user = {frappe.db.escape(user)}{reason})"
+    )
+
+# ---------------------------- doc events ----------------------------
+
+@instrument
+def on_custom_timesheet_change(doc: Document, method: str | None = None) -> None:
+    refresh_timesheet_visibility([doc.name])
+
+@instrument
+def on_custom_timesheet_trash(doc: Document, method: str | None = None) -> None:
+    frappe.db.delete(VISIBILITY_DOCTYPE, {"timesheet": doc.name})
+
+@instrument
+def on_employee_update(doc: Document, method: str | None = None) -> None:
+    # Employee rows follow Employee.user_id
+    if doc.has_value_changed("user_id"):
+        refresh_timesheet_visibility(frappe.get_all("Custom Timesheet", filters={"employee": doc.name}, pluck="name"))
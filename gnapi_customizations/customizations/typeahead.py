@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint
+
+from gnapi_customizations.instrumentation import instrument
+
+TYPEAHEAD_CACHE_KEY = "gnapi_typeahead"
+# source -> what is indexed: records of `doctype` matching `filters`, labelled by `label_field`
+TYPEAHEAD_SOURCES = {
+    "employee": {"doctype": "Employee", "filters": {"status": "Active"}, "label_field": "employee_name"},
+    "user": {"doctype": "User", "filters": {"enabled": 1, "user_type": "System User"}, "label_field": "full_name"},
+}
+DEFAULT_RESULT_LIMIT = 20
+MAX_RESULT_LIMIT = 50
+# Several terms of one record can match a prefix, so read a few more members than results
+_OVERFETCH = 4
+_INDEX_WRITE_BATCH = 1000
+
+# ---------------------------- index ----------------------------
+# Each source is a Redis sorted set whose members are "<lowercase term>\0<name>", all with
+# score 0, so ZRANGEBYLEX over ["prefix", "prefix\xff"] is an O(log n + k) prefix lookup.
+# A hash keeps name -> {label, terms} for rendering results and removing stale terms.
+
+def _keys(source: str) -> tuple[str, str, str]:
+    cache = frappe.cache()
+    base = f"{TYPEAHEAD_CACHE_KEY}|{source}"
+    return cache.make_key(base), cache.make_key(f"{base}|labels"), cache.make_key(f"{base}|built")
+
+def _terms(name: str, label: str | None) -> list[str]:
+    terms = {name.lower()}
+    if label:
+        label = label.lower()
+        terms.add(label)
+        terms.update(word for word in label.split() if word)
+    return sorted(terms)
+
+def rebuild_typeahead_index(source: str) -> int:
+    """Index every matching record of a source; returns the number of records"""
+    config = TYPEAHEAD_SOURCES[source]
+    index_key, labels_key, built_key = _keys(source)
+    records = frappe.get_all(
+        config["doctype"], filters=config["filters"], fields=["name", config["label_field"]], order_by="name"
+    )
+
+    cache = frappe.cache()
+    cache.delete(index_key, labels_key)
+    for start in range(0, len(records), _INDEX_WRITE_BATCH):
+        pipe = cache.pipeline()
+        for record in records[start : start + _INDEX_WRITE_BATCH]:
+            _add_entry(pipe, index_key, labels_key, record.name, record.get(config["label_field"]))
+        pipe.execute()
+    cache.set(built_key, 1)
+    return len(records)
+
+def _add_entry(pipe, index_key: str, labels_key: str, name: str, label: str | None) -> None:
+    terms = _terms(name, label)
+    pipe.zadd(index_key, {f"{term}\0{name}": 0 for term in terms})
+    pipe.hset(labels_key, name, json.dumps({"label": label or name, "terms": terms}))
+
+def clear_typeahead_indexes() -> None:
+    # Registered as a clear_cache hook; the next search rebuilds the index
+    frappe.cache().delete(*(key for source in TYPEAHEAD_SOURCES for key in _keys(source)))
+
+def update_typeahead_entry(source: str, name: str, label: str | None, active: bool) -> None:
+    """Replace one record's terms; a no-op until the index has been built"""
+    index_key, labels_key, built_key = _keys(source)
+    cache = frappe.cache()
+    if not cache.exists(built_key):
+        return
+
+    previous = cache.pipeline().hget(labels_key, name).execute()[0]
+    pipe = cache.pipeline()
+    if previous:
+        pipe.zrem(index_key, *(f"{term}\0{name}" for term in json.loads(previous)["terms"]))
+        pipe.hdel(labels_key, name)
+    if active:
+        _add_entry(pipe, index_key, labels_key, name, label)
+    pipe.execute()
+
+def search_typeahead(source: str, txt: str | None, limit: int = DEFAULT_RESULT_LIMIT) -> list[dict]:
+    """Up to `limit` records whose name, label or a word of the label starts with `txt`"""
+    if source not in TYPEAHEAD_SOURCES:
+        frappe.throw(f"Unknown typeahead source: {source}")
+    limit = min(cint(limit) or DEFAULT_RESULT_LIMIT, MAX_RESULT_LIMIT)
+
+    index_key, labels_key, built_key = _keys(source)
+    cache = frappe.cache()
+    if not cache.exists(built_key):
+        rebuild_typeahead_index(source)
+
+    prefix = (txt or "").strip().lower().encode()
+    members = cache.zrangebylex(
+        index_key,
+        b"[" + prefix if prefix else b"-",
+        b"[" + prefix + b"\xff" if prefix else b"+",
+        start=0,
+        num=limit * _OVERFETCH,
+    )
+    names = []
+    for member in members:
+        name = member.decode().split("\0", 1)[1]
+        if name not in names:
+            names.append(name)
+            if len(names) == limit:
+                break
+    if not names:
+        return []
+
+    labels = cache.pipeline().hmget(labels_key, names).execute()[0]
+    return [
+        {"value": name, "description": json.loads(label)["label"] if label else name}
+        for name, label in zip(names, labels)
+    ]
+
+# ---------------------------- endpoints ----------------------------
+
+@frappe.whitelist()
+@instrument
+def search_users(txt: str | None = None, limit: int = DEFAULT_RESULT_LIMIT) -> list[dict]:
+    frappe.has_permission("User", "select", throw=True)
+    return search_typeahead("user", txt, limit)
+
+@frappe.whitelist()
+@frappe.validate_and_sanitize_search_inputs
+@instrument
+def employee_query(doctype, txt, searchfield, start, page_len, filters):
+    """Link field query (set_query / get_query) backed by the employee prefix index"""
+    frappe.has_permission("Employee", "select", throw=True)
+    return [(r["value"], r["description"]) for r in search_typeahead("employee", txt, page_len)]
+
+# ---------------------------- doc events ----------------------------
+
+@instrument
+def on_employee_change(doc: Document, method: str | None = None) -> None:
+    active = method != "on_trash" and doc.status == "Active"
+    update_typeahead_entry("employee", doc.name, doc.employee_name, active)
+
+@instrument
+def on_user_change(doc: Document, method: str | None = None) -> None:
+    active = method != "on_trash" and bool(doc.enabled) and doc.user_type == "System User"
+    update_typeahead_entry("user", doc.name, doc.full_name, active)
@@ -33,8 +33,12 @@ fixtures = [
 
 # include js, css files in header of desk.html
 # app_include_css = "/assets/gnapi_customizations/css/gnapi_customizations.css"
-app_include_js = [
-    "/assets/gnapi_customizations/js/timesheet_override_direct.js?v=3"
+# Built by `bench build` into a minified asset whose URL carries a content hash
+app_include_js = "gnapi_desk.bundle.js"
+
+# The stock Timesheet is replaced by Custom Timesheet; the desk bundle reroutes in-app navigation
+website_redirects = [
+    {"source": r"/app/timesheet(/.*)?", "target": r"/app/custom-timesheet\1"}
 ]
 
 # include js, css files in header of web template
@@ -59,6 +63,7 @@ doctype_js = {
 }
 
 doctype_list_js = {
+    "Custom Timesheet": "public/js/custom_timesheet_list.js",
     "Timesheet Approval": "public/js/my_approvals_page.js"
 }
 # doctype_tree_js = {"doctype" : "public/js/doctype_tree.js"}
@@ -99,7 +104,7 @@ doctype_list_js = {
 # ------------
 
 # before_install = "gnapi_customizations.install.before_install"
-# after_install = "gnapi_customizations.install.after_install"
+after_install = "gnapi_customizations.install.after_install"
 
 # Uninstallation
 # ------------
@@ -155,15 +160,84 @@ doctype_list_js = {
 
 doc_events = {
     "Custom Timesheet": {
+        "onload": "gnapi_customizations.customizations.form_bootstrap.on_custom_timesheet_onload",
         "validate": "gnapi_customizations.customizations.custom_timesheet_events.on_custom_timesheet_validate",
-        "before_save": "gnapi_customizations.customizations.custom_timesheet_events.on_custom_timesheet_before_save",
-        "after_submit": "gnapi_customizations.customizations.custom_timesheet_events.on_custom_timesheet_after_submit"
+        "before_save": [
+            "gnapi_customizations.customizations.custom_timesheet_events.on_custom_timesheet_before_save",
+            "gnapi_customizations.customizations.hours_rollup.capture_rollup_baseline"
+        ],
+        "before_submit": "gnapi_customizations.customizations.hours_rollup.capture_rollup_baseline",
+        "before_cancel": "gnapi_customizations.customizations.hours_rollup.capture_rollup_baseline",
+        "before_update_after_submit": "gnapi_customizations.customizations.hours_rollup.capture_rollup_baseline",
+        "on_update": [
+            "gnapi_customizations.customizations.hours_rollup.apply_rollup_change",
+            "gnapi_customizations.customizations.timesheet_visibility.on_custom_timesheet_change"
+        ],
+        "on_update_after_submit": [
+            "gnapi_customizations.customizations.hours_rollup.apply_rollup_change",
+            "gnapi_customizations.customizations.timesheet_visibility.on_custom_timesheet_change"
+        ],
+        "on_cancel": [
+            "gnapi_customizations.customizations.hours_rollup.apply_rollup_change",
+            "gnapi_customizations.customizations.timesheet_visibility.on_custom_timesheet_change"
+        ],
+        "on_submit": "gnapi_customizations.customizations.custom_timesheet_events.on_custom_timesheet_after_submit",
+        "on_trash": [
+            "gnapi_customizations.customizations.hours_rollup.remove_from_rollup",
+            "gnapi_customizations.customizations.timesheet_visibility.on_custom_timesheet_trash"
+        ]
+    },
+    "Timesheet Approval": {
+        "validate": "gnapi_customizations.customizations.timesheet_approval_events.on_timesheet_approval_validate",
+        "before_save": "gnapi_customizations.customizations.timesheet_approval_events.on_timesheet_approval_before_save"
     },
     "Custom Timesheet Detail": {
         "before_save": "gnapi_customizations.customizations.custom_timesheet_events.on_custom_timesheet_detail_before_save"
+    },
+    "Project": {
+        "on_update": "gnapi_customizations.customizations.approver_routing.on_project_update",
+        "on_trash": "gnapi_customizations.customizations.approver_routing.on_project_trash"
+    },
+    "Customer": {
+        "on_update": "gnapi_customizations.customizations.approver_routing.on_customer_update"
+    },
+    "Approver": {
+        "on_update": "gnapi_customizations.customizations.approver_routing.on_approver_group_change",
+        "after_delete": "gnapi_customizations.customizations.approver_routing.on_approver_group_change"
+    },
+    "Employee": {
+        "on_update": [
+            "gnapi_customizations.customizations.permission_context.on_employee_update",
+            "gnapi_customizations.customizations.approver_routing.on_employee_update",
+            "gnapi_customizations.customizations.timesheet_visibility.on_employee_update",
+            "gnapi_customizations.customizations.typeahead.on_employee_change"
+        ],
+        "on_trash": [
+            "gnapi_customizations.customizations.permission_context.on_employee_trash",
+            "gnapi_customizations.customizations.typeahead.on_employee_change"
+        ]
+    },
+    "User": {
+        "after_insert": "gnapi_customizations.customizations.approver_routing.on_user_insert",
+        "after_rename": "gnapi_customizations.customizations.approver_routing.on_user_rename",
+        "on_update": [
+            "gnapi_customizations.customizations.permission_context.on_user_update",
+            "gnapi_customizations.customizations.typeahead.on_user_change"
+        ],
+        "on_trash": "gnapi_customizations.customizations.typeahead.on_user_change"
+    },
+    "File": {
+        "on_update": "gnapi_customizations.customizations.form_bootstrap.on_file_change",
+        "on_trash": "gnapi_customizations.customizations.form_bootstrap.on_file_change"
     }
 }
 
+# Cached permission contexts and typeahead indexes are derived data, reset them with `bench clear-cache`
+clear_cache = [
+    "gnapi_customizations.customizations.permission_context.clear_all_permission_contexts",
+    "gnapi_customizations.customizations.typeahead.clear_typeahead_indexes"
+]
+
 # Temporarily disabled to fix hanging API calls
 # permission_query_conditions = {
 #     "Custom Timesheet": "gnapi_customizations.customizations.custom_timesheet_events.custom_timesheet_permission_query"
@@ -176,23 +250,22 @@ doc_events = {
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-# 	"all": [
-# 		"gnapi_customizations.tasks.all"
-# 	],
-# 	"daily": [
-# 		"gnapi_customizations.tasks.daily"
-# 	],
-# 	"hourly": [
-# 		"gnapi_customizations.tasks.hourly"
-# 	],
-# 	"weekly": [
-# 		"gnapi_customizations.tasks.weekly"
-# 	],
-# 	"monthly": [
-# 		"gnapi_customizations.tasks.monthly"
-# 	],
-# }
+scheduler_events = {
+    "cron": {
+        "*/5 * * * *": [
+            "gnapi_customizations.customizations.approval_notifications.send_approval_digests"
+        ]
+    },
+    "hourly": [
+        "gnapi_customizations.customizations.approval_sla.escalate_overdue_approvals"
+    ],
+    "daily": [
+        "gnapi_customizations.customizations.chunked_upload.remove_stale_uploads"
+    ],
+    "daily_long": [
+        "gnapi_customizations.customizations.timesheet_archive.archive_closed_timesheets"
+    ]
+}
 
 # Testing
 # -------
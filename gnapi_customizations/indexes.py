@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import frappe
+
+# (doctype, columns, index name, unique) for every composite index the app relies on.
+# Patches and after_install both go through ensure_indexes so the definitions live in one place.
+APP_INDEXES = [
+    ("Project Approver Map", ["project", "user"], "unique_project_user", True),
+    ("Project Approver Map", ["user", "project"], "user_project_index", False),
+    ("Project Approver Entry", ["project", "entry", "source"], "unique_project_entry_source", True),
+    # Which projects name a user or group, for membership and user_id changes
+    ("Project Approver Entry", ["entry", "project"], "entry_project_index", False),
+    (
+        "Timesheet Approval",
+        ["approver", "approval_status", "creation", "name"],
+        "approver_status_creation_index",
+        False,
+    ),
+    # Covered by the index above whenever it exists, listed so the hot path is explicit
+    ("Timesheet Approval", ["approver", "approval_status"], "approver_status_index", False),
+    ("Timesheet Approval", ["timesheet", "approver"], "timesheet_approver_index", False),
+    ("Custom Timesheet Detail", ["parent", "project"], "parent_project_index", False),
+    # Date-bounded exports range-scan this in order instead of sorting the join
+    ("Custom Timesheet Detail", ["start_date_time"], "start_date_time_index", False),
+    ("Custom Timesheet", ["employee", "status"], "employee_status_index", False),
+    # Archival picks decided timesheets oldest first
+    ("Custom Timesheet", ["approval_status", "approval_date"], "approval_status_date_index", False),
+    ("Employee", ["user_id"], "user_id_index", False),
+    ("Timesheet Visibility", ["timesheet", "user", "reason"], "unique_timesheet_user_reason", True),
+    # The permission query's semi-join: every timesheet a user may see, read from the index alone
+    ("Timesheet Visibility", ["user", "timesheet", "reason"], "user_timesheet_index", False),
+    ("Timesheet Hours Rollup", ["log_date", "project"], "log_date_project_index", False),
+    ("Timesheet Hours Rollup", ["employee", "log_date"], "employee_log_date_index", False),
+]
+
+def ensure_indexes(doctypes: list[str] | None = None) -> None:
+    """Create missing app indexes; safe to run repeatedly"""
+    for doctype, columns, index_name, unique in APP_INDEXES:
+        if doctypes and doctype not in doctypes:
+            continue
+        if not frappe.db.table_exists(doctype):
+            continue
+        if unique:
+            frappe.db.add_unique(doctype, columns, constraint_name=index_name)
+        elif not has_covering_index(doctype, columns):
+            frappe.db.add_index(doctype, columns, index_name=index_name)
+
+def has_covering_index(doctype: str, columns: list[str]) -> bool:
+    """True if some index already starts with exactly these columns, in this order"""
+    indexes = {}
+    for row in frappe.db.sql(f"SHOW INDEX FROM `tab{doctype}`", as_dict=True):
+        indexes.setdefault(row.Key_name, {})[row.Seq_in_index] = row.Column_name
+
+    for index_columns in indexes.values():
+        leading = [index_columns.get(i + 1) for i in range(len(columns))]
+        if leading == list(columns):
+            return True
+    return False
@@ -0,0 +1,7 @@
+from gnapi_customizations.customizations.timesheet_archive import ensure_archive_tables
+from gnapi_customizations.indexes import ensure_indexes
+
+def after_install():
+    # Patches are not run on a fresh install, so create the app indexes and archive tables here as well
+    ensure_indexes()
+    ensure_archive_tables()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import functools
+import random
+import time
+
+import frappe
+from werkzeug.wrappers import Response
+
+# Site config: "gnapi_instrumentation": 1 enables it, "gnapi_instrumentation_sample_rate": 0.1 records 10% of calls
+CONFIG_KEY = "gnapi_instrumentation"
+SAMPLE_RATE_KEY = "gnapi_instrumentation_sample_rate"
+METRICS_KEY_PREFIX = "gnapi_metrics"
+METHODS_KEY = "gnapi_metrics_methods"
+
+# metric -> upper bounds of the histogram buckets
+HISTOGRAMS = {
+    "duration_seconds": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    "sql_queries": (1, 2, 5, 10, 25, 50, 100, 250, 1000),
+    "sql_duration_seconds": (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+}
+HELP = {
+    "duration_seconds": "Wall time per call",
+    "sql_queries": "SQL queries per call",
+    "sql_duration_seconds": "Time spent in frappe.db.sql per call",
+}
+
+def instrument(fn):
+    """Record wall time, SQL count and SQL time of every sampled call to fn.
+
+    Put it under @frappe.whitelist() so the whitelisted object is the instrumented one.
+    When disabled in site config the only overhead is one dict lookup per call.
+    """
+    method = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _should_sample():
+            return fn(*args, **kwargs)
+
+        frame = [0, 0.0]
+        frames = _start_sql_tracking()
+        frames.append(frame)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            frames.pop()
+            if not frames:
+                _stop_sql_tracking()
+            _record(method, {"duration_seconds": elapsed, "sql_queries": frame[0], "sql_duration_seconds": frame[1]})
+
+    return wrapper
+
+def _should_sample() -> bool:
+    conf = getattr(frappe.local, "conf", None)
+    if not conf or not conf.get(CONFIG_KEY):
+        return False
+    rate = conf.get(SAMPLE_RATE_KEY, 1)
+    return rate >= 1 or random.random() < rate
+
+def _start_sql_tracking() -> list:
+    """Wrap frappe.db.sql once for the outermost instrumented call; nested calls share the wrapper"""
+    frames = getattr(frappe.local, "gnapi_sql_frames", None)
+    if frames:
+        return frames
+
+    frames = frappe.local.gnapi_sql_frames = []
+    db = frappe.db
+    original = db.sql
+
+    def tracked_sql(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            for frame in frames:
+                frame[0] += 1
+                frame[1] += elapsed
+
+    db.sql = tracked_sql
+    frappe.local.gnapi_sql_restore = (db, original)
+    return frames
+
+def _stop_sql_tracking() -> None:
+    db, original = frappe.local.gnapi_sql_restore
+    db.sql = original
+    frappe.local.gnapi_sql_frames = None
+    frappe.local.gnapi_sql_restore = None
+
+def _bucket(metric: str, value: float) -> str:
+    for bound in HISTOGRAMS[metric]:
+        if value <= bound:
+            return str(bound)
+    return "+Inf"
+
+def _record(method: str, values: dict) -> None:
+    # Metrics must never break the call they measure
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(f"{METRICS_KEY_PREFIX}|{method}")
+        pipe = cache.pipeline()
+        pipe.sadd(cache.make_key(METHODS_KEY), method)
+        for metric, value in values.items():
+            pipe.hincrby(key, f"{metric}|bucket|{_bucket(metric, value)}", 1)
+            pipe.hincrbyfloat(key, f"{metric}|sum", value)
+        pipe.hincrby(key, "count", 1)
+        pipe.execute()
+    except Exception:
+        pass
+
+def get_metrics() -> dict[str, dict[str, float]]:
+    """Raw histogram fields per instrumented method"""
+    cache = frappe.cache()
+    methods = sorted(m.decode() if isinstance(m, bytes) else m for m in cache.smembers(cache.make_key(METHODS_KEY)))
+    metrics = {}
+    for method in methods:
+        raw = cache.hgetall(cache.make_key(f"{METRICS_KEY_PREFIX}|{method}"))
+        metrics[method] = {
+            (k.decode() if isinstance(k, bytes) else k): float(v) for k, v in raw.items()
+        }
+    return metrics
+
+def render_prometheus(metrics: dict[str, dict[str, float]]) -> str:
+    lines = []
+    for metric, bounds in HISTOGRAMS.items():
+        name = f"gnapi_handler_{metric}"
+        lines.append(f"# HELP {name} {HELP[metric]}")
+        lines.append(f"# TYPE {name} histogram")
+        for method, fields in metrics.items():
+            label = method.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound in (*bounds, "+Inf"):
+                cumulative += fields.get(f"{metric}|bucket|{bound}", 0)
+                lines.append(f'{name}_bucket{{method="{label}",le="{bound}"}} {int(cumulative)}')
+            lines.append(f'{name}_sum{{method="{label}"}} {fields.get(f"{metric}|sum", 0)}')
+            lines.append(f'{name}_count{{method="{label}"}} {int(fields.get("count", 0))}')
+    return "\n".join(lines) + "\n"
+
+@frappe.whitelist()
+def metrics():
+    """Instrumentation histograms in Prometheus text format"""
+    frappe.only_for("System Manager")
+    return Response(render_prometheus(get_metrics()), mimetype="text/plain; version=0.0.4")
+
+@frappe.whitelist()
+def reset_metrics():
+    """Drop all recorded histograms"""
+    frappe.only_for("System Manager")
+    cache = frappe.cache()
+    for method in get_metrics():
+        cache.delete(cache.make_key(f"{METRICS_KEY_PREFIX}|{method}"))
+    cache.delete(cache.make_key(METHODS_KEY))
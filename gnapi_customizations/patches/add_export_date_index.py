@@ -0,0 +1,8 @@
+from gnapi_customizations.customizations.timesheet_archive import archive_exists, ensure_archive_tables
+from gnapi_customizations.indexes import ensure_indexes
+
+def execute():
+    """Index time logs by start_date_time for date-bounded exports, on the hot and archive tables"""
+    ensure_indexes(["Custom Timesheet Detail"])
+    if archive_exists():
+        ensure_archive_tables()
@@ -0,0 +1,5 @@
+from gnapi_customizations.indexes import ensure_indexes
+
+def execute():
+    """Composite indexes for the permission, approval and pending-list queries"""
+    ensure_indexes()
@@ -0,0 +1,5 @@
+from gnapi_customizations.indexes import ensure_indexes
+
+def execute():
+    """Index backing the keyset-paginated pending approvals listing"""
+    ensure_indexes(["Timesheet Approval"])
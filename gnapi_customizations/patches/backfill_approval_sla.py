@@ -0,0 +1,19 @@
+import frappe
+from frappe.utils.fixtures import sync_fixtures
+
+from gnapi_customizations.customizations.approval_sla import get_sla_hours
+
+def execute():
+    """Give already pending approvals an SLA deadline counted from their creation"""
+    # Fixtures are synced after patches, so the new columns may not exist yet
+    if not frappe.db.has_column("Timesheet Approval", "sla_due_at"):
+        sync_fixtures("gnapi_customizations")
+
+    frappe.db.sql(
+        """
+        UPDATE `tabTimesheet Approval`
+        SET sla_due_at = creation + INTERVAL %(minutes)s MINUTE
+        WHERE approval_status = 'Pending' AND sla_due_at IS NULL
+        """,
+        {"minutes": int(get_sla_hours() * 60)},
+    )
@@ -0,0 +1,20 @@
+import frappe
+
+from gnapi_customizations.customizations.project_approvers import parse_approver_list, set_project_approvers
+from gnapi_customizations.indexes import ensure_indexes
+
+def execute():
+    """Build the Project Approver Map from the existing comma-separated Project.approver values"""
+    frappe.reload_doc("gnapi_customizations", "doctype", "project_approver_map")
+    ensure_indexes(["Project Approver Map"])
+
+    if not frappe.db.has_column("Project", "approver"):
+        return
+
+    projects = frappe.get_all(
+        "Project", filters={"approver": ("is", "set")}, fields=["name", "approver"]
+    )
+    for project in projects:
+        set_project_approvers(project.name, parse_approver_list(project.approver))
+
+    frappe.cache().delete_value("gnapi_permission_context")
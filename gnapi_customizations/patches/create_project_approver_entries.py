@@ -0,0 +1,10 @@
+import frappe
+
+from gnapi_customizations.customizations.approver_routing import rebuild_approver_routes
+from gnapi_customizations.indexes import ensure_indexes
+
+def execute():
+    """Record every project's approver list entries so group and user changes find their projects by index"""
+    frappe.reload_doc("gnapi_customizations", "doctype", "project_approver_entry")
+    ensure_indexes(["Project Approver Entry"])
+    rebuild_approver_routes()
@@ -0,0 +1,7 @@
+from gnapi_customizations.customizations.timesheet_archive import ensure_archive_tables
+from gnapi_customizations.indexes import ensure_indexes
+
+def execute():
+    """Archive tables for closed timesheets, and the index the archival job selects them by"""
+    ensure_indexes(["Custom Timesheet"])
+    ensure_archive_tables()
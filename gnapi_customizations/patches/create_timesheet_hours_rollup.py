@@ -0,0 +1,10 @@
+import frappe
+
+from gnapi_customizations.customizations.hours_rollup import rebuild_hours_rollup
+from gnapi_customizations.indexes import ensure_indexes
+
+def execute():
+    """Create the hours rollup and backfill it from existing timesheets"""
+    frappe.reload_doc("gnapi_customizations", "doctype", "timesheet_hours_rollup")
+    ensure_indexes(["Timesheet Hours Rollup"])
+    rebuild_hours_rollup()
@@ -0,0 +1,10 @@
+import frappe
+
+from gnapi_customizations.customizations.timesheet_visibility import rebuild_timesheet_visibility
+from gnapi_customizations.indexes import ensure_indexes
+
+def execute():
+    """Create the materialized timesheet visibility table and backfill it from existing timesheets"""
+    frappe.reload_doc("gnapi_customizations", "doctype", "timesheet_visibility")
+    ensure_indexes(["Timesheet Visibility"])
+    rebuild_timesheet_visibility()
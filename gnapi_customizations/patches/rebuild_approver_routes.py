@@ -0,0 +1,8 @@
+import frappe
+
+from gnapi_customizations.customizations.approver_routing import rebuild_approver_routes
+
+def execute():
+    """Fill the routing columns and resolve Approver groups and Customer approvers for every project"""
+    frappe.reload_doc("gnapi_customizations", "doctype", "project_approver_map")
+    rebuild_approver_routes()
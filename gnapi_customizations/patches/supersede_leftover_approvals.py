@@ -0,0 +1,17 @@
+import frappe
+
+from gnapi_customizations.customizations.pending_approvals import PENDING_COUNT_CACHE_KEY, SUPERSEDED_STATUS
+
+def execute():
+    """Close approval rows left Pending on timesheets another approver already decided"""
+    frappe.db.sql(
+        """
+        UPDATE `tabTimesheet Approval` a
+        INNER JOIN `tabCustom Timesheet` t ON t.name = a.timesheet
+        SET a.approval_status = %(status)s, a.approval_date = t.approval_date,
+            a.modified = IFNULL(t.approval_date, a.modified), a.modified_by = IFNULL(t.approved_by, a.modified_by)
+        WHERE a.approval_status = 'Pending' AND t.approval_status IN ('Approved', 'Rejected')
+        """,
+        {"status": SUPERSEDED_STATUS},
+    )
+    frappe.cache().delete_keys(PENDING_COUNT_CACHE_KEY)
@@ -3,16 +3,19 @@ frappe.ui.form.on("Custom Timesheet", {
 	refresh: function (frm) {
 		enhanceAttachmentField(frm);
 		addCustomAttachmentArea(frm);
+		displayAttachments(frm);
 		restrictStatusForEmployee(frm);
 		addApprovalButtons(frm);
 		enhanceTimesheetDetailsTable(frm);
 		updateSaveButtonState(frm);
 		addDebugButton(frm);
+		snapshotTimeLogs(frm);
 	},
 
 	onload: function (frm) {
 		restrictStatusForEmployee(frm);
 		enhanceTimesheetDetailsTable(frm);
+		listenForApprovalUpdates(frm);
 	},
 
 	status: function (frm) {
@@ -21,6 +24,7 @@ frappe.ui.form.on("Custom Timesheet", {
 
 	before_save: function (frm) {
 		validateCustomTimesheetDetails(frm);
+		if (frappe.validated) saveTimeLogDelta(frm);
 	},
 
 	time_logs: {
@@ -565,91 +569,190 @@ function addCustomAttachmentArea(frm) {
 			if (eventName === "drop") handleFiles(e.dataTransfer.files, frm);
 		});
 	});
-
-	displayAttachments(frm);
 }
 
+// Files go up in chunks to private files; after a dropped connection, dropping the same
+// file again resumes with the chunks the server is still missing
+const UPLOAD_METHOD = "/api/method/gnapi_customizations.customizations.chunked_upload.";
+const UPLOAD_CHUNK_RETRIES = 5;
+
 function handleFiles(files, frm) {
+	if (frm.is_new()) {
+		frappe.msgprint(__("Save the timesheet before attaching files"));
+		return;
+	}
+
 	Array.from(files).forEach((file) => {
-		frappe.upload_file({
-			file: file,
-			args: {
-				doctype: frm.doctype,
-				docname: frm.docname,
-				is_private: 0,
-			},
-			callback: function (r) {
-				if (r.message) {
-					frappe.show_alert({
-						message: __("File {0} uploaded", [file.name]),
-						indicator: "green",
-					});
-					displayAttachments(frm);
-				}
-			},
-			error: function () {
+		uploadInChunks(frm, file)
+			.then(() => {
+				frappe.show_alert({
+					message: __("File {0} uploaded", [file.name]),
+					indicator: "green",
+				});
+				refreshFormBootstrap(frm);
+			})
+			.catch(() => {
 				frappe.show_alert({
-					message: __("Failed to upload {0}", [file.name]),
+					message: __("Failed to upload {0}, add it again to resume", [file.name]),
 					indicator: "red",
 				});
-			},
+			})
+			.finally(() => frappe.hide_progress());
+	});
+}
+
+async function uploadInChunks(frm, file) {
+	const key = `gnapi_upload|${frm.doc.name}|${file.name}|${file.size}|${file.lastModified}`;
+	let status = null;
+
+	const uploadId = localStorage.getItem(key);
+	if (uploadId) {
+		status = await callUploadMethod("get_upload_status", { upload_id: uploadId }).catch(() => null);
+		if (status) status.upload_id = uploadId;
+	}
+	if (!status) {
+		status = await callUploadMethod("start_upload", {
+			doctype: frm.doctype,
+			docname: frm.doc.name,
+			file_name: file.name,
+			file_size: file.size,
 		});
+		localStorage.setItem(key, status.upload_id);
+	}
+
+	let done = status.total_chunks - status.missing.length;
+	for (const index of status.missing) {
+		const start = index * status.chunk_size;
+		const form = new FormData();
+		form.append("upload_id", status.upload_id);
+		form.append("index", index);
+		form.append("chunk", file.slice(start, start + status.chunk_size), file.name);
+		await withRetries(() => callUploadMethod("upload_chunk", form));
+
+		done += 1;
+		frappe.show_progress(__("Uploading {0}", [file.name]), done, status.total_chunks);
+	}
+
+	const result = await callUploadMethod("finish_upload", { upload_id: status.upload_id });
+	localStorage.removeItem(key);
+	return result;
+}
+
+function callUploadMethod(method, data) {
+	let body = data;
+	if (!(data instanceof FormData)) {
+		body = new FormData();
+		Object.keys(data).forEach((field) => body.append(field, data[field]));
+	}
+
+	return fetch(UPLOAD_METHOD + method, {
+		method: "POST",
+		headers: { "X-Frappe-CSRF-Token": frappe.csrf_token, Accept: "application/json" },
+		body: body,
+	}).then((response) => {
+		if (!response.ok) throw new Error(`${method} failed with status ${response.status}`);
+		return response.json().then((r) => r.message);
 	});
 }
 
-function displayAttachments(frm) {
-	const container = $("#attachment-list-container");
-	container.empty();
-	if (!frm.docname) return;
+async function withRetries(fn) {
+	for (let attempt = 1; ; attempt++) {
+		try {
+			return await fn();
+		} catch (e) {
+			if (attempt >= UPLOAD_CHUNK_RETRIES) throw e;
+			await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** attempt));
+		}
+	}
+}
+
+// Approver flag, allowed actions and attachments come with the doc (__onload.gnapi_form),
+// so the form renders without extra round trips
+function getFormBootstrap(frm) {
+	return (frm.doc.__onload && frm.doc.__onload.gnapi_form) || {
+		is_approver: false,
+		allowed_actions: [],
+		attachments: [],
+	};
+}
+
+function refreshFormBootstrap(frm) {
+	if (frm.is_new()) return;
 
 	frappe.call({
-		method: "frappe.client.get_list",
-		args: {
-			doctype: "File",
-			filters: { attached_to_doctype: frm.doctype, attached_to_name: frm.docname },
-			fields: ["name", "file_name", "file_url", "file_size"],
-		},
+		method: "gnapi_customizations.customizations.form_bootstrap.get_timesheet_form_bootstrap",
+		args: { timesheet: frm.doc.name },
 		callback: function (r) {
 			if (!r.message) return;
-			r.message.forEach((file) => {
-				const fileSize = formatFileSize(file.file_size || 0);
-				const fileExt = getFileExtension(file.file_name);
-				const fileIcon = getFileIcon(fileExt);
-
-				const item = $(`
-                    <div class="attachment-item">
-                        <div class="attachment-item-icon">${fileIcon}</div>
-                        <div class="attachment-item-info">
-                            <div class="attachment-item-name">${file.file_name}</div>
-                            <div class="attachment-item-size">${fileSize}</div>
-                        </div>
-                        <div class="attachment-item-actions">
-                            <button class="attachment-action-btn download" data-url="${file.file_url}"><i class="fa fa-download"></i> Download</button>
-                            <button class="attachment-action-btn remove" data-name="${file.name}"><i class="fa fa-trash"></i> Remove</button>
-                        </div>
+			frm.doc.__onload = Object.assign(frm.doc.__onload || {}, { gnapi_form: r.message });
+			displayAttachments(frm);
+		},
+	});
+}
+
+function displayAttachments(frm) {
+	const container = $("#attachment-list-container");
+	container.empty();
+	if (frm.is_new()) return;
+
+	const bootstrap = getFormBootstrap(frm);
+	renderAttachments(frm, container, bootstrap.attachments, bootstrap.attachments_next_cursor);
+}
+
+// Attachments come a page at a time; "Load more" fetches the next page after the last shown
+function renderAttachments(frm, container, files, nextCursor) {
+	container.find(".attachment-load-more").remove();
+
+	files.forEach((file) => {
+		const fileSize = formatFileSize(file.file_size || 0);
+		const fileExt = getFileExtension(file.file_name);
+		const fileIcon = getFileIcon(fileExt);
+
+		const item = $(`
+                <div class="attachment-item">
+                    <div class="attachment-item-icon">${fileIcon}</div>
+                    <div class="attachment-item-info">
+                        <div class="attachment-item-name">${file.file_name}</div>
+                        <div class="attachment-item-size">${fileSize}</div>
+                    </div>
+                    <div class="attachment-item-actions">
+                        <button class="attachment-action-btn download" data-url="${file.file_url}"><i class="fa fa-download"></i> Download</button>
+                        <button class="attachment-action-btn remove" data-name="${file.name}"><i class="fa fa-trash"></i> Remove</button>
                     </div>
-                `);
+                </div>
+            `);
 
-				item.find(".download").on("click", function () {
-					window.open($(this).data("url"), "_blank");
-				});
-				item.find(".remove").on("click", function () {
-					frappe.confirm(
-						__("Are you sure you want to remove this attachment?"),
-						function () {
-							frappe.call({
-								method: "frappe.client.delete",
-								args: { doctype: "File", name: $(this).data("name") },
-								callback: () => displayAttachments(frm),
-							});
-						}
-					);
+		item.find(".download").on("click", function () {
+			window.open($(this).data("url"), "_blank");
+		});
+		item.find(".remove").on("click", function () {
+			frappe.confirm(__("Are you sure you want to remove this attachment?"), function () {
+				frappe.call({
+					method: "frappe.client.delete",
+					args: { doctype: "File", name: file.name },
+					callback: () => refreshFormBootstrap(frm),
 				});
-
-				container.append(item);
 			});
-		},
+		});
+
+		container.append(item);
 	});
+
+	if (!nextCursor) return;
+	const loadMore = $(
+		`<button class="btn btn-xs btn-default attachment-load-more">${__("Load more")}</button>`
+	);
+	loadMore.on("click", function () {
+		loadMore.prop("disabled", true);
+		frappe.call({
+			method: "gnapi_customizations.customizations.chunked_upload.get_timesheet_attachments",
+			args: { timesheet: frm.doc.name, after: nextCursor },
+			callback: function (r) {
+				if (r.message) renderAttachments(frm, container, r.message.items, r.message.next_cursor);
+			},
+		});
+	});
+	container.append(loadMore);
 }
 
 function formatFileSize(bytes) {
@@ -686,47 +789,17 @@ function getFileIcon(ext) {
 function addApprovalButtons(frm) {
 	if (frm.doc.docstatus !== 1 || frm.doc.approval_status !== "Pending") return;
 
-	checkIfUserIsApprover(frm).then((isApprover) => {
-		if (!isApprover) return;
-
+	const actions = getFormBootstrap(frm).allowed_actions;
+	if (actions.includes("Approve")) {
 		frm.add_custom_button(__("Approve"), () => approveTimesheet(frm), __("Actions")).addClass(
 			"btn-success"
 		);
+	}
+	if (actions.includes("Reject")) {
 		frm.add_custom_button(__("Reject"), () => rejectTimesheet(frm), __("Actions")).addClass(
 			"btn-danger"
 		);
-	});
-}
-
-function checkIfUserIsApprover(frm) {
-	return new Promise((resolve) => {
-		if (!frm.doc.time_logs || frm.doc.time_logs.length === 0) return resolve(false);
-
-		const projects = [
-			...new Set(frm.doc.time_logs.filter((r) => r.project).map((r) => r.project)),
-		];
-		if (projects.length === 0) return resolve(false);
-
-		frappe.call({
-			method: "frappe.client.get_list",
-			args: {
-				doctype: "Project",
-				fields: ["name", "approver"],
-				filters: { name: ["in", projects] },
-			},
-			callback: function (r) {
-				if (!r.message) return resolve(false);
-				const user = frappe.session.user;
-				const isApprover = r.message.some((p) =>
-					p.approver
-						?.split(",")
-						.map((a) => a.trim())
-						.includes(user)
-				);
-				resolve(isApprover);
-			},
-		});
-	});
+	}
 }
 
 function approveTimesheet(frm) {
@@ -756,7 +829,7 @@ function openApprovalDialog(frm, action) {
 				callback: function (r) {
 					if (r.message) {
 						frappe.msgprint(`${action}d successfully`);
-						frm.reload_doc();
+						applyApprovalUpdate(frm, r.message.update);
 					}
 				},
 			});
@@ -765,3 +838,155 @@ function openApprovalDialog(frm, action) {
 	});
 	d.show();
 }
+
+// ----------------------- DELTA SAVE -----------------------
+// Saving a draft whose header is untouched sends only the added, changed and removed
+// time logs; the server revalidates just those rows, so big sheets save as fast as small edits.
+const DELTA_ROW_FIELDS = [
+	"project",
+	"task",
+	"start_date_time",
+	"end_date_time",
+	"is_billable",
+	"description",
+];
+
+function snapshotTimeLogs(frm) {
+	if (frm.is_new() || frm.doc.docstatus !== 0 || frm.doc.__unsaved) return;
+
+	const rows = {};
+	(frm.doc.time_logs || []).forEach((row) => (rows[row.name] = rowValues(row)));
+	frm.gnapi_snapshot = {
+		header: headerSignature(frm),
+		rows: rows,
+		order: (frm.doc.time_logs || []).map((row) => row.name),
+	};
+}
+
+function rowValues(row) {
+	const values = {};
+	DELTA_ROW_FIELDS.forEach((field) => (values[field] = row[field] ?? null));
+	return values;
+}
+
+function headerSignature(frm) {
+	const header = {};
+	Object.keys(frm.doc)
+		.sort()
+		.forEach((key) => {
+			if (key === "time_logs" || key === "modified" || key.startsWith("__")) return;
+			header[key] = frm.doc[key];
+		});
+	return JSON.stringify(header);
+}
+
+// null when the edit cannot be expressed as a row delta and needs a full save
+function getTimeLogDelta(frm) {
+	const snapshot = frm.gnapi_snapshot;
+	if (!snapshot || frm.is_new() || frm.doc.docstatus !== 0) return null;
+	if (headerSignature(frm) !== snapshot.header) return null;
+
+	const rows = frm.doc.time_logs || [];
+	const existing = rows.filter((row) => snapshot.rows[row.name]);
+	const present = new Set(existing.map((row) => row.name));
+	const removed = snapshot.order.filter((name) => !present.has(name));
+
+	// The server appends new rows, so reordered rows or rows inserted in between need a full save
+	const kept = snapshot.order.filter((name) => present.has(name));
+	if (existing.some((row, i) => rows[i] !== row || kept[i] !== row.name)) return null;
+
+	const changed = [];
+	existing.forEach((row) => {
+		const before = snapshot.rows[row.name];
+		const after = rowValues(row);
+		const update = { name: row.name };
+		DELTA_ROW_FIELDS.forEach((field) => {
+			if (before[field] !== after[field]) update[field] = after[field];
+		});
+		if (Object.keys(update).length > 1) changed.push(update);
+	});
+	const added = rows.slice(existing.length).map((row) => Object.assign({ name: row.name }, rowValues(row)));
+
+	if (!added.length && !changed.length && !removed.length) return null;
+	return { added, changed, removed };
+}
+
+function saveTimeLogDelta(frm) {
+	const delta = getTimeLogDelta(frm);
+	if (!delta) return;
+
+	// Stop the full-document save; the delta endpoint writes the rows instead
+	frappe.validated = false;
+	frappe.call({
+		method: "gnapi_customizations.customizations.timesheet_delta.save_time_log_delta",
+		args: Object.assign({ timesheet: frm.doc.name, modified: frm.doc.modified }, delta),
+		freeze: true,
+		callback: function (r) {
+			if (r.message) applyTimeLogDelta(frm, r.message);
+		},
+	});
+}
+
+function applyTimeLogDelta(frm, result) {
+	const saved = {};
+	result.rows.forEach((row) => (saved[row.client_name || row.name] = row));
+
+	(frm.doc.time_logs || []).forEach((row) => {
+		const match = saved[row.name];
+		if (!match) return;
+		if (match.client_name) {
+			delete locals[row.doctype][row.name];
+			row.name = match.name;
+			delete row.__islocal;
+			locals[row.doctype][row.name] = row;
+		}
+		delete row.__unsaved;
+		row.taken_hours = match.taken_hours;
+	});
+	frm.doc.modified = result.modified;
+	frm.doc.total_hours = result.total_hours;
+	frm.doc.__unsaved = 0;
+	frm.refresh_fields();
+	frm.refresh_header();
+	snapshotTimeLogs(frm);
+	frappe.show_alert({ message: __("Saved"), indicator: "green" });
+}
+
+// ----------------------- REALTIME APPROVAL UPDATES -----------------------
+// Approve/reject (single and bulk) publish small deltas; patch the open form with them
+// instead of reloading the whole document and its time logs.
+const APPROVAL_UPDATE_FIELDS = [
+	"status",
+	"approval_status",
+	"approved_by",
+	"approval_date",
+	"approval_comments",
+	"modified",
+];
+
+function listenForApprovalUpdates(frm) {
+	// Deltas arrive through the open document's room (and the user's own room)
+	if (!frm.is_new()) frappe.realtime.doc_subscribe(frm.doctype, frm.doc.name);
+	if (window.gnapi_form_approval_listener) return;
+	window.gnapi_form_approval_listener = true;
+
+	frappe.realtime.on("gnapi_approval_update", function (data) {
+		const frm = window.cur_frm;
+		if (!frm || frm.doctype !== "Custom Timesheet" || frm.is_new()) return;
+
+		const update = (data.updates || []).find((u) => u.timesheet === frm.doc.name);
+		if (update) applyApprovalUpdate(frm, update);
+	});
+}
+
+function applyApprovalUpdate(frm, update) {
+	if (!update) return frm.reload_doc();
+
+	APPROVAL_UPDATE_FIELDS.forEach((field) => {
+		if (field in update) frm.doc[field] = update[field];
+	});
+	frm.refresh_fields();
+	frm.refresh_header();
+	frm.clear_custom_buttons();
+	addApprovalButtons(frm);
+}
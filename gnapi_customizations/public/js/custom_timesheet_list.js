@@ -21,6 +21,7 @@ frappe.listview_settings["Custom Timesheet"] = {
 		add_employee_filter(listview);
 		add_quick_status_filters(listview);
 		add_my_approvals_button(listview);
+		listen_for_approval_updates(listview);
 	},
 };
 
@@ -28,66 +29,49 @@ frappe.listview_settings["Custom Timesheet"] = {
 
 function add_employee_filter(listview) {
 	listview.page.add_menu_item(__("Filter by Employee"), function () {
-		frappe.call({
-			method: "frappe.client.get_list",
-			args: {
-				doctype: "Employee",
-				fields: ["name", "employee_name"],
-				limit_page_length: 0,
-				order_by: "employee_name",
-			},
-			callback: function (r) {
-				if (!r.message) return;
-
-				const d = new frappe.ui.Dialog({
-					title: "Filter Timesheets by Employee",
-					fields: [
-						{
-							fieldtype: "Select",
-							fieldname: "employee",
-							label: "Select Employee",
-							options: ["All Employees"].concat(
-								r.message.map((emp) => `${emp.employee_name} (${emp.name})`)
-							),
-							default: "All Employees",
-						},
-						{
-							fieldtype: "Select",
-							fieldname: "approval_status",
-							label: "Approval Status",
-							options: ["All Status", "Pending", "Approved", "Rejected"],
-							default: "Pending",
-						},
-					],
-					primary_action_label: "Apply Filter",
-					primary_action: function () {
-						const employee_selection = d.get_value("employee");
-						const status_selection = d.get_value("approval_status");
-
-						listview.filter_area.clear();
-
-						if (employee_selection && employee_selection !== "All Employees") {
-							const match = employee_selection.match(/\((.+)\)$/);
-							const employee_id = match ? match[1] : null;
-							if (employee_id) {
-								listview.filter_area.add([
-									[listview.doctype, "employee", "=", employee_id],
-								]);
-							}
-						}
-
-						if (status_selection && status_selection !== "All Status") {
-							listview.filter_area.add([
-								[listview.doctype, "approval_status", "=", status_selection],
-							]);
-						}
-
-						d.hide();
-					},
-				});
-				d.show();
+		const d = new frappe.ui.Dialog({
+			title: "Filter Timesheets by Employee",
+			fields: [
+				{
+					fieldtype: "Link",
+					fieldname: "employee",
+					label: "Employee",
+					options: "Employee",
+					description: "Leave empty for all employees",
+					// Prefix search on the server instead of loading every employee into a Select
+					get_query: () => ({
+						query: "gnapi_customizations.customizations.typeahead.employee_query",
+					}),
+				},
+				{
+					fieldtype: "Select",
+					fieldname: "approval_status",
+					label: "Approval Status",
+					options: ["All Status", "Pending", "Approved", "Rejected"],
+					default: "Pending",
+				},
+			],
+			primary_action_label: "Apply Filter",
+			primary_action: function () {
+				const employee_id = d.get_value("employee");
+				const status_selection = d.get_value("approval_status");
+
+				listview.filter_area.clear();
+
+				if (employee_id) {
+					listview.filter_area.add([[listview.doctype, "employee", "=", employee_id]]);
+				}
+
+				if (status_selection && status_selection !== "All Status") {
+					listview.filter_area.add([
+						[listview.doctype, "approval_status", "=", status_selection],
+					]);
+				}
+
+				d.hide();
 			},
 		});
+		d.show();
 	});
 }
 
@@ -101,38 +85,81 @@ function add_quick_status_filters(listview) {
 }
 
 function add_my_approvals_button(listview) {
-	listview.page.add_menu_item(__("My Approvals"), function () {
-		frappe.call({
-			method: "frappe.client.get_list",
-			args: {
-				doctype: "Project",
-				fields: ["name"],
-				filters: { approver: ["like", `%${frappe.session.user}%`] },
-			},
-			callback: function (r) {
-				if (!r.message || r.message.length === 0) {
-					frappe.show_alert({
-						message: __("You are not set as approver for any projects"),
-						indicator: "orange",
-					});
-					return;
-				}
-
-				const project_names = r.message.map((p) => p.name);
-
-				// Server-side method is recommended for complex queries like "parent in Timesheet Detail"
-				// For now, filter by project field in Timesheet
-				listview.filter_area.clear();
-				listview.filter_area.add([[listview.doctype, "project", "in", project_names]]);
-				listview.filter_area.add([
-					[listview.doctype, "approval_status", "=", "Submitted"],
-				]);
+	frappe.call({
+		method: "gnapi_customizations.customizations.pending_approvals.get_pending_count",
+		callback: function (r) {
+			const count = r.message || 0;
+			const label = count ? __("My Approvals ({0})", [count]) : __("My Approvals");
+			listview.page.add_menu_item(label, function () {
+				show_pending_approvals(listview);
+			});
+		},
+	});
+}
 
+function show_pending_approvals(listview) {
+	// Server-side lookup covers projects that only appear on time log rows
+	frappe.call({
+		method: "gnapi_customizations.customizations.pending_approvals.get_pending_approvals",
+		args: { limit: 500 },
+		callback: function (r) {
+			const result = r.message || {};
+			const timesheets = [...new Set((result.items || []).map((item) => item.timesheet))];
+			if (!timesheets.length) {
 				frappe.show_alert({
-					message: __("Showing timesheets pending your approval"),
-					indicator: "blue",
+					message: __("No timesheets are pending your approval"),
+					indicator: "orange",
 				});
-			},
-		});
+				return;
+			}
+
+			listview.filter_area.clear();
+			listview.filter_area.add([[listview.doctype, "name", "in", timesheets]]);
+
+			const projects = Object.keys(result.counts_by_project || {}).length;
+			frappe.show_alert({
+				message: result.has_more
+					? __("Showing the latest {0} timesheets pending your approval", [timesheets.length])
+					: __("Showing {0} timesheet(s) pending your approval across {1} project(s)", [
+							timesheets.length,
+							projects,
+					  ]),
+				indicator: "blue",
+			});
+		},
 	});
 }
+
+// Patch rows in place from the approve/reject deltas sent to this user; other visible
+// rows only learn their new `modified`, so re-fetch the list when one of them changed
+function listen_for_approval_updates(listview) {
+	if (listview.gnapi_approval_handler) {
+		frappe.realtime.off("gnapi_approval_update", listview.gnapi_approval_handler);
+		frappe.realtime.off("gnapi_approval_change", listview.gnapi_change_handler);
+	}
+
+	listview.gnapi_approval_handler = function (data) {
+		const updates = {};
+		(data.updates || []).forEach((u) => (updates[u.timesheet] = u));
+
+		let changed = false;
+		(listview.data || []).forEach((row) => {
+			const update = updates[row.name];
+			if (!update) return;
+			["status", "approval_status", "modified"].forEach((field) => (row[field] = update[field]));
+			changed = true;
+		});
+		if (changed) listview.render();
+	};
+
+	listview.gnapi_change_handler = function (data) {
+		const modified = {};
+		(data.changes || []).forEach((c) => (modified[c.timesheet] = c.modified));
+		const stale = (listview.data || []).some(
+			(row) => row.name in modified && row.modified !== modified[row.name]
+		);
+		if (stale) listview.refresh();
+	};
+	frappe.realtime.on("gnapi_approval_update", listview.gnapi_approval_handler);
+	frappe.realtime.on("gnapi_approval_change", listview.gnapi_change_handler);
+}
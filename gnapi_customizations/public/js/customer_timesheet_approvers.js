@@ -1,10 +1,10 @@
 frappe.ui.form.on("Customer", {
 	refresh: function (frm) {
-		setupApproverMultiselect(frm, "timesheet_approver", "User");
+		setupApproverMultiselect(frm, "timesheet_approver");
 	},
 });
 
-function setupApproverMultiselect(frm, fieldname, doctype) {
+function setupApproverMultiselect(frm, fieldname) {
 	const field = frm.get_field(fieldname);
 	if (!field) return;
 
@@ -21,24 +21,13 @@ function setupApproverMultiselect(frm, fieldname, doctype) {
 	field.$input.after($btn);
 
 	$btn.on("click", function () {
-		frappe.call({
-			method: "frappe.client.get_list",
-			args: {
-				doctype: doctype,
-				fields: ["name", "full_name"],
-				filters: { enabled: 1 },
-				limit_page_length: 0,
-			},
-			callback: function (r) {
-				if (r.message) showMultiselectDialog(frm, fieldname, r.message);
-			},
-		});
+		showMultiselectDialog(frm, fieldname);
 	});
 
 	updateDisplay(frm, fieldname);
 }
 
-function showMultiselectDialog(frm, fieldname, users) {
+function showMultiselectDialog(frm, fieldname) {
 	const current_value = frm.doc[fieldname] || "";
 	const selected_users = current_value
 		.split(",")
@@ -49,29 +38,17 @@ function showMultiselectDialog(frm, fieldname, users) {
 		title: "Select Timesheet Approvers",
 		fields: [
 			{
-				fieldtype: "HTML",
-				fieldname: "user_list",
-				options: users
-					.map((u) => {
-						const name = frappe.utils.escape_html(u.name);
-						const full_name = frappe.utils.escape_html(u.full_name || u.name);
-						const checked = selected_users.includes(u.name) ? "checked" : "";
-						return `<div class="checkbox">
-                        <label>
-                            <input type="checkbox" value="${name}" ${checked}>
-                            ${full_name} (${name})
-                        </label>
-                    </div>`;
-					})
-					.join(""),
+				fieldtype: "MultiSelectPills",
+				fieldname: "users",
+				label: "Timesheet Approvers",
+				// Search enabled system users on the server instead of loading them all
+				get_data: (txt) =>
+					frappe.xcall("gnapi_customizations.customizations.typeahead.search_users", { txt }),
 			},
 		],
 		primary_action_label: "Update",
 		primary_action: function () {
-			const selected = [];
-			d.$wrapper.find('input[type="checkbox"]:checked').each(function () {
-				selected.push($(this).val());
-			});
+			const selected = d.get_value("users") || [];
 
 			frm.set_value(fieldname, selected.join(", "));
 			updateDisplay(frm, fieldname);
@@ -79,6 +56,7 @@ function showMultiselectDialog(frm, fieldname, users) {
 		},
 	});
 
+	d.set_value("users", selected_users);
 	d.show();
 }
 
@@ -0,0 +1,39 @@
+// Desk-wide Timesheet tweaks, built by `bench build` into a minified, content-hashed asset.
+// /app/timesheet is redirected on the server (website_redirects in hooks.py) and in-desk
+// navigation to it goes through frappe.re_route, so nothing here polls or wraps frappe.set_route.
+// The Custom Timesheet form and list scripts load with their doctype (doctype_js / doctype_list_js).
+
+const CUSTOM_TIMESHEET_LABEL = /custom\s+timesheet/gi;
+
+frappe.re_route = Object.assign(frappe.re_route || {}, {
+	timesheet: "custom-timesheet",
+	"timesheet/new": "custom-timesheet/new",
+	"timesheet/view/list": "custom-timesheet/view/list",
+});
+
+$(document).on("page-change", function () {
+	hideTimesheetLinks();
+	if (frappe.get_route()[1] === "Custom Timesheet") renameCustomTimesheetLabels();
+});
+
+// The stock Timesheet doctype is replaced by Custom Timesheet; hide links that still point to it
+function hideTimesheetLinks() {
+	document
+		.querySelectorAll('a[href="/app/timesheet"], a[href^="/app/timesheet/"], a[data-link*="/app/timesheet"]')
+		.forEach((link) => (link.style.display = "none"));
+}
+
+// Show "Custom Timesheet" as "Timesheet" in the current page's title, buttons and breadcrumbs
+function renameCustomTimesheetLabels() {
+	const page = (frappe.container && frappe.container.page) || document;
+	const elements = [
+		...page.querySelectorAll(".page-title .title-text, .page-actions button, h1, h2, h3"),
+		...document.querySelectorAll("#navbar-breadcrumbs a"),
+	];
+	elements.forEach((el) => {
+		// Only leaf text, so icons and nested markup survive
+		const renamed = el.textContent.replace(CUSTOM_TIMESHEET_LABEL, "Timesheet");
+		if (!el.children.length && renamed !== el.textContent) el.textContent = renamed;
+	});
+	document.title = document.title.replace(CUSTOM_TIMESHEET_LABEL, "Timesheet");
+}
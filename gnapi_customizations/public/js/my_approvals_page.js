@@ -14,6 +14,9 @@ frappe.listview_settings["Timesheet Approval"] = {
 			return [__("Approved"), "green", "approval_status,=,Approved"];
 		} else if (doc.approval_status === "Rejected") {
 			return [__("Rejected"), "red", "approval_status,=,Rejected"];
+		} else if (doc.approval_status === "Superseded") {
+			// Another approver decided the timesheet first
+			return [__("Superseded"), "gray", "approval_status,=,Superseded"];
 		} else {
 			return [__("Pending"), "orange", "approval_status,=,Pending"];
 		}
@@ -40,6 +43,24 @@ frappe.listview_settings["Timesheet Approval"] = {
 		listview.page.add_menu_item(__("Reject Selected"), function () {
 			bulkReject(listview);
 		});
+
+		listenForApprovalUpdates(listview);
+
+		// Large selections run in the background and report progress here
+		frappe.realtime.off("gnapi_bulk_approval_progress");
+		frappe.realtime.on("gnapi_bulk_approval_progress", function (data) {
+			if (data.finished) {
+				frappe.hide_progress();
+				showBulkResult(listview, data);
+				return;
+			}
+			frappe.show_progress(
+				__("Updating Timesheets"),
+				data.done,
+				data.total,
+				__("{0} of {1} processed", [data.done, data.total])
+			);
+		});
 	},
 };
 
@@ -57,11 +78,7 @@ function bulkApprove(listview) {
 			method: "gnapi_customizations.customizations.timesheet_approval_events.bulk_approve",
 			args: { approvals: selected.map((item) => item.name) },
 			callback: function (r) {
-				frappe.show_alert({
-					message: __("Approved {0} timesheet(s)", [selected.length]),
-					indicator: "green",
-				});
-				listview.refresh();
+				showBulkResult(listview, r.message);
 			},
 		});
 	});
@@ -91,14 +108,92 @@ function bulkReject(listview) {
 					comments: values.comments,
 				},
 				callback: function (r) {
-					frappe.show_alert({
-						message: __("Rejected {0} timesheet(s)", [selected.length]),
-						indicator: "red",
-					});
-					listview.refresh();
+					showBulkResult(listview, r.message);
 				},
 			});
 		},
 		__("Reject Timesheets")
 	);
 }
+
+function showBulkResult(listview, result) {
+	if (!result) return;
+
+	if (result.queued) {
+		frappe.show_alert({
+			message: __("Processing {0} timesheet(s) in the background", [result.total]),
+			indicator: "blue",
+		});
+		return;
+	}
+
+	const approved = result.approval_status === "Approved";
+	frappe.show_alert({
+		message: approved
+			? __("Approved {0} timesheet(s)", [result.updated])
+			: __("Rejected {0} timesheet(s)", [result.updated]),
+		indicator: approved ? "green" : "red",
+	});
+
+	// already_applied is a retry of an earlier success, not a failure
+	const failed = (result.results || []).filter(
+		(item) => !["updated", "already_applied"].includes(item.status)
+	);
+	if (failed.length) {
+		frappe.msgprint({
+			title: __("{0} item(s) were not updated", [failed.length]),
+			indicator: "orange",
+			message: failed
+				.map((item) =>
+					frappe.utils.escape_html(`${item.name}: ${item.message || item.status}`)
+				)
+				.join("<br>"),
+		});
+	}
+
+	// Rows already show the new status through the realtime deltas
+	listview.clear_checked_items();
+}
+
+// Patch approval rows in place from the approve/reject deltas sent to this user; for
+// timesheets decided elsewhere only {timesheet, modified} arrives, so re-fetch the list
+function listenForApprovalUpdates(listview) {
+	if (listview.gnapi_approval_handler) {
+		frappe.realtime.off("gnapi_approval_update", listview.gnapi_approval_handler);
+		frappe.realtime.off("gnapi_approval_change", listview.gnapi_change_handler);
+	}
+	const patched = {};
+
+	listview.gnapi_approval_handler = function (data) {
+		const updates = {};
+		(data.updates || []).forEach((u) => {
+			patched[u.timesheet] = u.modified;
+			(u.approvals || []).forEach((name) => (updates[name] = u));
+			(u.superseded || []).forEach(
+				(name) => (updates[name] = Object.assign({}, u, { approval_status: "Superseded" }))
+			);
+		});
+
+		let changed = false;
+		(listview.data || []).forEach((row) => {
+			const update = updates[row.name];
+			if (!update) return;
+			row.approval_status = update.approval_status;
+			row.approval_date = update.approval_date;
+			row.modified = update.modified;
+			changed = true;
+		});
+		if (changed) listview.render();
+	};
+
+	listview.gnapi_change_handler = function (data) {
+		const stale = (data.changes || []).some(
+			(c) =>
+				patched[c.timesheet] !== c.modified &&
+				(listview.data || []).some((row) => row.timesheet === c.timesheet)
+		);
+		if (stale) listview.refresh();
+	};
+	frappe.realtime.on("gnapi_approval_update", listview.gnapi_approval_handler);
+	frappe.realtime.on("gnapi_approval_change", listview.gnapi_change_handler);
+}
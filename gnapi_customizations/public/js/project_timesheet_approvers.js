@@ -1,10 +1,10 @@
 frappe.ui.form.on("Project", {
 	refresh: function (frm) {
-		setup_approver_multiselect(frm, "approver", "User");
+		setup_approver_multiselect(frm, "approver");
 	},
 });
 
-function setup_approver_multiselect(frm, fieldname, doctype) {
+function setup_approver_multiselect(frm, fieldname) {
 	const field = frm.get_field(fieldname);
 	if (!field || !field.$input || !field.$input.length) return;
 
@@ -19,26 +19,13 @@ function setup_approver_multiselect(frm, fieldname, doctype) {
 	field.$input.after($btn);
 
 	$btn.on("click", function () {
-		frappe.call({
-			method: "frappe.client.get_list",
-			args: {
-				doctype: doctype,
-				fields: ["name", "full_name"],
-				filters: { enabled: 1 },
-				limit_page_length: 0,
-			},
-			callback: function (r) {
-				if (r.message) {
-					show_multiselect_dialog(frm, fieldname, r.message);
-				}
-			},
-		});
+		show_multiselect_dialog(frm, fieldname);
 	});
 
 	update_display(frm, fieldname);
 }
 
-function show_multiselect_dialog(frm, fieldname, users) {
+function show_multiselect_dialog(frm, fieldname) {
 	const current_value = frm.doc[fieldname] || "";
 	const selected_users = current_value
 		.split(",")
@@ -49,36 +36,27 @@ function show_multiselect_dialog(frm, fieldname, users) {
 		title: "Select Approvers",
 		fields: [
 			{
-				fieldtype: "HTML",
-				fieldname: "user_list",
-				options: users
-					.map(
-						(u) => `
-                <div class="checkbox">
-                    <label>
-                        <input type="checkbox" value="${u.name}" ${
-							selected_users.includes(u.name) ? "checked" : ""
-						}>
-                        ${u.full_name || u.name} (${u.name})
-                    </label>
-                </div>
-            `
-					)
-					.join(""),
+				fieldtype: "MultiSelectPills",
+				fieldname: "users",
+				label: "Approvers",
+				// Matches come from the server's prefix index, a page at a time, as the user types
+				get_data: function (txt) {
+					return frappe.xcall("gnapi_customizations.customizations.typeahead.search_users", {
+						txt: txt,
+					});
+				},
 			},
 		],
 		primary_action_label: "Update",
 		primary_action: function () {
-			const selected = [];
-			d.$wrapper.find('input[type="checkbox"]:checked').each(function () {
-				selected.push($(this).val());
-			});
+			const selected = d.get_value("users") || [];
 			frm.set_value(fieldname, selected.join(", "));
 			update_display(frm, fieldname);
 			d.hide();
 		},
 	});
 
+	d.set_value("users", selected_users);
 	d.show();
 }
 
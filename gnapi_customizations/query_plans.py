@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import frappe
+from frappe.utils import cint
+
+# query -> outer tables it may walk in full: the list-view table read in `modified` order
+# with a LIMIT. Any other full scan fails, whether or not the optimizer had an index to use.
+ALLOWED_SCANS = {
+    "permission_query": {"tabCustom Timesheet"},
+}
+# Most rows EXPLAIN may estimate for such a scan (site config gnapi_max_list_scan_rows).
+# A thousand timesheets fit in a few InnoDB pages, where the optimizer rightly prefers one
+# pass over the visibility semi-join; past that a scan means the index is not driving the
+# query, so a production-sized table always fails.
+DEFAULT_MAX_LIST_SCAN_ROWS = 1_000
+# select_type of the outermost table of a plan
+_OUTER_SELECT_TYPES = {"SIMPLE", "PRIMARY"}
+
+def get_hot_queries() -> list[tuple[str, str, dict]]:
+    """(label, sql, values) for each query on the approval hot paths, with sample parameters"""
+    from gnapi_customizations.customizations.custom_timesheet_events import custom_timesheet_permission_query
+
+    approver = frappe.db.sql(
+        """
+        SELECT m.user FROM `tabProject Approver Map` m
+        WHERE NOT EXISTS (
+            SELECT 1 FROM `tabHas Role` r
+            WHERE r.parent = m.user AND r.parenttype = 'User' AND r.role = 'System Manager'
+        )
+        LIMIT 1
+        """,
+        pluck=True,
+    )
+    approver = approver[0] if approver else None
+    sample_user = approver or "approver@example.com"
+    sample_timesheet = frappe.db.get_value("Custom Timesheet", {}, "name") or "_sample_timesheet"
+
+    queries = [
+        (
+            "approval_exists",
+            """SELECT approver FROM `tabTimesheet Approval`
+            WHERE timesheet = %(timesheet)s AND approver IN %(approvers)s""",
+            {"timesheet": sample_timesheet, "approvers": (sample_user,)},
+        ),
+        (
+            "pending_list",
+            """SELECT name, timesheet FROM `tabTimesheet Approval`
+            WHERE approver = %(user)s AND approval_status = 'Pending'
+            ORDER BY creation DESC, name DESC LIMIT 50""",
+            {"user": sample_user},
+        ),
+        (
+            "approver_projects",
+            "SELECT DISTINCT project FROM `tabProject Approver Map` WHERE user = %(user)s",
+            {"user": sample_user},
+        ),
+        (
+            "employee_for_user",
+            "SELECT name FROM `tabEmployee` WHERE user_id = %(user)s",
+            {"user": sample_user},
+        ),
+        (
+            "timesheet_projects",
+            """SELECT project FROM `tabCustom Timesheet Detail`
+            WHERE parent = %(timesheet)s AND parenttype = 'Custom Timesheet'""",
+            {"timesheet": sample_timesheet},
+        ),
+    ]
+
+    # The permission query only has an approver branch for users who approve something
+    if approver:
+        condition = custom_timesheet_permission_query(approver)
+        if condition:
+            queries.append((
+                "permission_query",
+                f"SELECT name FROM `tabCustom Timesheet` WHERE {condition} ORDER BY modified DESC LIMIT 20",
+                {},
+            ))
+
+    return queries
+
+def check_query_plans(raise_on_failure: bool = True) -> list[dict]:
+    """EXPLAIN every hot query and flag tables read with a full scan"""
+    report = []
+    for label, sql, values in get_hot_queries():
+        failures = []
+        for row in frappe.db.sql(f"EXPLAIN {sql}", values or None, as_dict=True):
+            table = row.get("table") or ""
+            if (row.get("type") or "").upper() == "ALL" and not _is_allowed_scan(label, table, row):
+                failures.append(table)
+        report.append({"query": label, "ok": not failures, "full_scans": failures})
+
+    failed = [r for r in report if not r["ok"]]
+    if failed and raise_on_failure:
+        frappe.throw(
+            "Hot queries fall back to a full table scan: "
+            + "; ".join(f"{r['query']} ({', '.join(r['full_scans'])})" for r in failed)
+        )
+    return report
+
+def get_max_list_scan_rows() -> int:
+    return cint(frappe.conf.get("gnapi_max_list_scan_rows") or DEFAULT_MAX_LIST_SCAN_ROWS)
+
+def _is_allowed_scan(label: str, table: str, row: dict) -> bool:
+    return (
+        table in ALLOWED_SCANS.get(label, set())
+        and (row.get("select_type") or "").upper() in _OUTER_SELECT_TYPES
+        and (row.get("rows") or 0) <= get_max_list_scan_rows()
+    )